@@ -71,6 +71,24 @@ module tb_axi_llc #(
 
   typedef logic [7:0] byte_t;
 
+  // Record of a replay file, written by `util/llc-replay-gen.py`
+  typedef struct packed {
+    logic [31:0] gap;
+    logic [15:0] id;
+    logic [7:0]  len;
+    logic [2:0]  size;
+    logic [1:0]  burst;
+    logic        write;
+    logic [1:0]  reserved;
+    logic [63:0] addr;
+  } replay_rec_t;
+
+  // Replay record with the cycle it is issued in, counted from the start of the replay
+  typedef struct {
+    longint unsigned cycle;
+    replay_rec_t     rec;
+  } replay_ax_t;
+
   // rule definitions
   typedef struct packed {
     int unsigned idx;
@@ -148,6 +166,16 @@ module tb_axi_llc #(
     .TT ( TbTestTime  )
   ) regbus_conf_driver_t;
 
+  // Drives the bursts of a replay file, see `replay`
+  typedef axi_test::axi_driver #(
+    .AW ( TbAxiAddrWidthFull ),
+    .DW ( TbAxiDataWidthFull ),
+    .IW ( TbAxiIdWidthFull   ),
+    .UW ( TbAxiUserWidthFull ),
+    .TA ( TbApplTime         ),
+    .TT ( TbTestTime         )
+  ) axi_replay_driver_t;
+
   typedef axi_test::axi_scoreboard #(
     .IW( TbAxiIdWidthFull   ),
     .AW( TbAxiAddrWidthFull ),
@@ -275,6 +303,8 @@ module tb_axi_llc #(
     automatic logic[31:0]     cfg_data    = 32'd0;
     automatic logic[ 3:0]     cfg_wstrb   =  4'd0;
     automatic logic           cfg_error   =  1'b0;
+    // Replay file given with `+axi_replay=<file>`
+    automatic string          replay_file;
 
     // Reset the AXI drivers and scoreboards
     cpu_scoreboard.reset();
@@ -327,6 +357,21 @@ module tb_axi_llc #(
     reg_conf_driver.send_read(VersionLow,     cfg_data, cfg_error);
     reg_conf_driver.send_read(VersionHigh,    cfg_data, cfg_error);
 
+    // Replace the random traffic with the bursts of a replay file, so that the performance
+    // counters are measured on that traffic alone.
+    if ($value$plusargs("axi_replay=%s", replay_file)) begin
+      $info("Replay %s", replay_file);
+      replay(replay_file);
+
+      print_perf_couters();
+
+      flush_all(reg_conf_driver);
+      compare_mems(cpu_scoreboard, mem_scoreboard);
+
+      $display("Tests ended!");
+      $finish();
+    end
+
     $info("Random read and write");
     axi_master.run(TbNumReads, TbNumWrites);
     flush_all(reg_conf_driver);
@@ -447,6 +492,138 @@ module tb_axi_llc #(
     print_counters = 1'b0;
   endtask : print_perf_couters
 
+  // Records read from a replay file at once
+  localparam int unsigned ReplayChunk = 32'd4096;
+
+  // Drive the bursts of a replay file on the slave port. The file is a header followed by
+  // `replay_rec_t` records, see `util/llc_model/replay.py`. It is read in chunks of `ReplayChunk`
+  // records, AWs and ARs are issued in their own threads at the cycles of the records, with random
+  // write data.
+  task automatic replay(input string replay_file);
+    automatic axi_replay_driver_t        drv    = new(axi_cpu_intf_dv);
+    automatic mailbox #(replay_ax_t)     aw_mbx = new(ReplayChunk);
+    automatic mailbox #(replay_ax_t)     ar_mbx = new(ReplayChunk);
+    automatic mailbox #(replay_rec_t)    w_mbx  = new();
+    automatic logic [127:0]              header;
+    automatic logic [127:0]              chunk [ReplayChunk];
+    automatic int unsigned               num_writes, num_reads;
+    automatic int                        fd;
+    automatic time                       start;
+
+    fd = $fopen(replay_file, "rb");
+    if (fd == 0) begin
+      $fatal(1, "Cannot open the replay file %s", replay_file);
+    end
+    if (($fread(header, fd) != 16) || (header[127:96] != "AXLR") || (header[95:64] != 32'd1)) begin
+      $fatal(1, "%s is not a replay file of version 1", replay_file);
+    end
+    num_writes = header[63:32];
+    num_reads  = header[31:0];
+    $info("Replay %0d writes and %0d reads", num_writes, num_reads);
+
+    @(posedge clk);
+    start = $time;
+    fork
+      begin : proc_replay_read
+        automatic longint unsigned cycle = 0;
+        automatic int unsigned     left  = num_writes + num_reads;
+        while (left > 0) begin
+          automatic int unsigned num = (left < ReplayChunk) ? left : ReplayChunk;
+          if ($fread(chunk, fd, 0, num) != 16 * num) begin
+            $fatal(1, "%s is truncated", replay_file);
+          end
+          for (int unsigned i = 0; i < num; i++) begin
+            automatic replay_ax_t ax;
+            ax.rec   = replay_rec_t'(chunk[i]);
+            cycle   += ax.rec.gap;
+            ax.cycle = cycle;
+            if (ax.rec.write) begin
+              aw_mbx.put(ax);
+            end else begin
+              ar_mbx.put(ax);
+            end
+          end
+          left -= num;
+        end
+        $fclose(fd);
+      end
+      begin : proc_replay_aw
+        repeat (num_writes) begin
+          automatic replay_ax_t ax;
+          aw_mbx.get(ax);
+          wait_replay_cycle(start, ax.cycle);
+          drv.send_aw(replay_ax_beat(ax.rec));
+          w_mbx.put(ax.rec);
+        end
+      end
+      begin : proc_replay_w
+        repeat (num_writes) begin
+          automatic replay_rec_t rec;
+          w_mbx.get(rec);
+          for (int unsigned i = 0; i <= rec.len; i++) begin
+            automatic axi_replay_driver_t::w_beat_t beat = new;
+            automatic shortint unsigned lower = axi_pkg::beat_lower_byte(rec.addr, rec.size,
+                rec.len, rec.burst, TbAxiStrbWidthFull, i);
+            automatic shortint unsigned upper = axi_pkg::beat_upper_byte(rec.addr, rec.size,
+                rec.len, rec.burst, TbAxiStrbWidthFull, i);
+            void'(std::randomize(beat.w_data));
+            beat.w_strb = '0;
+            for (int unsigned j = lower; j <= upper; j++) begin
+              beat.w_strb[j] = 1'b1;
+            end
+            beat.w_last = (i == rec.len);
+            drv.send_w(beat);
+          end
+        end
+      end
+      begin : proc_replay_b
+        repeat (num_writes) begin
+          automatic axi_replay_driver_t::b_beat_t beat;
+          drv.recv_b(beat);
+        end
+      end
+      begin : proc_replay_ar
+        repeat (num_reads) begin
+          automatic replay_ax_t ax;
+          ar_mbx.get(ax);
+          wait_replay_cycle(start, ax.cycle);
+          drv.send_ar(replay_ax_beat(ax.rec));
+        end
+      end
+      begin : proc_replay_r
+        automatic int unsigned done = 0;
+        while (done < num_reads) begin
+          automatic axi_replay_driver_t::r_beat_t beat;
+          drv.recv_r(beat);
+          if (beat.r_last) begin
+            done++;
+          end
+        end
+      end
+    join
+    $info("Replay of %s done", replay_file);
+  endtask : replay
+
+  // Wait until the cycle of a replay record, records behind their cycle are sent immediately
+  task automatic wait_replay_cycle(input time start, input longint unsigned cycle);
+    automatic time issue = start + cycle * TbCyclTime;
+    if (issue > $time) begin
+      #(issue - $time);
+    end
+  endtask : wait_replay_cycle
+
+  function automatic axi_replay_driver_t::ax_beat_t replay_ax_beat(input replay_rec_t rec);
+    automatic axi_replay_driver_t::ax_beat_t beat = new;
+    beat.ax_id    = rec.id;
+    beat.ax_addr  = rec.addr;
+    beat.ax_len   = rec.len;
+    beat.ax_size  = rec.size;
+    beat.ax_burst = rec.burst;
+    beat.ax_cache = ((rec.addr >= SpmRegionStart) && (rec.addr < SpmRegionStart + SpmRegionLength))
+                  ? axi_pkg::NORMAL_NONCACHEABLE_BUFFERABLE : axi_pkg::WBACK_RWALLOCATE;
+    return beat;
+  endfunction : replay_ax_beat
+
 
   ///////////////////////
   // Design under test //
@@ -482,6 +659,51 @@ module tb_axi_llc #(
     .axi_llc_events_o    ( llc_events                             )
   );
 
+  /////////////////////////
+  // `AXI Trace` monitor //
+  /////////////////////////
+  // Writes every handshake of the slave port to the file given with `+axi_trace=<file>`,
+  // `util/axi-trace.py` converts it into a binary trace.
+  int axi_trace_fd = 0;
+
+  initial begin : proc_axi_trace
+    automatic string           trace_file;
+    automatic longint unsigned cycle = 0;
+    if ($value$plusargs("axi_trace=%s", trace_file)) begin
+      axi_trace_fd = $fopen(trace_file, "w");
+      @(posedge rst_n);
+      forever begin
+        @(posedge clk);
+        #(TbTestTime);
+        if (axi_cpu_req.aw_valid && axi_cpu_res.aw_ready) begin
+          $fdisplay(axi_trace_fd, "%0d AW %0h %0h %0d %0d %0d", cycle, axi_cpu_req.aw.id,
+              axi_cpu_req.aw.addr, axi_cpu_req.aw.len, axi_cpu_req.aw.size, axi_cpu_req.aw.burst);
+        end
+        if (axi_cpu_req.w_valid && axi_cpu_res.w_ready) begin
+          $fdisplay(axi_trace_fd, "%0d W %0d", cycle, axi_cpu_req.w.last);
+        end
+        if (axi_cpu_res.b_valid && axi_cpu_req.b_ready) begin
+          $fdisplay(axi_trace_fd, "%0d B %0h", cycle, axi_cpu_res.b.id);
+        end
+        if (axi_cpu_req.ar_valid && axi_cpu_res.ar_ready) begin
+          $fdisplay(axi_trace_fd, "%0d AR %0h %0h %0d %0d %0d", cycle, axi_cpu_req.ar.id,
+              axi_cpu_req.ar.addr, axi_cpu_req.ar.len, axi_cpu_req.ar.size, axi_cpu_req.ar.burst);
+        end
+        if (axi_cpu_res.r_valid && axi_cpu_req.r_ready) begin
+          $fdisplay(axi_trace_fd, "%0d R %0h %0d", cycle, axi_cpu_res.r.id, axi_cpu_res.r.last);
+        end
+        cycle++;
+      end
+    end
+  end
+
+  // The trace is flushed and closed when the simulation ends with `$finish`.
+  final begin : proc_axi_trace_close
+    if (axi_trace_fd != 0) begin
+      $fclose(axi_trace_fd);
+    end
+  end
+
   ////////////////////////////
   // `Perf Counter` process //
   ////////////////////////////
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Convert and inspect binary AXI traces of the LLC slave port"""
+import sys
+import json
+import argparse
+from llc_model import add_config_arguments, config_from_args, convert_monitor_log
+from llc_model.axi_trace import bursts, summary
+from perf_log import open_log
+from profiler import Profiler, add_profile_argument
+
+
+def cmd_convert(args, profiler):
+    """Convert a monitor log into a binary trace"""
+    cfg = config_from_args(args)
+    with profiler.phase('convert'), open_log(args.log) as f:
+        count = convert_monitor_log(f, args.trace, cfg)
+    profiler.count('events', count)
+    print(f'{count} events written to {args.trace}')
+
+
+def cmd_info(args, profiler):
+    """Print the event counts and data bytes of a trace"""
+    with profiler.phase('summary'):
+        print(json.dumps(summary(args.trace), indent=2))
+
+
+def cmd_bursts(args, profiler):
+    """Write the bursts of a trace as `.npz` trace"""
+    with profiler.phase('bursts'):
+        trace = bursts(args.trace)
+        trace.save(args.output)
+    profiler.count('bursts', len(trace))
+
+
+def main():
+    """Run the subcommand given on the command line"""
+    parser = argparse.ArgumentParser(description='Work with binary traces of the AXI handshakes '
+                                     'at the LLC slave port')
+    add_profile_argument(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert = subparsers.add_parser('convert', help='convert the output of the tb_axi_llc '
+                                    'monitor (+axi_trace=<file>) into a binary trace')
+    convert.add_argument('log', help='monitor output, `.gz` files are decompressed')
+    convert.add_argument('trace', help='binary trace written')
+    add_config_arguments(convert)
+    convert.set_defaults(func=cmd_convert)
+
+    info = subparsers.add_parser('info', help='print events and bytes per channel and region')
+    info.add_argument('trace', help='binary trace')
+    info.set_defaults(func=cmd_info)
+
+    export = subparsers.add_parser('bursts', help='write the AW and AR bursts as `.npz` trace '
+                                   'for llc-model.py and llc-policy-explorer.py')
+    export.add_argument('trace', help='binary trace')
+    export.add_argument('output', help='`.npz` file written')
+    export.set_defaults(func=cmd_bursts)
+
+    args = parser.parse_args()
+    profiler = Profiler(args.profile)
+    try:
+        args.func(args, profiler)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
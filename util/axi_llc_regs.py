@@ -0,0 +1,243 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Access to the configuration registers of `axi_llc` from Python
+
+The register map is read from `data/axi_llc_regs.hjson`, the same description `regtool` generates
+the RTL and `sw/include/axi_llc_regs.h` from. The 64-bit registers are split into a `_LOW` and a
+`_HIGH` word and are accessed by their common name, e.g. `CFG_SPM`.
+
+Unlike `sw/lib/axi_llc_reg32.c`, which commits after every register, writes can be batched so
+that SPM and flush masks are applied by a single `COMMIT_CFG`: the hardware flushes
+`(CFG_FLUSH | CFG_SPM) & ~FLUSHED` once, sets `FLUSHED` to `CFG_SPM` and clears `CFG_FLUSH` when
+it is done. The upper words are only accessed if the LLC has more than 32 ways.
+"""
+import os
+import time
+import mmap
+import collections
+import hjson
+
+REGS_HJSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data',
+                          'axi_llc_regs.hjson')
+
+Register = collections.namedtuple('Register', ('name', 'offset', 'swaccess', 'desc'))
+
+
+def load_registers(path=REGS_HJSON):
+    """Registers of the hjson description by name, with their byte offsets"""
+    with open(path, 'r', encoding='utf-8') as f:
+        desc = hjson.load(f)
+    reg_bytes = desc.get('regwidth', 32) // 8
+    registers = {}
+    offset = 0
+    for entry in desc['registers']:
+        if 'skipto' in entry:
+            offset = int(entry['skipto'], 0)
+            continue
+        registers[entry['name']] = Register(entry['name'], offset, entry['swaccess'],
+                                            entry['desc'])
+        offset += reg_bytes
+    return registers
+
+
+def wide_registers(registers):
+    """Offsets of the low and high word of every 64-bit register by its common name"""
+    return {name[:-4]: (reg.offset, registers[name[:-4] + '_HIGH'].offset)
+            for name, reg in registers.items()
+            if name.endswith('_LOW') and name[:-4] + '_HIGH' in registers}
+
+
+class Backend:
+    """Register file accessed as 32-bit words of a memoryview"""
+    def __init__(self, words):
+        self._words = words
+
+    def read32(self, offset):
+        """Read the 32-bit word at the byte offset"""
+        return self._words[offset >> 2]
+
+    def write32(self, offset, value):
+        """Write the 32-bit word at the byte offset"""
+        self._words[offset >> 2] = value & 0xffff_ffff
+
+    def close(self):
+        """Release the register file"""
+        self._words.release()
+
+
+class MemoryBackend(Backend):
+    """Register file held in memory, e.g. for testing software without hardware"""
+    def __init__(self, size=0x1000):
+        super().__init__(memoryview(bytearray(size)).cast('I'))
+
+
+class MmapBackend(Backend):
+    """Register file mapped from a device (e.g. `/dev/mem` or a UIO device) or a regular file
+
+    Every access is one aligned 32-bit load or store of the mapped page.
+    """
+    def __init__(self, path, base=0, size=0x1000):
+        shift = base % mmap.ALLOCATIONGRANULARITY
+        fd = os.open(path, os.O_RDWR | getattr(os, 'O_SYNC', 0))
+        try:
+            self._mmap = mmap.mmap(fd, shift + size, mmap.MAP_SHARED,
+                                   mmap.PROT_READ | mmap.PROT_WRITE, offset=base - shift)
+        finally:
+            os.close(fd)
+        super().__init__(memoryview(self._mmap)[shift:].cast('I'))
+
+    def close(self):
+        super().close()
+        self._mmap.close()
+
+
+class SimulatedLlc(MemoryBackend):
+    """In-memory register file reacting to `COMMIT_CFG` like `axi_llc_config`
+
+    Flushes complete immediately after the commit, the BIST is done from the start.
+    """
+    def __init__(self, set_associativity=8, num_lines=256, num_blocks=8, version=0,
+                 registers=None):
+        super().__init__()
+        self.registers = load_registers() if registers is None else registers
+        self.flushed_ways = []
+        for name, value in (('SET_ASSO', set_associativity), ('NUM_LINES', num_lines),
+                            ('NUM_BLOCKS', num_blocks), ('VERSION', version)):
+            self._write64(name, value)
+        self.write32(self.registers['BIST_STATUS'].offset, 1)
+
+    def _read64(self, name):
+        return (self.read32(self.registers[name + '_HIGH'].offset) << 32 |
+                self.read32(self.registers[name + '_LOW'].offset))
+
+    def _write64(self, name, value):
+        super().write32(self.registers[name + '_LOW'].offset, value)
+        super().write32(self.registers[name + '_HIGH'].offset, value >> 32)
+
+    def write32(self, offset, value):
+        if offset == self.registers['COMMIT_CFG'].offset and value & 1:
+            all_ways = (1 << self._read64('SET_ASSO')) - 1
+            spm = self._read64('CFG_SPM') & all_ways
+            to_flush = (self._read64('CFG_FLUSH') | spm) & ~self._read64('FLUSHED') & all_ways
+            self.flushed_ways.extend(way for way in range(all_ways.bit_length())
+                                     if to_flush >> way & 1)
+            self._write64('CFG_FLUSH', 0)
+            self._write64('FLUSHED', spm)
+            return
+        super().write32(offset, value)
+
+
+class AxiLlcRegs:
+    """Register driver of one `axi_llc` instance on top of a backend"""
+    def __init__(self, backend, registers=None):
+        self.backend = backend
+        self.registers = load_registers() if registers is None else registers
+        self.wide = wide_registers(self.registers)
+        self._batch = None
+        # the instantiated parameters are constant, read them once; at most 64 ways
+        self.set_associativity = self.backend.read32(self.wide['SET_ASSO'][0])
+        self.all_ways = (1 << self.set_associativity) - 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.backend.close()
+
+    def _offsets(self, name):
+        if name in self.wide:
+            return self.wide[name]
+        return (self.registers[name].offset, None)
+
+    def read(self, name):
+        """Read a 32-bit register, or the 64-bit register with the common name"""
+        low, high = self._offsets(name)
+        value = self.backend.read32(low)
+        if high is not None and self.set_associativity > 32:
+            value |= self.backend.read32(high) << 32
+        return value
+
+    def write(self, name, value):
+        """Write a register, deferred until the end of the batch inside `batch()`"""
+        low, high = self._offsets(name)
+        words = [(low, value & 0xffff_ffff)]
+        if high is not None and self.set_associativity > 32:
+            words.append((high, value >> 32 & 0xffff_ffff))
+        if self._batch is None:
+            for offset, word in words:
+                self.backend.write32(offset, word)
+        else:
+            self._batch.update(words)
+
+    def batch(self, commit=True):
+        """Context manager collecting writes, flushed in offset order with a single commit"""
+        return _Batch(self, commit)
+
+    def configure(self, spm=None, flush=None):
+        """Set the SPM ways and/or the ways to flush with one commit"""
+        with self.batch():
+            if spm is not None:
+                self.write('CFG_SPM', spm & self.all_ways)
+            if flush is not None:
+                self.write('CFG_FLUSH', flush & self.all_ways)
+
+    def poll(self, name, mask, value, timeout=1.0, interval=1e-6):
+        """Wait until `read(name) & mask == value`, returns the last value read
+
+        The polling interval doubles up to 1 ms, so short operations are seen quickly without
+        hammering the bus during long ones. Raises `TimeoutError` after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self.read(name)
+            if current & mask == value:
+                return current
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'{name} = {current:#x}, expected {value:#x} under mask '
+                                   f'{mask:#x} within {timeout} s')
+            time.sleep(interval)
+            interval = min(2 * interval, 1e-3)
+
+    def flush(self, ways=None, timeout=1.0):
+        """Flush the given ways (default: all) and wait until the flush is done"""
+        self.configure(flush=self.all_ways if ways is None else ways)
+        # `CFG_FLUSH` is cleared when the flush FSM returns to idle
+        self.poll('CFG_FLUSH', self.all_ways, 0, timeout)
+
+    def set_spm(self, ways, timeout=1.0):
+        """Configure the SPM ways and wait until they are flushed and usable"""
+        ways &= self.all_ways
+        self.configure(spm=ways)
+        self.poll('FLUSHED', ways, ways, timeout)
+
+    def wait_bist(self, timeout=1.0):
+        """Wait for the tag storage BIST, returns the mask of the failing ways"""
+        self.poll('BIST_STATUS', 1, 1, timeout)
+        return self.read('BIST_OUT')
+
+    def info(self):
+        """The instantiated parameters and the current configuration"""
+        return {name.lower(): self.read(name) for name in
+                ('SET_ASSO', 'NUM_LINES', 'NUM_BLOCKS', 'VERSION', 'CFG_SPM', 'CFG_FLUSH',
+                 'FLUSHED', 'BIST_OUT', 'BIST_STATUS')}
+
+
+class _Batch:
+    def __init__(self, regs, commit):
+        self.regs = regs
+        self.commit = commit
+
+    def __enter__(self):
+        self.regs._batch = {}  # pylint: disable=protected-access
+        return self.regs
+
+    def __exit__(self, exc_type, *exc):
+        words, self.regs._batch = self.regs._batch, None  # pylint: disable=protected-access
+        if exc_type is not None:
+            return
+        for offset in sorted(words):
+            self.regs.backend.write32(offset, words[offset])
+        if self.commit and words:
+            self.regs.backend.write32(self.regs.registers['COMMIT_CFG'].offset, 1)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Benchmark the util scripts on synthetic git repositories"""
+import sys
+import os
+import json
+import time
+import shutil
+import random
+import argparse
+import tempfile
+import itertools
+import subprocess
+
+UTIL_DIR = os.path.dirname(os.path.abspath(__file__))
+LICENCE_CONFIG = os.path.join(UTIL_DIR, 'licence-checker.hjson')
+
+LICENCE = [
+    'Copyright 2022 ETH Zurich and University of Bologna.',
+    'Solderpad Hardware License, Version 0.51, see LICENSE for details.',
+    'SPDX-License-Identifier: SHL-0.51'
+]
+
+# file types of the synthetic repositories: (extension, comment prefix)
+FILE_TYPES = [('.sv', '//'), ('.py', '#'), ('.c', '//'), ('.yml', '#')]
+
+# the scripts benchmarked, as (name, command); `{util}` is replaced by the util directory
+SCRIPTS = [
+    ('list-todos', ['{util}/list-todos.py', '.sv .py .c .yml', '']),
+    ('list-todos-fast', ['{util}/list-todos.py', '--fast', '.sv .py .c .yml', '']),
+    ('list-contributors', ['{util}/list-contributors.py',
+                           '--category', 'Hardware Files', '.sv',
+                           '--category', 'Other Files', '.py .c .yml', '']),
+    ('lint-commits', ['{util}/lint-commits.py', 'HEAD']),
+    ('licence-checker', ['{util}/licence-checker.py', '--config', LICENCE_CONFIG]),
+]
+
+# logs every git invocation before running the real git
+GIT_WRAPPER = '''#!/bin/sh
+echo "$@" >> "{log}"
+exec "{git}" "$@"
+'''
+
+
+def file_content(rng, num_lines, comment, todo_density):
+    """A source file with a licence header and randomly placed TODOs"""
+    lines = [f'{comment} {line}' for line in LICENCE] + ['']
+    for idx in range(num_lines):
+        if rng.random() < todo_density:
+            lines.append(f'{comment} TODO: revisit line {idx}')
+        else:
+            lines.append(f'value_{idx} = {rng.getrandbits(32)};')
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_paths(params):
+    """Paths of the files of a synthetic repository and their comment prefix"""
+    paths = []
+    for idx in range(params['files']):
+        ext, comment = FILE_TYPES[idx % len(FILE_TYPES)]
+        paths.append((f'dir{idx % 16}/file{idx}{ext}', comment))
+    return paths
+
+
+def fast_import_stream(params, seed):
+    """Generate a git fast-import stream of the synthetic history"""
+    rng = random.Random(seed)
+    paths = synthetic_paths(params)
+    authors = [(f'Author Number{idx}', f'author{idx}@example.com')
+               for idx in range(params['authors'])]
+    for commit in range(params['commits']):
+        name, email = authors[commit % len(authors)]
+        # the first commit adds all files, later ones modify a few of them
+        if commit == 0:
+            touched = paths
+        else:
+            touched = rng.sample(paths, max(1, len(paths) // 20))
+        message = f'Update {len(touched)} files in step {commit}\n'
+        signature = f'{name} <{email}> {1600000000 + commit * 60} +0000'
+        yield 'commit refs/heads/master\n'
+        yield f'author {signature}\ncommitter {signature}\n'
+        yield f'data {len(message.encode())}\n{message}\n'
+        for path, comment in touched:
+            data = file_content(rng, params['lines'], comment, params['todo_density'])
+            yield f'M 100644 inline {path}\ndata {len(data.encode())}\n{data}\n'
+
+
+def create_repo(path, params, seed):
+    """Create a synthetic repository with the given parameters using git fast-import"""
+    subprocess.run(['git', 'init', '-q', '-b', 'master', path], check=True)
+    with subprocess.Popen(['git', '-C', path, 'fast-import', '--quiet'],
+                          stdin=subprocess.PIPE) as proc:
+        for chunk in fast_import_stream(params, seed):
+            proc.stdin.write(chunk.encode())
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError('git fast-import failed')
+    subprocess.run(['git', '-C', path, 'checkout', '-q', '-f', 'master'], check=True)
+
+
+def run_script(cmd, repo, wrapper_dir, git_log):
+    """Run a script in the repository, measuring wall time, peak RSS and git calls"""
+    env = dict(os.environ)
+    env['PATH'] = wrapper_dir + os.pathsep + env.get('PATH', '')
+    env['GIT_PYTHON_GIT_EXECUTABLE'] = os.path.join(wrapper_dir, 'git')
+    with open(git_log, 'w', encoding='utf-8'):
+        pass
+
+    start = time.perf_counter()
+    with subprocess.Popen([sys.executable] + cmd, cwd=repo, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) as proc:
+        _, status, rusage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+        # reaped by wait4 already, leaving the block must not wait again
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+    with open(git_log, 'r', encoding='utf-8') as f:
+        git_calls = sum(1 for _ in f)
+    return {
+        'wall_s': round(wall, 4),
+        # ru_maxrss is given in KiB on Linux
+        'peak_rss_kib': rusage.ru_maxrss,
+        'git_calls': git_calls,
+        'returncode': proc.returncode
+    }
+
+
+def make_git_wrapper(work_dir):
+    """Install the logging git wrapper, returns its directory and the log file"""
+    wrapper_dir = os.path.join(work_dir, 'bin')
+    git_log = os.path.join(work_dir, 'git-calls.log')
+    os.makedirs(wrapper_dir)
+    with open(os.path.join(wrapper_dir, 'git'), 'w', encoding='utf-8') as f:
+        f.write(GIT_WRAPPER.format(log=git_log, git=shutil.which('git')))
+    os.chmod(os.path.join(wrapper_dir, 'git'), 0o755)
+    return wrapper_dir, git_log
+
+
+def bench_repo(repo, params, scripts, repeat, wrapper):
+    """Run every script `repeat` times in a repository, returns the fastest runs"""
+    report = []
+    for name, cmd in scripts:
+        cmd = [arg.replace('{util}', UTIL_DIR) for arg in cmd]
+        runs = [run_script(cmd, repo, *wrapper) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run['wall_s'])
+        best['peak_rss_kib'] = max(run['peak_rss_kib'] for run in runs)
+        report.append({'script': name, 'params': params, **best})
+        print(f'  {name}: {best["wall_s"]:.3f}s, {best["peak_rss_kib"]} KiB, '
+              f'{best["git_calls"]} git calls', file=sys.stderr)
+    return report
+
+
+def main():
+    """Generate the repositories of the parameter grid and benchmark the scripts on them"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the util scripts on synthetic repositories')
+    parser.add_argument('--files', type=int, nargs='+', default=[100],
+                        help='number of files (multiple values are swept)')
+    parser.add_argument('--lines', type=int, nargs='+', default=[200],
+                        help='lines per file')
+    parser.add_argument('--authors', type=int, nargs='+', default=[4],
+                        help='number of commit authors')
+    parser.add_argument('--commits', type=int, nargs='+', default=[20],
+                        help='number of commits')
+    parser.add_argument('--todo-density', type=float, nargs='+', default=[0.005],
+                        help='probability of a line being a TODO')
+    parser.add_argument('--scripts', nargs='+', default=[name for name, _ in SCRIPTS],
+                        choices=[name for name, _ in SCRIPTS], help='scripts to benchmark')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='runs per script, the fastest one is reported')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the repository generator')
+    parser.add_argument('--keep', action='store_true', help='keep the generated repositories')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON report file (default: standard output)')
+    args = parser.parse_args()
+
+    scripts = [(name, cmd) for name, cmd in SCRIPTS if name in args.scripts]
+    grid = [dict(zip(('files', 'lines', 'authors', 'commits', 'todo_density'), point))
+            for point in itertools.product(args.files, args.lines, args.authors,
+                                           args.commits, args.todo_density)]
+
+    work_dir = tempfile.mkdtemp(prefix='bench-scripts-')
+    wrapper = make_git_wrapper(work_dir)
+
+    report = []
+    try:
+        for idx, params in enumerate(grid):
+            repo = os.path.join(work_dir, f'repo{idx}')
+            start = time.perf_counter()
+            create_repo(repo, params, args.seed)
+            print(f'Generated {params} in {time.perf_counter() - start:.2f}s', file=sys.stderr)
+            report.extend(bench_repo(repo, params, scripts, args.repeat, wrapper))
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir)
+
+    output = json.dumps({'seed': args.seed, 'results': report}, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
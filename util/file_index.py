@@ -0,0 +1,58 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Enumerate the files tracked by git once and look them up by suffix"""
+import os
+import subprocess
+
+
+def git_ls_files(repo_dir='.'):
+    """List all tracked files relative to `repo_dir` using a single `git ls-files` call"""
+    git_output = subprocess.check_output(['git', '-C', repo_dir, 'ls-files', '-z'])
+    return [path.decode() for path in git_output.split(b'\0') if path]
+
+
+def dot_suffixes(path):
+    """All suffixes of the file name starting at a dot, e.g. `.sv.tpl` and `.tpl`"""
+    name = os.path.basename(path)
+    return {name[idx:] for idx, char in enumerate(name) if char == '.'}
+
+
+def suffix_matcher(suffixes):
+    """Predicate checking whether a path ends with any of the suffixes, with one set lookup per
+    distinct suffix length"""
+    suffixes = {suffix for suffix in suffixes if suffix != ''}
+    lengths = sorted({len(suffix) for suffix in suffixes})
+    return lambda path: any(path[-length:] in suffixes for length in lengths)
+
+
+class FileIndex:
+    """Tracked files indexed by the dot suffixes of their names"""
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.by_suffix = {}
+        for path in self.paths:
+            for suffix in dot_suffixes(path):
+                self.by_suffix.setdefault(suffix, []).append(path)
+
+    @classmethod
+    def from_git(cls, repo_dir='.'):
+        """Build the index from the files tracked in the repository"""
+        return cls(git_ls_files(repo_dir))
+
+    def with_suffix(self, suffix):
+        """All paths ending with suffix, in `git ls-files` order"""
+        if suffix.startswith('.'):
+            return list(self.by_suffix.get(suffix, []))
+        # suffixes like `Makefile` are not indexed, fall back to a scan
+        return [path for path in self.paths if path.endswith(suffix)]
+
+    def find(self, extensions, excludes=()):
+        """Paths matching the extensions in order, without the excluded suffixes
+
+        A path is listed once per matching extension, like a glob per extension would.
+        """
+        excluded = suffix_matcher(excludes)
+        return [path for ext in extensions for path in self.with_suffix(ext)
+                if not excluded(path)]
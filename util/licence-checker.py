@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Check the licence headers of the tracked files with the vendored lowRISC licence checker
+
+The vendored `lowrisc_misc-linters/licence-checker` is imported unchanged and does the header
+matching. Files are checked in a process pool (`-j`); their results are replayed in path order,
+so the log and the summary are identical to a sequential run.
+
+`--changed-since <rev>` only checks the files added or modified since a git revision, e.g. in a
+pull request pipeline. `--cache <file>` keeps the result of every checked file keyed by its blob
+SHA, unchanged files are then never opened again. The cache is discarded whenever the licence
+configuration changes.
+
+Only the first 16 KiB of a file are read and shared by all candidate comment styles, the rest is
+read if the first comment is longer. The comment style is looked up by suffix in a table.
+`--profile` reports the time spent in every phase, including the pool workers.
+"""
+import os
+import sys
+import json
+import hashlib
+import logging
+import subprocess
+import argparse
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+import hjson
+from profiler import Profiler, add_profile_argument
+
+CHECKER_PATH = (Path(__file__).resolve().parent / 'lowrisc_misc-linters' / 'licence-checker'
+                / 'licence-checker.py')
+
+
+def load_checker():
+    """Import the vendored licence checker, whose file name is not a module name"""
+    spec = importlib.util.spec_from_file_location('licence_checker', CHECKER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # registered so the licence objects passed to pool workers can be pickled
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+lc = load_checker()
+
+# timings of this process, reset in pool workers
+profiler = Profiler()
+
+# number of bytes read from the start of a file when looking for the licence
+HEADER_READ_BYTES = 16 * 1024
+
+
+def build_suffix_table(comment_chars):
+    """Map every suffix of comment_chars to its (priority, styles), the position in the list"""
+    table = {}
+    for priority, (suffixes, keys) in enumerate(comment_chars):
+        for suffix in suffixes:
+            table.setdefault(suffix, (priority, keys))
+    return table
+
+
+SUFFIX_TABLE = build_suffix_table(lc.COMMENT_CHARS)
+SUFFIX_LENGTHS = sorted({len(suffix) for suffix in SUFFIX_TABLE})
+
+
+class DeferredResults:
+    """Records the results of one file, to be replayed on a ResultsTracker in path order"""
+    def __init__(self, path, events=None):
+        self.path = path
+        self.events = [] if events is None else events
+
+    def passed(self, _path, line_no, reason):
+        """Record a licence found at line_no"""
+        self.events.append(['passed', line_no, reason])
+
+    def failed(self, _path, line_no, reason):
+        """Record a licence check failing at line_no"""
+        self.events.append(['failed', line_no, reason])
+
+    def skipped(self, _path, reason):
+        """Record a file that was not checked"""
+        self.events.append(['skipped', reason])
+
+    def excluded(self, _path, reason):
+        """Record a file excluded from the check"""
+        self.events.append(['excluded', reason])
+
+    def replay(self, results):
+        """Report the recorded results to a ResultsTracker"""
+        for kind, *args in self.events:
+            getattr(results, kind)(self.path, *args)
+
+
+def load_config(config_file):
+    """The licence configuration of the repository, None if it is invalid"""
+    parsed_config = hjson.load(config_file)
+    # check whether we should use regex matching or full string matching
+    match_regex = parsed_config.get('match_regex', 'false')
+    if match_regex not in ['true', 'false']:
+        print(f'Invalid value for match_regex: {match_regex!r}. Should be "true" or "false".')
+        return None
+    return SimpleNamespace(base_dir=lc.git_find_repo_toplevel(),
+                           licence=lc.LicenceHeader(parsed_config['licence']),
+                           exclude_paths=set(parsed_config['exclude_paths']),
+                           match_regex=match_regex == 'true')
+
+
+def git_find_changed_file_paths(top_level, rev, search_paths):
+    """The files added or modified in the work tree since rev"""
+    git_output = subprocess.check_output(['git', '-C', str(top_level), 'diff', '--name-only', '-z',
+                                          '--diff-filter=ACMR', rev, '--', *search_paths])
+    for path in git_output.rstrip(b'\0').split(b'\0'):
+        if path:
+            yield Path(top_level, path.decode())
+
+
+def git_find_blob_shas(top_level, search_paths):
+    """Map the paths of the files unmodified in the work tree to their blob SHAs"""
+    staged = subprocess.check_output(['git', '-C', str(top_level), 'ls-files', '-s', '-z', '--',
+                                      *search_paths])
+    modified = subprocess.check_output(['git', '-C', str(top_level), 'ls-files', '-m', '-z', '--',
+                                        *search_paths])
+    modified = set(modified.rstrip(b'\0').split(b'\0'))
+    blob_shas = {}
+    for entry in staged.rstrip(b'\0').split(b'\0'):
+        if not entry:
+            continue
+        # <mode> <sha> <stage>\t<path>
+        info, path = entry.split(b'\t', 1)
+        if path not in modified:
+            blob_shas[path.decode()] = info.split(b' ')[1].decode()
+    return blob_shas
+
+
+class ResultCache:
+    """Results of previous runs, keyed by blob SHA and discarded if the configuration changed"""
+    VERSION = 1
+
+    def __init__(self, cache_file, config):
+        self.cache_file = cache_file
+        # everything in the configuration affecting the result of a single file
+        key = json.dumps([list(config.licence), config.match_regex, repr(lc.COMMENT_CHARS)])
+        self.config_hash = hashlib.sha256(key.encode()).hexdigest()
+        self.blob_shas = {}
+        self.entries = {}
+        self.hits = 0
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get('version') == self.VERSION and cached.get('config') == self.config_hash:
+            self.entries = cached.get('files', {})
+
+    def lookup(self, rel_path):
+        """The recorded results of an unchanged file, or None"""
+        blob_sha = self.blob_shas.get(rel_path)
+        entry = self.entries.get(rel_path)
+        if blob_sha is None or entry is None or entry[0] != blob_sha:
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def store(self, rel_path, events):
+        """Keep the recorded results of a file if it is unmodified in the work tree"""
+        blob_sha = self.blob_shas.get(rel_path)
+        if blob_sha is not None:
+            self.entries[rel_path] = [blob_sha, events]
+
+    def save(self):
+        """Write the cache to a temporary file and move it into place"""
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'config': self.config_hash,
+                       'files': self.entries}, f)
+        os.replace(tmp_file, self.cache_file)
+
+
+def collect_paths(config, git_paths, changed_since=None):
+    """The files to check in order, excluded ones as DeferredResults holding the reason"""
+    if changed_since is None:
+        filepaths = lc.git_find_all_file_paths(config.base_dir, git_paths)
+    else:
+        filepaths = git_find_changed_file_paths(config.base_dir, changed_since, git_paths)
+    for filepath in filepaths:
+        if filepath.is_symlink():
+            deferred = DeferredResults(filepath)
+            deferred.excluded(filepath, 'File is a symlink')
+            yield deferred
+        elif not filepath.is_file():
+            continue
+        elif lc.matches_exclude_pattern(config, filepath):
+            deferred = DeferredResults(filepath)
+            deferred.excluded(filepath, 'Path matches exclude pattern')
+            yield deferred
+        else:
+            yield filepath
+
+
+# matchers of a worker process, built once by _init_worker
+_worker = {}
+
+
+def _init_worker(licence, match_regex, profile=None):
+    # the profile is only given to pool workers
+    _worker['matchers'] = {key: lc.LicenceMatcher(style, licence, match_regex)
+                           for key, style in lc.COMMENT_STYLES.items()}
+    if profile is not None:
+        # drop what the parent process collected before the fork
+        profiler.enabled = profile
+        profiler.pop()
+
+
+def detect_comment_char(all_matchers, filename):
+    """The LicenceMatchers of a file, the first entry of COMMENT_CHARS with a matching suffix"""
+    priority, keys = len(lc.COMMENT_CHARS), None
+    for length in SUFFIX_LENGTHS:
+        entry = SUFFIX_TABLE.get(filename[-length:])
+        if entry is not None and entry[0] < priority:
+            priority, keys = entry
+    if keys is None:
+        return []
+    return [all_matchers[key] for key in (keys if isinstance(keys, list) else [keys])]
+
+
+class HeaderTruncated(Exception):
+    """The licence check needs more of the file than has been read"""
+
+
+def read_header(filepath, limit=HEADER_READ_BYTES):
+    """The lines of at most the first limit bytes of a file (None: all) and if that is all of it
+
+    A partial last line is dropped, lines are split like in a file opened in text mode. Raises
+    UnicodeDecodeError if the start of the file is not valid UTF-8.
+    """
+    with filepath.open('rb') as f:
+        data = f.read() if limit is None else f.read(limit + 1)
+    complete = limit is None or len(data) <= limit
+    if not complete:
+        data = data[:data.rfind(b'\n', 0, limit) + 1]
+    text = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines, complete
+
+
+def _iter_header(lines, complete):
+    yield from lines
+    if not complete:
+        raise HeaderTruncated()
+
+
+def check_lines(matchers, lines, complete):
+    """The (line_no, msg) of the first matcher accepting the lines or None, and the failures before
+
+    Every matcher runs the vendored check_file_with_matcher on a stand-in for the file, which
+    raises HeaderTruncated if the check needs more lines than have been read.
+    """
+    header = SimpleNamespace(open=lambda: nullcontext(_iter_header(lines, complete)))
+    problems = []
+    for matcher in matchers:
+        good, line_no, msg = lc.check_file_with_matcher(matcher, header)
+        if good:
+            return (line_no, msg), problems
+        problems.append((line_no, msg))
+    return None, problems
+
+
+def check_file_for_licence(all_matchers, results, filepath):
+    """Check a file like the vendored check_file_for_licence, reading the header only once"""
+    matchers = detect_comment_char(all_matchers, filepath.name)
+    if not matchers:
+        results.skipped(filepath, 'Unknown comment style')
+        return
+    profiler.count('files_scanned')
+    try:
+        with profiler.phase('header_read'):
+            lines, complete = read_header(filepath)
+        if not lines and complete:
+            results.skipped(filepath, 'Empty file')
+            return
+        try:
+            with profiler.phase('regex_match'):
+                found, problems = check_lines(matchers, lines, complete)
+        except HeaderTruncated:
+            profiler.count('full_reads')
+            with profiler.phase('header_read'):
+                lines, complete = read_header(filepath, limit=None)
+            with profiler.phase('regex_match'):
+                found, problems = check_lines(matchers, lines, complete)
+    except UnicodeDecodeError as err:
+        results.failed(filepath, err.object[:err.start].count(b'\n') + 1,
+                       'File is not valid UTF-8')
+        return
+    if found is not None:
+        results.passed(filepath, *found)
+        return
+    # if we get here, we didn't find a matching licence
+    for line_no, msg in problems:
+        results.failed(filepath, line_no, msg)
+
+
+def check_file(filepath):
+    """The results of one file, checked with the matchers of this process"""
+    deferred = DeferredResults(filepath)
+    check_file_for_licence(_worker['matchers'], deferred, filepath)
+    return deferred
+
+
+def _check_chunk(filepaths):
+    # returns the timings of the chunk along with its results
+    return [check_file(filepath) for filepath in filepaths], profiler.pop()
+
+
+def _merge_profiles(chunks):
+    for checked, chunk_profile in chunks:
+        profiler.merge(chunk_profile)
+        yield from checked
+
+
+def lookup_cached(config, git_paths, entries, cache):
+    """Replace the unchanged files among entries by their cached results, they are never opened"""
+    cache.blob_shas = git_find_blob_shas(config.base_dir, git_paths)
+    for idx, entry in enumerate(entries):
+        if not isinstance(entry, DeferredResults):
+            events = cache.lookup(str(entry.relative_to(config.base_dir)))
+            if events is not None:
+                entries[idx] = DeferredResults(entry, events)
+                profiler.count('cache_hits')
+
+
+def replay_in_order(entries, checked, results, cache=None):
+    """Report the results of all entries, taking the checked files from an iterator"""
+    for entry in entries:
+        if not isinstance(entry, DeferredResults):
+            entry = next(checked)
+            if cache is not None:
+                cache.store(str(entry.path.relative_to(results.base_dir)), entry.events)
+        entry.replay(results)
+
+
+def check_paths(config, git_paths, jobs=1, changed_since=None, cache=None):
+    """A ResultsTracker of the files, checked by `jobs` processes (None: all cores)"""
+    results = lc.ResultsTracker(config.base_dir)
+    try:
+        _init_worker(config.licence, config.match_regex)
+    except RuntimeError as err:
+        sys.exit(err)
+    with profiler.phase('file_enumeration'):
+        entries = list(collect_paths(config, git_paths, changed_since))
+    if cache is not None:
+        with profiler.phase('cache_lookup'):
+            lookup_cached(config, git_paths, entries, cache)
+    filepaths = [entry for entry in entries if not isinstance(entry, DeferredResults)]
+    if jobs == 1:
+        replay_in_order(entries, map(check_file, filepaths), results, cache)
+        return results
+    chunks = [filepaths[idx:idx + 16] for idx in range(0, len(filepaths), 16)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(config.licence, config.match_regex,
+                                       profiler.enabled)) as executor:
+        replay_in_order(entries, _merge_profiles(executor.map(_check_chunk, chunks)), results,
+                        cache)
+    return results
+
+
+def job_count(value):
+    """Number of worker processes of `-j`, 0 uses all cores"""
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f'invalid number of jobs: {value}')
+    return jobs or None
+
+
+def main():
+    """Check the licence headers and print the summary, the status is 1 if any check failed"""
+    parser = argparse.ArgumentParser(
+        description='A tool to check the lowRISC licence header is in each source file')
+    parser.add_argument('--config', metavar='config.hjson', required=True,
+                        type=argparse.FileType('r', encoding='UTF-8'),
+                        help='HJSON file to read for licence configuration')
+    parser.add_argument('paths', metavar='path', nargs='*', default=['.'],
+                        help='paths to check for licence headers')
+    parser.add_argument('-j', '--jobs', type=job_count, default=1,
+                        help='number of worker processes checking files (0: all cores)')
+    parser.add_argument('--changed-since', metavar='REV', default=None,
+                        help='only check the files added or modified since a git revision')
+    parser.add_argument('--cache', metavar='FILE', default=None,
+                        help='cache the results of unchanged files in this file')
+    parser.add_argument('-v', '--verbose', action='store_true', help='verbose output')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler.enabled = args.profile
+
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.INFO if args.verbose else logging.WARNING)
+
+    config = load_config(args.config)
+    if config is None:
+        return 1
+
+    cache = None if args.cache is None else ResultCache(args.cache, config)
+    results = check_paths(config, args.paths, args.jobs, args.changed_since, cache)
+    if cache is not None:
+        logging.info('%d results taken from the cache', cache.hits)
+        cache.save()
+
+    with profiler.phase('output'):
+        print(results.display_nicely())
+        if results.any_failed():
+            print('Failed:')
+            for path in sorted(results.failing_paths):
+                print(f'  {path}')
+            print('')
+    profiler.report(args.profile_file)
+    return int(results.any_failed())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
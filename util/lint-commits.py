@@ -4,10 +4,13 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
+import json
+import os
 import re
+import subprocess
 import sys
 
-from git import Repo
+from profiler import Profiler, add_profile_argument
 
 error_msg_prefix = 'ERROR: '
 warning_msg_prefix = 'WARNING: '
@@ -17,6 +20,84 @@ warning_msg_prefix = 'WARNING: '
 # below 50 characters, with occasional outliers.
 COMMIT_MSG_MAX_SUMMARY_LEN = 100
 
+# Bump when the lint rules change, this invalidates caches of linted commits.
+LINT_RULES_VERSION = 1
+
+# Fields read for every commit; the message must come last.
+GIT_LOG_FIELDS = ['%H', '%P', '%an', '%ae', '%B']
+
+
+class Author:
+    """Name and email of a commit author"""
+    __slots__ = ('name', 'email')
+
+    def __init__(self, name, email):
+        self.name = name
+        self.email = email
+
+
+class Commit:
+    """The commit metadata needed for linting"""
+    __slots__ = ('hexsha', 'parents', 'author', 'message')
+
+    def __init__(self, hexsha, parents, author, message):
+        self.hexsha = hexsha
+        self.parents = parents
+        self.author = author
+        self.message = message
+
+
+def iter_commits(commit_range):
+    """
+    Streams the commits in commit_range from a single git log process.
+    """
+    cmd = [
+        'git', 'log', '-z', '--format=' + '%x00'.join(GIT_LOG_FIELDS),
+        commit_range, '--'
+    ]
+    num_fields = len(GIT_LOG_FIELDS)
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        fields = []
+        pending = b''
+        for chunk in iter(lambda: proc.stdout.read(1 << 16), b''):
+            tokens = (pending + chunk).split(b'\0')
+            pending = tokens.pop()
+            for token in tokens:
+                fields.append(token.decode('utf-8', errors='replace'))
+                if len(fields) == num_fields:
+                    hexsha, parents, name, email, message = fields
+                    fields = []
+                    # Records are separated by a newline after the first one.
+                    yield Commit(hexsha.lstrip('\n'), tuple(parents.split()),
+                                 Author(name, email), message)
+        if proc.wait() != 0:
+            error('git log failed for range %s.' % commit_range)
+            sys.exit(1)
+
+
+def load_linted_cache(cache_file):
+    """
+    Returns the set of commits which passed lint in previous runs.
+    """
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if cache.get('version') != LINT_RULES_VERSION:
+        return set()
+    return set(cache.get('commits', []))
+
+
+def store_linted_cache(cache_file, linted):
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': LINT_RULES_VERSION,
+            'commits': sorted(linted)
+        }, f)
+    os.replace(tmp_file, cache_file)
+
 
 def error(msg, commit=None):
     full_msg = msg
@@ -177,28 +258,58 @@ def main():
                         required=False,
                         action="store_true",
                         help='do not check commits with more than one parent')
+    parser.add_argument('--cache',
+                        required=False,
+                        help='file caching the commits which passed lint, '
+                        'these are not checked again')
     parser.add_argument('commit_range',
                         metavar='commit-range',
                         help=('commit range to check '
                               '(must be understood by git log)'))
+    add_profile_argument(parser)
     args = parser.parse_args()
 
+    profiler = Profiler(args.profile)
+
     error_msg_prefix = args.error_msg_prefix
     warning_msg_prefix = args.warning_msg_prefix
 
     lint_successful = True
 
-    repo = Repo()
-    commits = repo.iter_commits(args.commit_range)
-    for commit in commits:
+    with profiler.phase('cache_io'):
+        linted = load_linted_cache(args.cache) if args.cache else set()
+
+    commits = iter_commits(args.commit_range)
+    while True:
+        with profiler.phase('git_log'):
+            commit = next(commits, None)
+        if commit is None:
+            break
+
         print("Checking commit %s" % commit.hexsha)
+        profiler.count('commits_checked')
+        if commit.hexsha in linted:
+            print("Skipping previously linted commit.")
+            profiler.count('cache_hits')
+            continue
+
         is_merge = len(commit.parents) > 1
         if is_merge and args.no_merges:
             print("Skipping merge commit.")
             continue
 
-        if not lint_commit(commit):
+        with profiler.phase('regex_match'):
+            success = lint_commit(commit)
+        if not success:
             lint_successful = False
+        else:
+            linted.add(commit.hexsha)
+
+    if args.cache:
+        with profiler.phase('cache_io'):
+            store_linted_cache(args.cache, linted)
+
+    profiler.report(args.profile_file)
 
     if not lint_successful:
         error('Commit lint failed.')
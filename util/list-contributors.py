@@ -5,52 +5,162 @@
 
 """List the amount of lines every contributor adds, and their files"""
 import sys
-import glob
 import re
+import os
+import json
+import argparse
 import git
+from file_index import FileIndex
+from profiler import Profiler, add_profile_argument
 
-_, extensions, excludes = sys.argv
+CACHE_VERSION = 1
 
-# current repo
-repo = git.Repo()
+profiler = Profiler()
 
-# remove surplus whitespaces
-extensions = re.sub(r' +', ' ', extensions)
-excludes = re.sub(r' +', ' ', excludes)
 
-# list of all files to analyze
-flist = []
+def load_cache(cache_file):
+    """Load the per-file blame cache, an empty cache is used if it is missing or stale"""
+    if cache_file is None or not os.path.isfile(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
 
-# find files
-for ext in extensions.split(' '):
-    flist.extend(glob.glob(f'**/*{ext}', recursive=True))
 
-# contribution (in lines for all authors)
-lines_total = {}
-files = {}
+def store_cache(cache_file, cache):
+    """Atomically write the per-file blame cache"""
+    tmp_file = f'{cache_file}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'files': cache}, f)
+    os.replace(tmp_file, cache_file)
 
-for file in flist:
-    excluded = False
-    # check if file should be excluded
-    for excl in excludes.split(' '):
-        if excl != '':
-            excluded |= file.endswith(excl)
 
-    # analyze contribution
-    if not excluded:
+def blame_file(repo, file):
+    """Count the lines every author contributes to a file"""
+    authors = {}
+    for commit, lines in repo.blame('HEAD', file):
+        author = commit.author.name
+        authors[author] = authors.get(author, 0) + len(lines)
+    return authors
+
+
+def analyze(repo, flist, cache, new_cache):
+    """Blame every file once, returns the author line counts per file"""
+    head_tree = repo.head.commit.tree
+    blamed = {}
+    for file in flist:
+        if file in blamed:
+            continue
+        profiler.count('files_scanned')
+        # analyze contribution, reusing the cached result of an unchanged blob
         try:
-            for commit, lines in repo.blame('HEAD', file):
-                author = commit.author.name
-
-                if author not in lines_total:
-                    lines_total[author] = len(lines)
-                    files[author] = [file]
-                else:
-                    lines_total[author] += len(lines)
-                    files[author].append(file)
-        except git.GitCommandError:
-            pass
-
-for contributor, lines in sorted(lines_total.items(), reverse=True, key=lambda item: item[1]):
-    touched_files = '\n -  '.join(sorted(list(set(files[contributor]))))
-    print(f'{contributor}: {lines} Lines in\n -  {touched_files}\n')
+            blob_sha = (head_tree / file).hexsha
+        except KeyError:
+            continue
+        cached = cache.get(file)
+        if cached is not None and cached['blob'] == blob_sha:
+            authors = cached['authors']
+            profiler.count('cache_hits')
+        else:
+            try:
+                with profiler.phase('git_blame'):
+                    authors = blame_file(repo, file)
+            except git.GitCommandError:
+                continue
+        new_cache[file] = {'blob': blob_sha, 'authors': authors}
+        blamed[file] = authors
+    return blamed
+
+
+def print_contributions(flist, blamed):
+    """Print the contribution of every author to the given files"""
+    # contribution (in lines for all authors)
+    lines_total = {}
+    files = {}
+
+    for file in flist:
+        for author, lines in blamed.get(file, {}).items():
+            lines_total[author] = lines_total.get(author, 0) + lines
+            files.setdefault(author, []).append(file)
+
+    for contributor, lines in sorted(lines_total.items(), reverse=True, key=lambda item: item[1]):
+        touched_files = '\n -  '.join(sorted(list(set(files[contributor]))))
+        print(f'{contributor}: {lines} Lines in\n -  {touched_files}\n')
+
+
+def main():
+    """Report the lines every author contributes, per category of files"""
+    parser = argparse.ArgumentParser(
+        description='List the contributions of every author',
+        epilog='Without --category, the positional arguments are the extensions and the '
+        'excludes; with --category, only the excludes are given.')
+    parser.add_argument('args', nargs='*', metavar='[extensions] excludes',
+                        help='space-separated lists of file extensions and excluded file suffixes')
+    parser.add_argument('--category', nargs=2, action='append', default=[],
+                        metavar=('NAME', 'EXTENSIONS'),
+                        help='report a named category of extensions, can be given multiple times')
+    parser.add_argument('--cache', default=None,
+                        help='blame cache file, only files whose blob changed are blamed again')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler.enabled = args.profile
+
+    if args.category:
+        if len(args.args) > 1:
+            parser.error('only the excludes may be given together with --category')
+        categories = args.category
+        excludes = args.args[0] if args.args else ''
+    else:
+        if len(args.args) != 2:
+            parser.error('expected the extensions and the excludes')
+        categories = [(None, args.args[0])]
+        excludes = args.args[1]
+
+    # current repo
+    repo = git.Repo()
+
+    # remove surplus whitespaces
+    categories = [(name, re.sub(r' +', ' ', exts).split(' ')) for name, exts in categories]
+    excludes = re.sub(r' +', ' ', excludes).split(' ')
+
+    # list of all files to analyze per category, read from the git index once
+    with profiler.phase('file_enumeration'):
+        file_index = FileIndex.from_git()
+        category_files = [(name, file_index.find(exts, excludes)) for name, exts in categories]
+
+    # blame results of previous runs
+    with profiler.phase('cache_io'):
+        cache = load_cache(args.cache)
+    new_cache = {}
+
+    blamed = analyze(repo, [file for _, flist in category_files for file in flist],
+                     cache, new_cache)
+
+    if args.cache is not None:
+        with profiler.phase('cache_io'):
+            # keep entries of files analyzed by other invocations sharing the cache,
+            # but drop files which vanished from the work tree
+            cache = {file: entry for file, entry in cache.items() if os.path.isfile(file)}
+            cache.update(new_cache)
+            store_cache(args.cache, cache)
+
+    with profiler.phase('output'):
+        for idx, (name, flist) in enumerate(category_files):
+            if idx:
+                print()
+            if name is not None:
+                print(f'{name}\n{"-" * 40}\n')
+            print_contributions(flist, blamed)
+
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
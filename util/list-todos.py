@@ -5,66 +5,176 @@
 
 """List the amount of lines every contributor adds, and their files"""
 import sys
-import glob
 import re
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import git
+from file_index import FileIndex
+from profiler import Profiler, add_profile_argument
 
 TODO_STRINGS = ['todo', 'fixme', 'fix me']
 
-_, extensions, excludes = sys.argv
+# single alternation used to pre-filter file contents in fast mode
+TODO_REGEX = re.compile('|'.join(TODO_STRINGS), re.IGNORECASE)
 
-# current repo
-repo = git.Repo()
+# timings of this process, replaced by a fresh one in pool workers
+profiler = Profiler()
 
-# remove surplus whitespaces
-extensions = re.sub(r' +', ' ', extensions)
-excludes = re.sub(r' +', ' ', excludes)
 
-# list of all files to analyze
-flist = []
+def count_todos(line):
+    """Number of TODO strings present in a line (each string counts once)"""
+    return sum(1 for to_check in TODO_STRINGS if re.search(to_check, line, re.IGNORECASE))
 
-# find files
-for ext in extensions.split(' '):
-    if ext != '':
-        flist.extend(glob.glob(f'**/*{ext}', recursive=True))
 
-global_todo_present = False
+def line_ranges(line_numbers):
+    """Merge sorted 1-based line numbers into git blame `-L` ranges"""
+    ranges = []
+    for line_no in line_numbers:
+        if ranges and ranges[-1][1] == line_no - 1:
+            ranges[-1][1] = line_no
+        else:
+            ranges.append([line_no, line_no])
+    return [f'{start},{end}' for start, end in ranges]
 
-todo_files = {}
-for file in flist:
-    excluded = False
-    todo_present = False
+
+def blame_todos(repo, file, ranges=None):
+    """Blame a file (optionally only the given ranges) and count TODOs per author"""
     num_todos = {}
-    # check if file should be excluded
-    for excl in excludes.split(' '):
-        if excl != '':
-            excluded |= file.endswith(excl)
+    kwargs = {'L': ranges} if ranges else {}
+    with profiler.phase('git_blame'):
+        blame = repo.blame('HEAD', file, **kwargs)
+    with profiler.phase('regex_match'):
+        for commit, lines in blame:
+            author = commit.author.name
+            for line in lines:
+                # check if line has a TODO
+                todos = count_todos(line)
+                if todos:
+                    num_todos[author] = num_todos.get(author, 0) + todos
+                    profiler.count('lines_matched')
+    return num_todos
+
 
-    # analyze file
-    if not excluded:
+def scan_file(repo, file):
+    """Find TODO lines in the HEAD version of a file and blame only those"""
+    profiler.count('files_scanned')
+    with profiler.phase('content_read'):
         try:
-            for commit, lines in repo.blame('HEAD', file):
-                author = commit.author.name
-                for line in lines:
-                    # check if line has a TODO
-                    for to_check in TODO_STRINGS:
-                        if re.search(to_check, line, re.IGNORECASE):
-                            todo_present |= True
-                            global_todo_present |= True
-                            if not author in num_todos:
-                                num_todos[author] = 1
-                            else:
-                                num_todos[author] += 1
+            blob = repo.head.commit.tree / file
+        except KeyError:
+            return {}
+        content = blob.data_stream.read().decode('utf-8', errors='replace')
+    with profiler.phase('regex_prefilter'):
+        if not TODO_REGEX.search(content):
+            return {}
+        matching = [idx for idx, line in enumerate(content.split('\n'), start=1)
+                    if TODO_REGEX.search(line)]
+    return blame_todos(repo, file, line_ranges(matching))
+
+
+# state of a pool worker process
+_worker = {}
+
+
+def _init_worker(profile):
+    # drop what the parent process collected before the fork
+    profiler.enabled = profile
+    profiler.pop()
+
+
+def _scan_worker(file):
+    # every worker process keeps its own repository handle
+    if 'repo' not in _worker:
+        _worker['repo'] = git.Repo()
+    try:
+        return scan_file(_worker['repo'], file)
+    except git.GitCommandError:
+        return {}
+
+
+def _scan_chunk_worker(files):
+    # returns the timings of the chunk along with its results
+    return [_scan_worker(file) for file in files], profiler.pop()
+
+
+def find_todos_fast(flist, jobs):
+    """Pre-filter and blame files in a process pool, keeping the input order"""
+    if jobs == 1:
+        results = list(map(_scan_worker, flist))
+    else:
+        chunks = [flist[idx:idx + 16] for idx in range(0, len(flist), 16)]
+        results = []
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(profiler.enabled,)) as executor:
+            for chunk_results, chunk_profile in executor.map(_scan_chunk_worker, chunks):
+                results.extend(chunk_results)
+                profiler.merge(chunk_profile)
+    return {file: num_todos for file, num_todos in zip(flist, results) if num_todos}
+
+
+def find_todos(repo, flist):
+    """Blame every file completely and count TODOs per author"""
+    todo_files = {}
+    for file in flist:
+        profiler.count('files_scanned')
+        try:
+            num_todos = blame_todos(repo, file)
         except git.GitCommandError:
-            pass
+            continue
+        # add file if TODO is present
+        if num_todos:
+            todo_files[file] = num_todos
+    return todo_files
+
+
+def job_count(value):
+    """Number of worker processes of `-j`, 0 uses all cores"""
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f'invalid number of jobs: {value}')
+    return jobs or None
+
+
+def main():
+    """Count the TODOs of the tracked files per author"""
+    parser = argparse.ArgumentParser(description='List open TODOs per contributor and file')
+    parser.add_argument('extensions', help='space-separated list of file extensions')
+    parser.add_argument('excludes', help='space-separated list of excluded file suffixes')
+    parser.add_argument('--fast', action='store_true',
+                        help='pre-filter file contents and only blame matching lines')
+    parser.add_argument('-j', '--jobs', type=job_count, default=None,
+                        help='number of worker processes in fast mode (default or 0: all cores)')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler.enabled = args.profile
+
+    # current repo
+    repo = git.Repo()
+
+    # remove surplus whitespaces
+    extensions = re.sub(r' +', ' ', args.extensions)
+    excludes = re.sub(r' +', ' ', args.excludes)
+
+    # list of all files to analyze, read from the git index once
+    with profiler.phase('file_enumeration'):
+        flist = FileIndex.from_git().find([ext for ext in extensions.split(' ') if ext != ''],
+                                          excludes.split(' '))
+
+    if args.fast:
+        todo_files = find_todos_fast(flist, args.jobs)
+    else:
+        todo_files = find_todos(repo, flist)
+
+    # print output
+    with profiler.phase('output'):
+        for file in todo_files.items():
+            for author in file[1].items():
+                print(f'{author[0]}: {author[1]} TODOs in {file[0]}')
+    profiler.report(args.profile_file)
 
-    # add file if TODO is present
-    if todo_present:
-        todo_files[file] = num_todos
+    sys.exit(bool(todo_files))
 
-# print output
-for file in todo_files.items():
-    for author in file[1].items():
-        print(f'{author[0]}: {author[1]} TODOs in {file[0]}')
 
-sys.exit(global_todo_present)
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Sweep the bloom filter parameters of the LLC lock box for false positives and stalls"""
+import sys
+import json
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from llc_model import CbFilter, BloomParams, PKG_SEEDS
+
+GRID = ('k_hashes', 'hash_width', 'hash_rounds', 'bucket_width', 'seed_set')
+
+
+def seed_sets(num_sets, k_hashes, seed):
+    """Seed pairs per seed set, set 0 starts with `axi_llc_pkg::BloomSeeds`"""
+    rng = random.Random(f'{seed}-{k_hashes}')
+    sets = []
+    for idx in range(num_sets):
+        seeds = list(PKG_SEEDS[:k_hashes]) if idx == 0 else []
+        while len(seeds) < k_hashes:
+            seeds.append((rng.getrandbits(31), rng.getrandbits(31)))
+        sets.append(seeds)
+    return sets
+
+
+def evaluate(job):
+    """Monte-Carlo results of one parameter point for every number of outstanding locks"""
+    params, seeds, args, seed = job
+    bloom = CbFilter(args.set_associativity, args.num_lines,
+                     BloomParams(*(params[name] for name in BloomParams._fields)), seeds)
+    rng = np.random.default_rng(seed)
+    results = []
+    for num in args.outstanding:
+        false_pos, full, stall = bloom.monte_carlo(num, args.trials, args.hold_cycles, rng)
+        results.append({'outstanding': num, 'false_positive_rate': round(false_pos, 6),
+                        'full_rate': round(full, 6), 'stall_cycles': round(stall, 4)})
+    return {'params': {**params, 'hash_width': bloom.params.hash_width},
+            'seeds': [list(pair) for pair in seeds],
+            'counter_bits': bloom.num_buckets * bloom.params.bucket_width, 'results': results}
+
+
+def main():
+    """Sweep the bloom filter parameters and report the false positives and stalls"""
+    parser = argparse.ArgumentParser(
+        description='Estimate the false positive rate and the extra stall cycles of the lock box '
+        'bloom filter (`axi_llc_pkg::Bloom*`) by Monte-Carlo simulation')
+    parser.add_argument('--set-associativity', type=int, default=8,
+                        help='SetAssociativity (default: %(default)s)')
+    parser.add_argument('--num-lines', type=int, default=256,
+                        help='NumLines (default: %(default)s)')
+    parser.add_argument('--k-hashes', type=int, nargs='+', default=[3],
+                        help='BloomKHashes values (multiple values are swept)')
+    parser.add_argument('--hash-width', type=int, nargs='+', default=[6],
+                        help='BloomHashWidth values')
+    parser.add_argument('--hash-rounds', type=int, nargs='+', default=[1],
+                        help='BloomHashRounds values')
+    parser.add_argument('--bucket-width', type=int, nargs='+', default=[3],
+                        help='BloomBucketWidth values')
+    parser.add_argument('--seed-sets', type=int, default=1,
+                        help='number of BloomSeeds sets per point, the first one is the '
+                        'package default extended by random seeds (default: %(default)s)')
+    parser.add_argument('--outstanding', type=int, nargs='+', default=[2, 4, 8, 16],
+                        help='numbers of simultaneously locked lines (default: %(default)s)')
+    parser.add_argument('--hold-cycles', type=float, default=20.0,
+                        help='cycles a line stays locked, the remaining time of a lock is '
+                        'uniformly distributed up to this value (default: %(default)s)')
+    parser.add_argument('--trials', type=int, default=2000,
+                        help='random lock sets per point (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random generators')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    num_locks = args.set_associativity * args.num_lines
+    if max(args.outstanding) > num_locks:
+        parser.error(f'at most {num_locks} lines can be locked')
+
+    jobs = []
+    for point in itertools.product(args.k_hashes, args.hash_width, args.hash_rounds,
+                                   args.bucket_width, range(args.seed_sets)):
+        params = dict(zip(GRID, point))
+        seeds = seed_sets(args.seed_sets, params['k_hashes'], args.seed)[params['seed_set']]
+        jobs.append((params, seeds, args, args.seed + len(jobs)))
+
+    if args.jobs == 1:
+        report = [evaluate(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            report = list(executor.map(evaluate, jobs))
+
+    for entry in report:
+        params = entry['params']
+        print(f'KHashes={params["k_hashes"]} HashWidth={params["hash_width"]} '
+              f'HashRounds={params["hash_rounds"]} BucketWidth={params["bucket_width"]} '
+              f'seeds={params["seed_set"]} ({entry["counter_bits"]} counter bits)')
+        for result in entry['results']:
+            print(f'  {result["outstanding"]:4d} locked: false positives '
+                  f'{result["false_positive_rate"]:9.6f}, full {result["full_rate"]:9.6f}, '
+                  f'{result["stall_cycles"]:8.4f} extra stall cycles per lookup')
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'set_associativity': args.set_associativity, 'num_lines': args.num_lines,
+                       'hold_cycles': args.hold_cycles, 'trials': args.trials,
+                       'results': report}, f, indent=2)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
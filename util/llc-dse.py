@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Explore llc_cfg_t candidates on traces and report the Pareto front of area, hit rate and
+bandwidth"""
+import os
+import sys
+import csv
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from llc_model import (LlcConfig, AddressMap, Trace, sram_bits, trace_digest, evaluate_trace,
+                       candidates, rate, pareto_front, parse_int)
+from llc_model.axi_trace import bursts, is_trace
+from llc_model.dse import GRID
+from profiler import Profiler, add_profile_argument
+
+profiler = Profiler()
+
+_traces = {}
+
+
+def _init_worker(profile):
+    # drop what the parent process collected before the fork
+    profiler.enabled = profile
+    profiler.pop()
+
+
+def make_config(params, address_map):
+    """Configuration of a candidate, the SPM region lies outside of the address space"""
+    addr_width, cached_start, cached_end = address_map
+    return LlcConfig(*(params[name] for name in GRID),
+                     AddressMap(addr_width, 1 << addr_width, cached_start, cached_end))
+
+
+def result_key(digest, params, address_map):
+    """Name of the cached result of a trace on a candidate"""
+    desc = json.dumps({'trace': digest, 'params': params, 'address_map': address_map},
+                      sort_keys=True)
+    return hashlib.sha1(desc.encode()).hexdigest()[:16]
+
+
+def load_result(result_file):
+    """Cached result of a point, None if it is missing, unreadable or corrupt"""
+    try:
+        with open(result_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # ValueError covers the JSONDecodeError of a truncated file
+        return None
+
+
+def store_result(result_file, result):
+    """Atomically write the result of a point to the cache"""
+    tmp_file = f'{result_file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_file, result_file)
+
+
+def evaluate(job):
+    """Replay a trace on one candidate unless its result is cached"""
+    trace_path, params, address_map, result_file, force = job
+    result = None if force else load_result(result_file)
+    if result is not None:
+        return result, True, profiler.pop()
+    if trace_path not in _traces:
+        with profiler.phase('trace_load'):
+            try:
+                _traces[trace_path] = bursts(trace_path) if is_trace(trace_path) else \
+                    Trace.load(trace_path)
+            except ValueError as err:
+                raise ValueError(f'{trace_path}: {err}') from err
+    with profiler.phase('replay'):
+        result = evaluate_trace(_traces[trace_path], make_config(params, address_map))
+    profiler.count('lookups', result['lookups'])
+    store_result(result_file, result)
+    return result, False, profiler.pop()
+
+
+def run_points(jobs, num_workers, chunksize):
+    """Results of all jobs with their cache hit and profile, in the order of the jobs"""
+    if num_workers == 1:
+        return [evaluate(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                             initargs=(profiler.enabled,)) as executor:
+        return list(executor.map(evaluate, jobs, chunksize=chunksize))
+
+
+def rate_points(grid, results, traces, address_map, miss_penalty):
+    """Area, mean hit rate and mean bandwidth of every candidate, marked if on the Pareto front"""
+    points = []
+    for idx, params in enumerate(grid):
+        cfg = make_config(params, address_map)
+        per_trace = [result for result, _, _ in results[idx * len(traces):(idx + 1) * len(traces)]]
+        hit_rate, bandwidth = rate(per_trace, cfg.block_size // 8, miss_penalty)
+        bits = sram_bits(cfg)
+        points.append({**params, 'TagLength': cfg.tag_length, **bits,
+                       'sram_bits': bits['tag_bits'] + bits['data_bits'],
+                       'size_bytes': cfg.spm_length, 'hit_rate': round(hit_rate, 6),
+                       'bandwidth': round(bandwidth, 4),
+                       'traces': dict(zip(traces, per_trace))})
+    for point, on_front in zip(points, pareto_front([point['sram_bits'] for point in points],
+                                                    [point['hit_rate'] for point in points],
+                                                    [point['bandwidth'] for point in points])):
+        point['pareto'] = bool(on_front)
+    return points
+
+
+def print_front(points):
+    """Print the candidates on the Pareto front, smallest first"""
+    print(' '.join(f'{name:>16}' for name in GRID) +
+          f' {"size bytes":>11} {"SRAM bits":>11} {"hit rate":>9} {"bytes/cycle":>11}')
+    for point in sorted((point for point in points if point['pareto']),
+                        key=lambda point: point['sram_bits']):
+        print(' '.join(f'{point[name]:16d}' for name in GRID) +
+              f' {point["size_bytes"]:11d} {point["sram_bits"]:11d} {point["hit_rate"]:9.4f}'
+              f' {point["bandwidth"]:11.3f}')
+
+
+def write_output(args, points, address_map):
+    """Write every candidate as CSV or JSON"""
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        if args.output.endswith('.csv'):
+            header = [name for name in points[0] if name != 'traces']
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for point in points:
+                writer.writerow([point[name] for name in header])
+        else:
+            json.dump({'address_map': dict(zip(('addr_width', 'cached_start', 'cached_end'),
+                                               address_map)),
+                       'miss_penalty': args.miss_penalty, 'traces': args.traces,
+                       'points': points}, f, indent=2)
+            f.write('\n')
+
+
+def main():
+    """Replay the traces on every candidate and report the Pareto front"""
+    parser = argparse.ArgumentParser(
+        description='Enumerate llc_cfg_t candidates, compute the bits of their tag and data '
+        'macros, replay every trace on every candidate in a pool of workers and report the '
+        'candidates on the Pareto front of SRAM bits, mean hit rate and mean bandwidth. Results '
+        'are cached per trace content and candidate.')
+    parser.add_argument('traces', nargs='+', help='binary AXI traces (axi-trace.py) or trace '
+                        'files, `.npz` arrays or text lines `R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`')
+    parser.add_argument('--set-associativity', type=int, nargs='+', default=[4, 8, 16],
+                        help='SetAssociativity values (default: %(default)s)')
+    parser.add_argument('--num-lines', type=int, nargs='+', default=[128, 256, 512, 1024],
+                        help='NumLines values (default: %(default)s)')
+    parser.add_argument('--num-blocks', type=int, nargs='+', default=[4, 8, 16],
+                        help='NumBlocks values (default: %(default)s)')
+    parser.add_argument('--block-size', type=int, nargs='+', default=[64, 128],
+                        help='BlockSize values, the AXI data width in bit (default: %(default)s)')
+    parser.add_argument('--addr-width', type=int, default=32,
+                        help='AXI address width in bit (default: %(default)s)')
+    parser.add_argument('--cached-start', type=parse_int, default=0x8000_0000,
+                        help='start address of the cached region (default: 0x80000000)')
+    parser.add_argument('--cached-end', type=parse_int, default=None,
+                        help='end address of the cached region (default: end of the address '
+                        'space)')
+    parser.add_argument('--max-size', type=parse_int, default=None, metavar='BYTES',
+                        help='skip candidates with more data bytes than this')
+    parser.add_argument('--miss-penalty', type=float, default=0.0,
+                        help='cycles of memory latency exposed per miss or bypass access, 0 '
+                        'assumes they overlap completely (default: %(default)s)')
+    parser.add_argument('--cache-dir', default='dse-cache',
+                        help='directory of the cached per-trace results (default: %(default)s)')
+    parser.add_argument('--force', action='store_true',
+                        help='replay all points even if their result is cached')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='write every candidate as CSV (`.csv`) or JSON to this file')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler.enabled = args.profile
+    cached_end = (1 << args.addr_width) if args.cached_end is None else args.cached_end
+    address_map = (args.addr_width, args.cached_start, cached_end)
+    grid, rejected = candidates(dict(zip(GRID, (args.set_associativity, args.num_lines,
+                                                 args.num_blocks, args.block_size))),
+                                args.addr_width, args.max_size)
+    for params, reason in rejected:
+        print(f'skipping {params}: {reason}', file=sys.stderr)
+    if not grid:
+        parser.error('no valid candidate')
+
+    try:
+        with profiler.phase('trace_digest'):
+            digests = [trace_digest(path) for path in args.traces]
+        os.makedirs(args.cache_dir, exist_ok=True)
+        jobs = [(path, params, address_map,
+                 os.path.join(args.cache_dir, result_key(digest, params, address_map) + '.json'),
+                 args.force)
+                for params in grid for path, digest in zip(args.traces, digests)]
+        results = run_points(jobs, args.jobs, len(args.traces))
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    cached = sum(hit for _, hit, _ in results)
+    for _, _, profile in results:
+        profiler.merge(profile)
+    profiler.count('points', len(jobs))
+    profiler.count('cached', cached)
+
+    points = rate_points(grid, results, args.traces, address_map, args.miss_penalty)
+    print(f'{len(points)} candidates on {len(args.traces)} traces, {cached} of {len(jobs)} '
+          f'results cached in {args.cache_dir}; Pareto front:')
+    print_front(points)
+    if args.output is not None:
+        write_output(args, points, address_map)
+
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
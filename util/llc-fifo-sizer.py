@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Find the smallest LLC FIFO depths which hold the bandwidth under a memory latency"""
+import sys
+import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from llc_model import (TagArray, Trace, Descriptors, SyntheticLoad, PipelineModel, cut_bursts,
+                       add_config_arguments, config_from_args, parse_int)
+from llc_model.pipeline import DEPTHS
+from profiler import Profiler, add_profile_argument
+
+# command line option of every swept `axi_llc_pkg` depth
+GRID = {
+    'WChanBufferDepth': 'w_chan_buffer_depth',
+    'EvictFifoDepth': 'evict_fifo_depth',
+    'MissBufferDepth': 'miss_buffer_depth',
+    'RefillFifoDepth': 'refill_fifo_depth'
+}
+
+
+def evaluate(job):
+    """Run the pipeline model for one point"""
+    descs, cfg, mem_latency, depths, latencies, max_cycles = job
+    model = PipelineModel.from_config(cfg, mem_latency, depths, latencies)
+    report = model.run(descs, max_cycles)
+    return {'mem_latency': mem_latency, 'depths': depths, **report}
+
+
+def smallest(results, target):
+    """Per memory latency the point with the fewest FIFO entries reaching `target` of the best
+    throughput"""
+    chosen = {}
+    for latency in sorted({result['mem_latency'] for result in results}):
+        points = [result for result in results if result['mem_latency'] == latency]
+        best = max(result['throughput'] for result in points)
+        good = [result for result in points if result['throughput'] >= target * best]
+        pick = min(good, key=lambda result: (sum(result['depths'].values()),
+                                             -result['throughput']))
+        chosen[latency] = {'best_throughput': best, 'depths': pick['depths'],
+                           'throughput': pick['throughput']}
+    return chosen
+
+
+def load_descriptors(args, cfg):
+    """Descriptors of the trace replayed on the tag array, or of the synthetic load"""
+    if args.trace is None:
+        load = SyntheticLoad(args.rate, args.hit_rate, args.dirty_rate, args.write_fraction,
+                             cfg.num_blocks)
+        return Descriptors.synthetic(args.descriptors, load, np.random.default_rng(args.seed))
+    trace = Trace.load(args.trace)
+    _, _, desc_len = cut_bursts(trace, cfg.line_bytes)
+    outcome = TagArray(cfg, spm_mask=args.spm).replay_trace(trace)
+    return Descriptors.from_outcome(outcome, trace, desc_len)
+
+
+def make_jobs(args, descs, cfg, latencies):
+    """Job of every memory latency and combination of the swept depths"""
+    jobs = []
+    for latency in args.mem_latency:
+        for point in itertools.product(*(getattr(args, option) for option in GRID.values())):
+            jobs.append((descs, cfg, latency, dict(zip(GRID, point)), latencies,
+                         args.max_cycles))
+    return jobs
+
+
+def run_points(jobs, num_workers):
+    """Results of all points, in the order of the jobs"""
+    if num_workers == 1:
+        return [evaluate(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(evaluate, jobs))
+
+
+def print_results(results, chosen, target):
+    """Print the throughput and backpressure of every point and the smallest depths"""
+    print(f'{"latency":>7} ' + ' '.join(f'{name:>16}' for name in GRID) +
+          f' {"bytes/cycle":>11} {"latency":>8}  backpressure (w/evict/miss/refill)')
+    for result in results:
+        fifos = result['fifos'].values()
+        print(f'{result["mem_latency"]:7d} ' +
+              ' '.join(f'{result["depths"][name]:16d}' for name in GRID) +
+              f' {result["throughput"]:11.3f} {result["mean_latency"]:8.1f}  ' +
+              '/'.join(str(fifo['backpressure_cycles']) for fifo in fifos) +
+              ('' if result['completed'] == result['descriptors'] else '  (incomplete)'))
+    for latency, pick in chosen.items():
+        print(f'mem latency {latency}: smallest depths reaching {target:.0%} of '
+              f'{pick["best_throughput"]:.3f} bytes/cycle: ' +
+              ', '.join(f'{name}={value}' for name, value in pick['depths'].items()) +
+              f' ({pick["throughput"]:.3f} bytes/cycle)')
+
+
+def main():
+    """Simulate every point of the sweep and report the smallest FIFO depths"""
+    parser = argparse.ArgumentParser(
+        description='Step trace or synthetic descriptors through a cycle-approximate model of '
+        'the hit/miss, evict, refill, read and write units and report the backpressure and '
+        'stall cycles of every FIFO and the achieved throughput for each point of the sweep')
+    parser.add_argument('trace', nargs='?', default=None,
+                        help='trace file, `.npz` arrays or text lines, replayed on the tag array '
+                        'model for the hits and dirty evictions (default: synthetic load)')
+    add_config_arguments(parser)
+    parser.add_argument('--spm', type=parse_int, default=0, metavar='MASK',
+                        help='ways configured as SPM, the value of CFG_SPM (default: 0)')
+    synthetic = parser.add_argument_group('synthetic load')
+    synthetic.add_argument('--descriptors', type=int, default=5000,
+                           help='number of descriptors (default: %(default)s)')
+    synthetic.add_argument('--rate', type=float, default=0.1,
+                           help='descriptors arriving per cycle (default: %(default)s)')
+    synthetic.add_argument('--hit-rate', type=float, default=0.7,
+                           help='fraction of hits (default: %(default)s)')
+    synthetic.add_argument('--dirty-rate', type=float, default=0.3,
+                           help='fraction of misses evicting a dirty line (default: %(default)s)')
+    synthetic.add_argument('--write-fraction', type=float, default=0.4,
+                           help='fraction of writes (default: %(default)s)')
+    synthetic.add_argument('--seed', type=int, default=0, help='seed of the random load')
+    sweep = parser.add_argument_group('swept parameters')
+    sweep.add_argument('--mem-latency', type=int, nargs='+', default=[20],
+                       help='cycles from a memory request to its first data beat or B '
+                       '(default: %(default)s)')
+    for name, option in GRID.items():
+        sweep.add_argument(f'--{option.replace("_", "-")}', type=int, nargs='+',
+                           default=[DEPTHS[name]], help=f'{name} values (default: %(default)s)')
+    parser.add_argument('--tag-macro-latency', type=int, default=1,
+                        help='TagMacroLatency (default: %(default)s)')
+    parser.add_argument('--data-macro-latency', type=int, default=1,
+                        help='DataMacroLatency (default: %(default)s)')
+    parser.add_argument('--target', type=float, default=0.99,
+                        help='fraction of the best throughput the smallest depths have to reach '
+                        '(default: %(default)s)')
+    parser.add_argument('--max-cycles', type=int, default=None,
+                        help='stop a point after this many cycles')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='also write the results as JSON to this file')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.profile)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as err:
+        parser.error(str(err))
+    if min(min(getattr(args, option)) for option in GRID.values()) < 1:
+        parser.error('FIFO depths have to be at least 1')
+
+    with profiler.phase('load'):
+        descs = load_descriptors(args, cfg)
+    profiler.count('descriptors', len(descs))
+
+    latencies = {'TagMacroLatency': args.tag_macro_latency,
+                 'DataMacroLatency': args.data_macro_latency}
+    jobs = make_jobs(args, descs, cfg, latencies)
+
+    with profiler.phase('simulate'):
+        results = run_points(jobs, args.jobs)
+    profiler.count('points', len(jobs))
+
+    chosen = smallest(results, args.target)
+    print_results(results, chosen, args.target)
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': cfg.as_llc_cfg(), 'latencies': latencies,
+                       'source': args.trace or 'synthetic', 'target': args.target,
+                       'results': results,
+                       'smallest': {str(latency): pick for latency, pick in chosen.items()}},
+                      f, indent=2)
+            f.write('\n')
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
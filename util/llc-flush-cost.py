@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Estimate the duration and the writebacks of LLC flushes (CFG_FLUSH, CFG_SPM)"""
+import sys
+import json
+import argparse
+from llc_model import (TagArray, Trace, FlushTiming, snapshot, way_costs, estimate, plan,
+                       add_config_arguments, config_from_args, parse_int)
+from llc_model.axi_trace import bursts, is_trace
+from perf_log import TB_CYCLE_TIME
+from profiler import Profiler, add_profile_argument
+
+
+def print_ways(costs, spm):
+    """Print the dirty lines and the flush cycles of every way"""
+    print(f'{"way":>4} {"dirty lines":>12} {"writeback bytes":>16} {"cycles":>9}')
+    for cost in costs:
+        marker = ' (SPM)' if spm >> cost['way'] & 1 else ''
+        print(f'{cost["way"]:4d} {cost["dirty_lines"]:12d} {cost["writeback_bytes"]:16d} '
+              f'{cost["cycles"]:9d}{marker}')
+
+
+def print_commits(estimates, recommendation, cycle_time):
+    """Print the estimated masks and the recommended commits, with their durations in us"""
+    def micros(cycles):
+        return cycles * cycle_time / 1000
+
+    for result in estimates:
+        print(f'CFG_FLUSH = {result["mask"]:#x}: {result["cycles"]} cycles '
+              f'({micros(result["cycles"]):.2f} us), {result["writeback_bytes"]} bytes written '
+              'back')
+    single = recommendation['single_commit']
+    per_way = recommendation['per_way_commits']
+    print(f'Recommended: CFG_SPM = {recommendation["cfg_spm"]:#x}, CFG_FLUSH = '
+          f'{recommendation["cfg_flush"]:#x}, flushing ways {recommendation["order"]}')
+    print(f'  one commit: {single["cycles"]} cycles ({micros(single["cycles"]):.2f} us) isolated')
+    print(f'  one commit per way in this order: at most {per_way["max_cycles"]} cycles '
+          f'({micros(per_way["max_cycles"]):.2f} us) isolated at a time, '
+          f'{per_way["total_cycles"]} cycles in total')
+
+
+def main():
+    """Replay the trace and estimate the flushes of its dirty lines"""
+    parser = argparse.ArgumentParser(
+        description='Replay a trace on the tag array model, take the dirty lines at its end and '
+        'predict how long the flush FSM isolates the slave port and how many bytes it writes '
+        'back for way masks, and which ways are the cheapest to flush')
+    parser.add_argument('trace', help='binary AXI trace (axi-trace.py) or trace file, `.npz` '
+                        'arrays or text lines `R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`')
+    add_config_arguments(parser)
+    parser.add_argument('--spm', type=parse_int, default=0, metavar='MASK',
+                        help='ways configured as SPM during the trace, the value of CFG_SPM '
+                        '(default: 0)')
+    parser.add_argument('--mask', type=parse_int, nargs='+', default=[], metavar='MASK',
+                        help='CFG_FLUSH masks to estimate (default: all ways)')
+    parser.add_argument('--spm-ways', type=int, default=None,
+                        help='recommend the cheapest ways for this number of SPM ways instead of '
+                        'a flush of all ways')
+    parser.add_argument('--b-latency', type=int, default=20,
+                        help='cycles from the last W beat of a writeback to its B '
+                        '(default: %(default)s)')
+    parser.add_argument('--drain-cycles', type=int, default=0,
+                        help='cycles until the outstanding transactions of the slave port are '
+                        'done (`FsmWaitAx`, default: %(default)s)')
+    parser.add_argument('--evict-fifo-depth', type=int, default=4,
+                        help='EvictFifoDepth (default: %(default)s)')
+    parser.add_argument('--tag-macro-latency', type=int, default=1,
+                        help='TagMacroLatency (default: %(default)s)')
+    parser.add_argument('--data-macro-latency', type=int, default=1,
+                        help='DataMacroLatency (default: %(default)s)')
+    parser.add_argument('--cycle-time', type=float, default=TB_CYCLE_TIME,
+                        help='clock period in ns (default: %(default)s)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='also write the results as JSON to this file')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.profile)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as err:
+        parser.error(str(err))
+    if args.spm_ways is not None and not 0 <= args.spm_ways <= cfg.set_associativity:
+        parser.error(f'--spm-ways has to be between 0 and {cfg.set_associativity}')
+    if args.spm_ways is not None and args.spm_ways < bin(args.spm & cfg.all_ways).count('1'):
+        parser.error('--spm-ways is below the number of ways in --spm')
+
+    try:
+        with profiler.phase('trace_load'):
+            trace = bursts(args.trace) if is_trace(args.trace) else Trace.load(args.trace)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    tag_array = TagArray(cfg, spm_mask=args.spm)
+    with profiler.phase('replay'):
+        tag_array.replay_trace(trace)
+    dirty = snapshot(tag_array)
+
+    latencies = {'TagMacroLatency': args.tag_macro_latency,
+                 'DataMacroLatency': args.data_macro_latency}
+    timing = FlushTiming(cfg.num_blocks, latencies, args.b_latency, args.evict_fifo_depth,
+                         args.drain_cycles)
+    with profiler.phase('estimate'):
+        costs = way_costs(dirty, timing, cfg.line_bytes)
+        estimates = [estimate(dirty, mask, timing, cfg.line_bytes, args.spm)
+                     for mask in args.mask or [cfg.all_ways]]
+        recommendation = plan(dirty, timing, cfg.line_bytes, args.spm_ways, args.spm)
+
+    print_ways(costs, args.spm)
+    print_commits(estimates, recommendation, args.cycle_time)
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': cfg.as_llc_cfg(), 'spm': args.spm, 'cycle_time': args.cycle_time,
+                       'ways': costs, 'estimates': estimates, 'recommendation': recommendation},
+                      f, indent=2)
+            f.write('\n')
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Report how the LLC burst cutter fragments the bursts of a trace, per AXI ID and region"""
+import sys
+import csv
+import json
+import argparse
+from llc_model import (Trace, load_ranges, fragmentation, fragmentation_total,
+                       add_config_arguments, config_from_args)
+from llc_model.axi_trace import bursts, is_trace
+from profiler import Profiler, add_profile_argument
+
+# columns of the table, the CSV and JSON output have all counters
+COLUMNS = ('bursts', 'descriptors_per_burst', 'split_bursts', 'unaligned_bursts',
+           'common_offset', 'narrow_bursts', 'partial_writes', 'partial_write_rate',
+           'lost_cycles', 'bandwidth_loss')
+
+
+def print_table(results, summary, top):
+    """Print the counters of the `top` groups and of all bursts"""
+    print(f'{"id":>6} {"region":>12} ' + ' '.join(f'{name:>{len(name)}}' for name in COLUMNS))
+    for entry in results[:top] + [summary]:
+        cells = []
+        for name in COLUMNS:
+            value = entry[name]
+            if value is None:
+                cells.append(f'{"-":>{len(name)}}')
+            elif isinstance(value, float):
+                cells.append(f'{value:{len(name)}.4f}')
+            else:
+                cells.append(f'{value:{len(name)}d}')
+        ident = 'all' if entry['id'] is None else entry['id']
+        print(f'{ident:>6} {entry["region"] or "all":>12} ' + ' '.join(cells))
+
+
+def write_output(path, results, summary, cfg):
+    """Write all groups as CSV or JSON"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            header = list(summary)
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for entry in results:
+                writer.writerow([entry[name] for name in header])
+        else:
+            json.dump({'config': cfg.as_llc_cfg(), 'total': summary, 'groups': results}, f,
+                      indent=2)
+            f.write('\n')
+
+
+def main():
+    """Cut the bursts of the trace and report their fragmentation per group"""
+    parser = argparse.ArgumentParser(
+        description='Cut the bursts of a trace into descriptors like axi_llc_burst_cutter and '
+        'report, per AXI ID and address region, the descriptors per burst, the partial-line '
+        'writes and the bandwidth lost against the same bytes in aligned full-width bursts, '
+        'worst first')
+    parser.add_argument('trace', help='binary AXI trace (axi-trace.py) or trace file, `.npz` '
+                        'arrays or text lines `R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`')
+    add_config_arguments(parser)
+    parser.add_argument('--ranges', default=None,
+                        help='named address ranges (buffers) to report separately, lines '
+                        '`START END [NAME]` with an exclusive END; other bursts are grouped by '
+                        'their LLC region')
+    parser.add_argument('--tag-macro-latency', type=int, default=1,
+                        help='TagMacroLatency, a lookup takes one cycle more '
+                        '(default: %(default)s)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='number of groups printed (default: %(default)s)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='write all groups as CSV (`.csv`) or JSON to this file')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.profile)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as err:
+        parser.error(str(err))
+
+    try:
+        with profiler.phase('load'):
+            trace = bursts(args.trace) if is_trace(args.trace) else Trace.load(args.trace)
+            ranges = load_ranges(args.ranges) if args.ranges is not None else []
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    with profiler.phase('analyze'):
+        results = fragmentation(trace, cfg, ranges, args.tag_macro_latency)
+        summary = fragmentation_total(results)
+    profiler.count('bursts', len(trace))
+
+    print_table(results, summary, args.top)
+    print(f'{summary["descriptors"]} descriptors for {summary["bursts"]} bursts, '
+          f'{summary["ideal_descriptors"]} if aligned; {cfg.line_bytes} byte lines, '
+          f'`common_offset` is the most frequent line offset of the unaligned bursts')
+
+    if args.output is not None:
+        write_output(args.output, results, summary, cfg)
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
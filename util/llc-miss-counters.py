@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Size the miss counters of the LLC hit/miss unit on traces with AXI IDs"""
+import sys
+import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from llc_model import (TagArray, Trace, IdDescriptors, MissCounters, MemoryTiming,
+                       replay_miss_counters, add_config_arguments, config_from_args, parse_int)
+from llc_model.axi_trace import bursts, is_trace
+from llc_model.miss_counters import MISS_CNT_WIDTH, MISS_CNT_MAX_W_WIDTH, USE_ID_BITS
+from profiler import Profiler, add_profile_argument
+
+# command line option of every swept `axi_llc_pkg` parameter
+GRID = {
+    'MissCntWidth': 'miss_cnt_width',
+    'MissCntMaxWWidth': 'miss_cnt_max_w_width',
+    'UseIdBits': 'use_id_bits',
+    'mem_latency': 'mem_latency'
+}
+
+
+def evaluate(job):
+    """Replay the descriptors on one counter configuration"""
+    descs, params, num_blocks, data_latency = job
+    counters = MissCounters(params['MissCntWidth'], params['MissCntMaxWWidth'],
+                            params['UseIdBits'])
+    timing = MemoryTiming(num_blocks, params['mem_latency'], data_latency)
+    report = replay_miss_counters(descs, counters, timing)
+    return {'params': params, **report}
+
+
+def main():
+    """Replay the trace on every combination of the counter widths and report their stalls"""
+    parser = argparse.ArgumentParser(
+        description='Replay a trace with AXI IDs through a model of axi_llc_miss_counters and '
+        'report how often and how long the hit/miss unit stalls on saturated counters, for '
+        'every combination of the given counter widths')
+    parser.add_argument('trace', help='binary AXI trace (axi-trace.py) or trace file, `.npz` '
+                        'arrays or text lines `R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`')
+    add_config_arguments(parser)
+    parser.add_argument('--spm', type=parse_int, default=0, metavar='MASK',
+                        help='ways configured as SPM, the value of CFG_SPM (default: 0)')
+    parser.add_argument('--miss-cnt-width', type=int, nargs='+', default=[MISS_CNT_WIDTH],
+                        help='MissCntWidth values (default: %(default)s)')
+    parser.add_argument('--miss-cnt-max-w-width', type=int, nargs='+',
+                        default=[MISS_CNT_MAX_W_WIDTH],
+                        help='MissCntMaxWWidth values (default: %(default)s)')
+    parser.add_argument('--use-id-bits', type=int, nargs='+', default=[USE_ID_BITS],
+                        help='UseIdBits values (default: %(default)s)')
+    parser.add_argument('--mem-latency', type=int, nargs='+', default=[20],
+                        help='cycles from a memory request to its first data beat or B '
+                        '(default: %(default)s)')
+    parser.add_argument('--data-macro-latency', type=int, default=1,
+                        help='DataMacroLatency (default: %(default)s)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='also write the results as JSON to this file')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.profile)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as err:
+        parser.error(str(err))
+    if min(args.miss_cnt_width + args.miss_cnt_max_w_width) < 1 or min(args.use_id_bits) < 0:
+        parser.error('counter widths have to be at least 1 and UseIdBits at least 0')
+
+    try:
+        with profiler.phase('trace_load'):
+            trace = bursts(args.trace) if is_trace(args.trace) else Trace.load(args.trace)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    with profiler.phase('replay'):
+        outcome = TagArray(cfg, spm_mask=args.spm).replay_trace(trace)
+        descs = IdDescriptors.from_outcome(outcome, trace)
+    profiler.count('descriptors', len(descs))
+
+    jobs = [(descs, dict(zip(GRID, point)), cfg.num_blocks, args.data_macro_latency)
+            for point in itertools.product(*(getattr(args, option) for option in GRID.values()))]
+    with profiler.phase('counters'):
+        if args.jobs == 1:
+            results = [evaluate(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                results = list(executor.map(evaluate, jobs))
+    profiler.count('points', len(jobs))
+
+    print(' '.join(f'{name:>16}' for name in GRID) +
+          f' {"stalls":>8} {"rate":>9} {"cycles":>9} {"mean":>8} {"max":>6} {"forced":>8}')
+    for result in results:
+        print(' '.join(f'{result["params"][name]:16d}' for name in GRID) +
+              f' {result["stalls"]:8d} {result["stall_rate"]:9.6f} {result["stall_cycles"]:9d}'
+              f' {result["mean_stall"]:8.2f} {result["max_stall"]:6d}'
+              f' {result["forced_hits"]:8d}')
+    print(f'{len(descs)} descriptors, {len(set(descs.id.tolist()))} AXI IDs; `forced` counts the '
+          'hits sent through the miss pipeline behind a miss of their ID')
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': cfg.as_llc_cfg(), 'spm': args.spm, 'results': results}, f,
+                      indent=2)
+            f.write('\n')
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Replay an AXI access trace on a functional model of the LLC tag array"""
+import sys
+import json
+import argparse
+from llc_model import TagArray, Trace, add_config_arguments, config_from_args, parse_int
+from profiler import Profiler, add_profile_argument
+
+
+def main():
+    """Replay a trace on the tag array and report the counters as JSON"""
+    parser = argparse.ArgumentParser(description='Count hits, misses, evictions and dirty '
+                                     'writebacks of an LLC configuration on an access trace')
+    parser.add_argument('trace', help='trace file, `.npz` arrays or text lines '
+                        '`R|W ADDR [LEN [SIZE [CYCLE]]]`')
+    add_config_arguments(parser)
+    parser.add_argument('--spm', type=parse_int, default=0, metavar='MASK',
+                        help='ways configured as SPM, the value of CFG_SPM (default: 0)')
+    parser.add_argument('--flush', action='store_true',
+                        help='flush all ways at the end of the trace and count the writebacks')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON report file (default: standard output)')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.profile)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as err:
+        parser.error(str(err))
+
+    with profiler.phase('trace_load'):
+        trace = Trace.load(args.trace)
+    tag_array = TagArray(cfg, spm_mask=args.spm)
+    with profiler.phase('replay'):
+        outcome = tag_array.replay_trace(trace)
+    profiler.count('bursts', len(trace))
+    profiler.count('descriptors', len(outcome.addr))
+
+    stats = outcome.stats(cfg.line_bytes)
+    if args.flush:
+        tag_array.flush(cfg.all_ways)
+    stats = stats + tag_array.flush_stats
+
+    output = json.dumps({'config': cfg.as_llc_cfg(), 'spm': args.spm,
+                         'stats': stats.as_dict()}, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Compare replacement policies against the evict box of the LLC on access traces"""
+import sys
+import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from llc_model import LlcConfig, AddressMap, TagArray, Trace, POLICIES, parse_int
+from profiler import Profiler, add_profile_argument
+
+GRID = ('set_associativity', 'num_lines', 'num_blocks', 'block_size', 'spm')
+
+profiler = Profiler()
+
+_traces = {}
+
+
+def _init_worker(profile):
+    # drop what the parent process collected before the fork
+    profiler.enabled = profile
+    profiler.pop()
+
+
+def evaluate(job):
+    """Replay a trace on one configuration with one policy, returns the counters"""
+    trace_path, params, policy, cached_start = job
+    if trace_path not in _traces:
+        with profiler.phase('trace_load'):
+            _traces[trace_path] = Trace.load(trace_path)
+    cfg = LlcConfig(params['set_associativity'], params['num_lines'], params['num_blocks'],
+                    params['block_size'], AddressMap(cached_start=cached_start))
+    tag_array = TagArray(cfg, policy, params['spm'])
+    with profiler.phase(f'replay_{policy}'):
+        outcome = tag_array.replay_trace(_traces[trace_path])
+    profiler.count('descriptors', len(outcome.addr))
+    return outcome.stats(cfg.line_bytes).as_dict(), profiler.pop()
+
+
+def delta(value, base):
+    """Relative change against the baseline in percent, None for a zero baseline"""
+    return round(100.0 * (value - base) / base, 3) if base else None
+
+
+def compare(trace, params, policies, results):
+    """Print the deltas of every policy against the first one, returns the report entry"""
+    base = results[0][0]
+    entry = {'trace': trace, 'params': params, 'baseline': policies[0], 'policies': {}}
+    print(f'{trace} {params}')
+    for policy, (stats, profile) in zip(policies, results):
+        profiler.merge(profile)
+        entry['policies'][policy] = {
+            'stats': stats,
+            'hit_rate_delta': round(stats['hit_rate'] - base['hit_rate'], 6),
+            'writebacks_delta_percent': delta(stats['writebacks'], base['writebacks'])
+        }
+        print(f'  {policy:<16} hit rate {stats["hit_rate"]:8.4f} '
+              f'({100 * (stats["hit_rate"] - base["hit_rate"]):+7.3f} pp), '
+              f'writebacks {stats["writebacks"]:9d} '
+              f'({entry["policies"][policy]["writebacks_delta_percent"] or 0.0:+7.2f} %)')
+    return entry
+
+
+def main():
+    """Compare the replacement policies on every trace and configuration of the grid"""
+    parser = argparse.ArgumentParser(
+        description='Replay traces with several replacement policies on a grid of LLC '
+        'configurations and report the hit rate and writeback deltas against a baseline')
+    parser.add_argument('traces', nargs='+', help='trace files, see util/llc-model.py')
+    parser.add_argument('--set-associativity', type=int, nargs='+', default=[8],
+                        help='SetAssociativity values (multiple values are swept)')
+    parser.add_argument('--num-lines', type=int, nargs='+', default=[256],
+                        help='NumLines values')
+    parser.add_argument('--num-blocks', type=int, nargs='+', default=[8],
+                        help='NumBlocks values')
+    parser.add_argument('--block-size', type=int, nargs='+', default=[128],
+                        help='BlockSize values in bit')
+    parser.add_argument('--spm', type=parse_int, nargs='+', default=[0],
+                        help='CFG_SPM masks')
+    parser.add_argument('--cached-start', type=parse_int, default=0x8000_0000,
+                        help='start address of the cached region (default: 0x80000000)')
+    parser.add_argument('--policies', nargs='+', choices=list(POLICIES), default=list(POLICIES),
+                        help='policies to compare (default: all)')
+    parser.add_argument('--baseline', choices=list(POLICIES), default='evict_box_exact',
+                        help='policy the deltas refer to (default: %(default)s)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: all cores)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='also write the results as JSON to this file')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler.enabled = args.profile
+    policies = [args.baseline] + [policy for policy in args.policies if policy != args.baseline]
+    grid = [dict(zip(GRID, point)) for point in itertools.product(
+        args.set_associativity, args.num_lines, args.num_blocks, args.block_size, args.spm)]
+    for params in grid:
+        try:
+            LlcConfig(params['set_associativity'], params['num_lines'], params['num_blocks'],
+                      params['block_size'])
+        except ValueError as err:
+            parser.error(f'{params}: {err}')
+    jobs = [(trace, params, policy, args.cached_start)
+            for trace in args.traces for params in grid for policy in policies]
+
+    if args.jobs == 1:
+        results = [evaluate(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                                 initargs=(profiler.enabled,)) as executor:
+            results = list(executor.map(evaluate, jobs))
+
+    report = [compare(*jobs[idx][:2], policies, results[idx:idx + len(policies)])
+              for idx in range(0, len(jobs), len(policies))]
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': report}, f, indent=2)
+            f.write('\n')
+
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Read and configure the registers of an axi_llc instance from the host"""
+import sys
+import json
+import argparse
+from axi_llc_regs import AxiLlcRegs, MmapBackend, SimulatedLlc
+from llc_model import parse_int
+
+
+def main():
+    """Run the register access given on the command line"""
+    parser = argparse.ArgumentParser(description='Access the axi_llc configuration registers '
+                                     'through a memory mapped device')
+    parser.add_argument('--dev', default='/dev/mem',
+                        help='device or file mapping the registers (default: %(default)s)')
+    parser.add_argument('--base', type=parse_int, default=0,
+                        help='address of the register file in the device')
+    parser.add_argument('--sim', type=int, metavar='WAYS', default=None,
+                        help='use a simulated register file with this many ways instead')
+    parser.add_argument('--timeout', type=float, default=1.0,
+                        help='seconds to wait for flushes and the BIST (default: %(default)s)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('info', help='print the parameters and the configuration as JSON')
+    spm = subparsers.add_parser('spm', help='configure the SPM ways and wait until usable')
+    spm.add_argument('ways', type=parse_int, help='mask of the SPM ways')
+    flush = subparsers.add_parser('flush', help='flush ways and wait until done')
+    flush.add_argument('ways', type=parse_int, nargs='?', default=None,
+                       help='mask of the ways (default: all)')
+    subparsers.add_parser('bist', help='wait for the BIST and print the failing ways')
+    args = parser.parse_args()
+
+    backend = SimulatedLlc(args.sim) if args.sim is not None else MmapBackend(args.dev, args.base)
+    with AxiLlcRegs(backend) as regs:
+        try:
+            if args.command == 'spm':
+                regs.set_spm(args.ways, args.timeout)
+            elif args.command == 'flush':
+                regs.flush(args.ways, args.timeout)
+            elif args.command == 'bist':
+                print(f'{regs.wait_bist(args.timeout):#x}')
+                return 0
+        except TimeoutError as err:
+            print(err, file=sys.stderr)
+            return 1
+        print(json.dumps(regs.info(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Generate replay files for tb_axi_llc from traces or access patterns"""
+import sys
+import argparse
+import numpy as np
+from llc_model import (Trace, check_replay, write_replay, PatternParams, streaming, strided,
+                       pointer_chase, hot_set, PATTERNS, parse_int)
+from llc_model.axi_trace import bursts, is_trace
+from profiler import Profiler, add_profile_argument
+
+
+def generate(args, rng):
+    """Bursts of the pattern selected on the command line"""
+    length = args.len
+    if length is None:
+        length = 7 if args.pattern == 'streaming' else 0
+    params = PatternParams(args.num, args.base, args.footprint, length, args.size,
+                           args.write_fraction, args.ids)
+    if args.pattern == 'streaming':
+        return streaming(params, rng)
+    if args.pattern == 'strided':
+        return strided(params, args.stride, rng)
+    if args.pattern == 'pointer_chase':
+        return pointer_chase(params._replace(size=min(args.size, 3)), args.node_bytes, rng)
+    return hot_set(params, args.hot_bytes, args.hot_fraction, rng)
+
+
+def main():
+    """Write the replay file of the trace or of the access pattern"""
+    parser = argparse.ArgumentParser(
+        description='Write the bursts of a recorded trace or of a synthetic access pattern as '
+        'replay file, which tb_axi_llc drives on its slave port instead of random traffic when '
+        'run with `+axi_replay=<file>`')
+    parser.add_argument('output', help='replay file to write')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--trace', default=None,
+                        help='binary AXI trace (axi-trace.py) or trace file, `.npz` arrays or '
+                        'text lines `R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`')
+    source.add_argument('--pattern', choices=PATTERNS, default=None,
+                        help='synthetic access pattern')
+    parser.add_argument('-n', '--num', type=int, default=100_000,
+                        help='bursts of the pattern (default: %(default)s)')
+    parser.add_argument('--base', type=parse_int, default=0x8000_0000,
+                        help='start address of the pattern (default: 0x80000000, the cached '
+                        'region of tb_axi_llc)')
+    parser.add_argument('--footprint', type=parse_int, default=0x8_0000,
+                        help='bytes the pattern spans (default: 0x80000, the cached region of '
+                        'tb_axi_llc with its default parameters)')
+    parser.add_argument('--len', type=int, default=None,
+                        help='AXI length of the bursts, beats - 1 (default: 7 for streaming, '
+                        '0 otherwise)')
+    parser.add_argument('--size', type=int, default=4,
+                        help='AXI size of the beats, log2 of the bytes (default: %(default)s)')
+    parser.add_argument('--write-fraction', type=float, default=0.3,
+                        help='fraction of writes (default: %(default)s)')
+    parser.add_argument('--ids', type=int, default=4,
+                        help='AXI IDs used round robin, pointer chasing uses one '
+                        '(default: %(default)s)')
+    parser.add_argument('--stride', type=parse_int, default=0x1000,
+                        help='bytes between accesses of the strided pattern '
+                        '(default: %(default)s)')
+    parser.add_argument('--node-bytes', type=parse_int, default=64,
+                        help='bytes per list node of the pointer chase (default: %(default)s)')
+    parser.add_argument('--hot-bytes', type=parse_int, default=0x4000,
+                        help='size of the hot set (default: %(default)s)')
+    parser.add_argument('--hot-fraction', type=float, default=0.9,
+                        help='fraction of the accesses into the hot set (default: %(default)s)')
+    parser.add_argument('--gap', type=int, default=None,
+                        help='cycles between two bursts (default: the cycles of the trace, 0 for '
+                        'patterns)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('--addr-width', type=int, default=32,
+                        help='TbAxiAddrWidthFull (default: %(default)s)')
+    parser.add_argument('--id-width', type=int, default=6,
+                        help='TbAxiIdWidthFull (default: %(default)s)')
+    parser.add_argument('--data-width', type=int, default=128,
+                        help='TbAxiDataWidthFull (default: %(default)s)')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.profile)
+    if args.pattern is not None and (args.num < 1 or args.ids < 1 or args.footprint < 1):
+        parser.error('--num, --ids and --footprint have to be positive')
+    gap = args.gap
+    try:
+        with profiler.phase('generate'):
+            if args.trace is not None:
+                trace = bursts(args.trace) if is_trace(args.trace) else Trace.load(args.trace)
+            else:
+                trace = generate(args, np.random.default_rng(args.seed))
+                gap = 0 if gap is None else gap
+            check_replay(trace, args.addr_width, args.id_width, args.data_width)
+        with profiler.phase('write'):
+            file_bytes = write_replay(args.output, trace, gap)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    profiler.count('bursts', len(trace))
+
+    writes = int(np.count_nonzero(trace.write))
+    data_bytes = int(((trace.len.astype(np.int64) + 1) << trace.size.astype(np.int64)).sum())
+    print(f'{args.output}: {len(trace)} bursts ({writes} writes, {len(trace) - writes} reads), '
+          f'{data_bytes} bytes of data, {file_bytes} bytes')
+    print(f'Simulate with `+axi_replay={args.output}`')
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
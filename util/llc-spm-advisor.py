@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Choose the SPM/cache split of the LLC ways (CFG_SPM) for a trace"""
+import sys
+import json
+import argparse
+from llc_model import Trace, load_ranges, advise, effective_bandwidth, add_config_arguments, \
+    config_from_args
+from llc_model.axi_trace import bursts, is_trace
+from profiler import Profiler, add_profile_argument
+
+
+def main():
+    """Evaluate every SPM way count on the trace and recommend the best CFG_SPM"""
+    parser = argparse.ArgumentParser(
+        description='Evaluate every number of SPM ways in one pass over a trace, moving the '
+        'densest of the given address ranges into the SPM, and recommend the CFG_SPM value '
+        'with the highest effective bandwidth')
+    parser.add_argument('trace', help='binary AXI trace (axi-trace.py) or trace file, `.npz` '
+                        'arrays or text lines `R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`')
+    parser.add_argument('ranges', help='address ranges which may live in the SPM, lines '
+                        '`START END [NAME]` with an exclusive END')
+    add_config_arguments(parser)
+    parser.add_argument('--miss-penalty', type=float, default=0.0,
+                        help='cycles of memory latency exposed per miss or bypass access, 0 '
+                        'assumes they overlap completely (default: %(default)s)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='also write the results as JSON to this file')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.profile)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as err:
+        parser.error(str(err))
+
+    try:
+        with profiler.phase('load'):
+            trace = bursts(args.trace) if is_trace(args.trace) else Trace.load(args.trace)
+            ranges = load_ranges(args.ranges)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    with profiler.phase('advise'):
+        report = advise(trace, ranges, cfg)
+    profiler.count('bursts', len(trace))
+
+    total = report['total_bytes']
+    for result in report['results']:
+        result['bandwidth'] = round(effective_bandwidth(result, total, cfg.block_size // 8,
+                                                        args.miss_penalty), 4)
+    best = max(report['results'], key=lambda result: (result['bandwidth'], -result['spm_ways']))
+
+    print(f'{"spm ways":>8} {"spm bytes":>12} {"hit rate":>9} {"refill bytes":>13} '
+          f'{"writeback bytes":>15} {"bypass bytes":>13} {"bytes/cycle":>11}  ranges')
+    for result in report['results']:
+        print(f'{result["spm_ways"]:8d} {result["spm_bytes"]:12d} {result["hit_rate"]:9.4f} '
+              f'{result["refill_bytes"]:13d} {result["writeback_bytes"]:15d} '
+              f'{result["bypass_bytes"]:13d} {result["bandwidth"]:11.3f}  '
+              f'{",".join(result["ranges"]) or "-"}')
+    cfg_spm = best['cfg_spm']
+    print(f'Best: {best["spm_ways"]} SPM ways, CFG_SPM = {cfg_spm:#x} (CFG_SPM_LOW = '
+          f'{cfg_spm & 0xffff_ffff:#010x}, CFG_SPM_HIGH = {cfg_spm >> 32:#010x})')
+    for entry in report['placement']:
+        if entry['spm_ways'] <= best['spm_ways']:
+            print(f'  {entry["name"]}: {entry["start"]:#x}-{entry["end"]:#x} -> '
+                  f'{entry["spm_addr"]:#x}')
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': cfg.as_llc_cfg(), 'miss_penalty': args.miss_penalty,
+                       'best': best, **report}, f, indent=2)
+            f.write('\n')
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Recompute the LLC performance counters of tb_axi_llc from a VCD dump of any design"""
+import sys
+import csv
+import contextlib
+import json
+import argparse
+from llc_vcd import VcdAnalyzer, read_header
+from perf_log import (open_log, format_perf_dump, BANDWIDTH_COUNTERS, UTILIZATION_COUNTERS,
+                      TB_CYCLE_TIME)
+from profiler import Profiler, add_profile_argument
+
+
+def series_writer(f, cycle_time):
+    """Write the header of the time series CSV, returns the `on_window` callback writing a row"""
+    scale = 1e9 / cycle_time / 1024 / 1024
+    writer = csv.writer(f)
+    writer.writerow(['start_cycle', 'cycles'] +
+                    [f'bandwidth.{name}' for name in BANDWIDTH_COUNTERS] +
+                    [f'utilization.{name}' for name in UTILIZATION_COUNTERS])
+
+    def on_window(start, cycles, num_bytes, num):
+        writer.writerow([start, cycles] +
+                        [f'{num_bytes[name] / cycles * scale:f}' for name in BANDWIDTH_COUNTERS] +
+                        [f'{num[name] / cycles:f}' for name in UTILIZATION_COUNTERS])
+    return on_window
+
+
+def main():
+    """Count the events of a VCD dump and print them like tb_axi_llc"""
+    parser = argparse.ArgumentParser(
+        description='Stream a VCD dump of a design embedding axi_llc_reg_wrap and print the '
+        'bandwidths and utilizations of tb_axi_llc, optionally as a windowed time series')
+    parser.add_argument('vcd', help='VCD dump, `.gz` files are decompressed')
+    parser.add_argument('--scope', default=None,
+                        help='dotted VCD scope of the axi_llc_top instance (default: the first '
+                        'scope with an `ax_desc_valid` signal)')
+    parser.add_argument('--signals', default=None,
+                        help='JSON object mapping signal names, e.g. `desc.spm`, to VCD names '
+                        'relative to the scope, e.g. `desc[3]`')
+    parser.add_argument('--data-width', type=int, default=128,
+                        help='AXI data width for the maximal bandwidth (default: %(default)s)')
+    parser.add_argument('--cycle-time', type=float, default=TB_CYCLE_TIME,
+                        help='clock period in ns for the bandwidths (default: %(default)s)')
+    parser.add_argument('--window', type=int, default=None,
+                        help='cycles per sample of the time series')
+    parser.add_argument('--series', default=None,
+                        help='CSV file of the time series, bandwidths in MiB/sec and '
+                        'utilizations per window (requires --window)')
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.series and not args.window:
+        parser.error('--series requires --window')
+
+    profiler = Profiler(args.profile)
+    signal_map = None
+    if args.signals is not None:
+        with open(args.signals, 'r', encoding='utf-8') as f:
+            signal_map = json.load(f)
+
+    try:
+        with contextlib.ExitStack() as stack:
+            on_window = None
+            if args.series is not None:
+                on_window = series_writer(stack.enter_context(
+                    open(args.series, 'w', encoding='utf-8', newline='')), args.cycle_time)
+            f = stack.enter_context(open_log(args.vcd))
+            with profiler.phase('header'):
+                analyzer = VcdAnalyzer(read_header(f), args.scope, signal_map, args.window,
+                                       on_window)
+            with profiler.phase('body'):
+                lines = 0
+                for line in f:
+                    analyzer.feed(line)
+                    lines += 1
+                analyzer.finish()
+            profiler.count('lines', lines)
+    except (OSError, KeyError) as err:
+        print(err.args[0] if isinstance(err, KeyError) else err, file=sys.stderr)
+        return 1
+    counts = analyzer.counts
+    profiler.count('cycles', counts.cycles)
+
+    print(f'Scope: {analyzer.scope}, {counts.cycles} cycles')
+    print('\n'.join(format_perf_dump(counts.num_bytes, counts.num, max(counts.cycles, 1),
+                                     args.data_width, args.cycle_time)))
+    profiler.report(args.profile_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Python models of `axi_llc` used to explore configurations without RTL simulation"""
+from .config import LlcConfig, AddressMap, add_config_arguments, config_from_args, parse_int
+from .trace import Trace, cut_bursts
+from .replacement import (ReplacementPolicy, EvictBoxPolicy, EvictBoxCounter, ExactEvictBoxPolicy,
+                          POLICIES, make_policy)
+from .tag_array import TagArray, Stats, REGION_BYPASS, REGION_SPM, REGION_CACHED
+from .bloom import CbFilter, SubPerHash, BloomParams, PKG_SEEDS
+from .testbench import TB_PARAMS, TbCounters, run_testbench
+from .axi_trace import EVENT_DTYPE, TraceWriter, open_trace, iter_chunks, convert_monitor_log
+from .pipeline import Descriptors, SyntheticLoad, MemoryTiming, PipelineModel
+from .miss_counters import MissCounters, IdDescriptors, MissPipeline, replay_miss_counters
+from .spm_advisor import load_ranges, advise, effective_bandwidth
+from .flush import FlushTiming, snapshot, way_costs, estimate, plan
+from .dse import sram_bits, trace_digest, evaluate_trace, candidates, rate, pareto_front
+from .fragmentation import label_bursts, fragmentation, fragmentation_total
+from .replay import (check_replay, write_replay, read_replay, PatternParams, streaming, strided,
+                     pointer_chase, hot_set, PATTERNS)
@@ -0,0 +1,257 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Compact binary traces of the AXI handshakes at the LLC slave port
+
+A trace file is a 16 byte header (`MAGIC`, the format version and the record size as
+little-endian 32-bit words) followed by records of `EVENT_DTYPE`, one per AW, W, B, AR or R
+handshake in the order of their cycle. The records are fixed size, so files are mapped with
+`np.memmap` without a copy and read in chunks of any size.
+
+W, B and R events repeat the ID, address, length, size, burst and region of their burst, so every
+event can be filtered by region. The region is the one of the address map (bypass, SPM or cached
+region), independent of the SPM configuration at the time.
+
+The text monitor of `tb_axi_llc` (`+axi_trace=<file>`) writes one handshake per line:
+
+    CYCLE AW|AR ID ADDR LEN SIZE BURST
+    CYCLE W LAST
+    CYCLE R|B ID [LAST]
+
+with ID and ADDR in hex and the other fields in decimal.
+"""
+import os
+import struct
+import numpy as np
+from .tag_array import REGION_BYPASS, REGION_SPM, REGION_CACHED
+from .trace import Trace
+
+MAGIC = b'AXLT'
+VERSION = 1
+
+CHANNEL_AW = 0
+CHANNEL_W = 1
+CHANNEL_B = 2
+CHANNEL_AR = 3
+CHANNEL_R = 4
+CHANNELS = ('aw', 'w', 'b', 'ar', 'r')
+# names of the `REGION_*` values
+REGIONS = ('bypass', 'spm', 'cached')
+
+FLAG_WRITE = 1
+FLAG_LAST = 2
+
+EVENT_DTYPE = np.dtype([
+    ('cycle', '<u8'),
+    ('addr', '<u8'),
+    ('id', '<u2'),
+    ('len', 'u1'),
+    ('size', 'u1'),
+    ('burst', 'u1'),
+    ('channel', 'u1'),
+    ('region', 'u1'),
+    ('flags', 'u1')
+])
+HEADER = struct.Struct('<4sII')
+CHUNK = 1 << 20
+# fields of the monitor lines of every channel, including the cycle and the channel
+MONITOR_FIELDS = {'AW': 7, 'W': 3, 'B': 3, 'AR': 7, 'R': 4}
+
+
+def is_trace(path):
+    """The file starts like a binary AXI trace"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def open_trace(path):
+    """Map a trace file read-only, returns the array of its records"""
+    with open(path, 'rb') as f:
+        magic, version, itemsize = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or itemsize != EVENT_DTYPE.itemsize:
+        raise ValueError(f'{path}: not a version {VERSION} AXI trace')
+    # an empty file cannot be mapped
+    if os.path.getsize(path) == HEADER.size:
+        return np.zeros(0, EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode='r', offset=HEADER.size)
+
+
+def iter_chunks(path, chunk=CHUNK, channels=None):
+    """Yield the records of a trace in views of at most `chunk` records
+
+    With `channels` (names like `('aw', 'ar')`), only these events are yielded, the chunks then
+    are copies of the selected records.
+    """
+    events = open_trace(path)
+    select = None if channels is None else [CHANNELS.index(name) for name in channels]
+    for start in range(0, len(events), chunk):
+        block = events[start:start + chunk]
+        if select is not None:
+            block = block[np.isin(block['channel'], select)]
+        yield block
+
+
+def bursts(path, chunk=CHUNK):
+    """The AW and AR events of a trace as a `Trace` of bursts"""
+    parts = list(iter_chunks(path, chunk, ('aw', 'ar')))
+    events = np.concatenate(parts) if parts else np.zeros(0, EVENT_DTYPE)
+    return Trace(events['addr'], events['flags'] & FLAG_WRITE != 0, len=events['len'],
+                 size=events['size'], burst=events['burst'], cycle=events['cycle'],
+                 id=events['id'])
+
+
+class TraceWriter:
+    """Append records to a new trace file"""
+    def __init__(self, path):
+        self._file = open(path, 'wb')  # pylint: disable=consider-using-with
+        self._file.write(HEADER.pack(MAGIC, VERSION, EVENT_DTYPE.itemsize))
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, events):
+        """Append an array of `EVENT_DTYPE` records"""
+        np.ascontiguousarray(events, dtype=EVENT_DTYPE).tofile(self._file)
+        self.count += len(events)
+
+    def close(self):
+        """Finish the file"""
+        self._file.close()
+
+
+class MonitorConverter:
+    """Convert the text monitor output of `tb_axi_llc` into records
+
+    The W beats belong to the oldest AW with outstanding data, B and R to the oldest burst of
+    their ID, as AXI orders them. W beats arriving before their AW are written with the AW. Lines
+    of a channel with missing fields and responses without an outstanding burst raise a ValueError.
+    """
+    def __init__(self, cfg, chunk=CHUNK):
+        self.cfg = cfg
+        self._chunk = chunk
+        self._rows = []
+        self._w_bursts = []
+        self._w_next = 0
+        self._w_early = []
+        # bursts waiting for their B or last R beat by ID, writes and reads
+        self._open = ({}, {})
+
+    def _region(self, addr):
+        cfg = self.cfg
+        if cfg.spm_start <= addr < cfg.spm_start + cfg.spm_length:
+            return REGION_SPM
+        if cfg.cached_start <= addr < cfg.cached_end:
+            return REGION_CACHED
+        return REGION_BYPASS
+
+    def feed(self, line):
+        """Parse one monitor line, returns a chunk of records once enough are collected"""
+        fields = line.split()
+        if len(fields) < 2 or not fields[0].isdigit() or fields[1] not in MONITOR_FIELDS:
+            return None
+        cycle = int(fields[0])
+        channel = fields[1]
+        if len(fields) < MONITOR_FIELDS[channel]:
+            raise ValueError(f'{channel} line with {len(fields)} fields, expected '
+                             f'{MONITOR_FIELDS[channel]}')
+        if channel in ('AW', 'AR'):
+            write = channel == 'AW'
+            addr = int(fields[3], 16)
+            info = (int(fields[2], 16), addr, int(fields[4]), int(fields[5]), int(fields[6]),
+                    self._region(addr))
+            self._append(cycle, info, CHANNEL_AW if write else CHANNEL_AR,
+                         FLAG_WRITE if write else 0)
+            self._open[not write].setdefault(info[0], []).append(info)
+            if write:
+                self._w_bursts.append(info)
+                early, self._w_early = self._w_early, []
+                for beat in early:
+                    self._w_beat(*beat)
+        elif channel == 'W':
+            self._w_beat(cycle, fields[2] == '1')
+        elif channel in ('B', 'R'):
+            write = channel == 'B'
+            last = write or fields[3] == '1'
+            pending = self._open[not write].get(int(fields[2], 16))
+            if not pending:
+                raise ValueError(f'{channel} of ID {fields[2]} without an outstanding '
+                                 f'{"write" if write else "read"} burst')
+            info = pending[0]
+            if last:
+                pending.pop(0)
+            self._append(cycle, info, CHANNEL_B if write else CHANNEL_R,
+                         (FLAG_WRITE if write else 0) | (FLAG_LAST if last else 0))
+        if len(self._rows) >= self._chunk:
+            return self.take()
+        return None
+
+    def _w_beat(self, cycle, last):
+        if self._w_next == len(self._w_bursts):
+            self._w_early.append((cycle, last))
+            return
+        info = self._w_bursts[self._w_next]
+        if last:
+            self._w_next += 1
+            if self._w_next >= 1024:
+                del self._w_bursts[:self._w_next]
+                self._w_next = 0
+        self._append(cycle, info, CHANNEL_W, FLAG_WRITE | (FLAG_LAST if last else 0))
+
+    def _append(self, cycle, info, channel, flags):
+        id_, addr, length, size, burst, region = info
+        self._rows.append((cycle, addr, id_, length, size, burst, channel, region, flags))
+
+    def take(self):
+        """The records collected since the last call"""
+        events = np.array(self._rows, dtype=EVENT_DTYPE)
+        self._rows = []
+        return events
+
+
+def convert_monitor_log(lines, path, cfg, chunk=CHUNK):
+    """Write the monitor lines of `tb_axi_llc` to a binary trace, returns the number of records
+
+    A malformed line raises a ValueError naming it by the file name of `lines` and its number.
+    """
+    converter = MonitorConverter(cfg, chunk)
+    with TraceWriter(path) as writer:
+        for line_no, line in enumerate(lines, start=1):
+            try:
+                events = converter.feed(line)
+            except ValueError as err:
+                name = getattr(lines, 'name', 'monitor log')
+                raise ValueError(f'{name}:{line_no}: {err}') from None
+            if events is not None:
+                writer.write(events)
+        writer.write(converter.take())
+        return writer.count
+
+
+def summary(path, chunk=CHUNK):
+    """Event counts per channel and region and data bytes of W and R, read in chunks"""
+    bins = len(CHANNELS) * len(REGIONS)
+    counts = np.zeros(bins, dtype=np.int64)
+    data_bytes = np.zeros(bins, dtype=np.int64)
+    first = last = None
+    for block in iter_chunks(path, chunk):
+        if block.size == 0:
+            continue
+        first = int(block['cycle'][0]) if first is None else first
+        last = int(block['cycle'][-1])
+        idx = block['channel'].astype(np.int64) * len(REGIONS) + block['region']
+        counts += np.bincount(idx, minlength=bins)
+        beat_bytes = np.where(np.isin(block['channel'], (CHANNEL_W, CHANNEL_R)),
+                              1 << block['size'].astype(np.int64), 0)
+        data_bytes += np.bincount(idx, weights=beat_bytes, minlength=bins).astype(np.int64)
+    counts = counts.reshape(len(CHANNELS), len(REGIONS))
+    data_bytes = data_bytes.reshape(len(CHANNELS), len(REGIONS))
+    return {'cycles': None if first is None else last - first + 1,
+            'events': {chan: dict(zip(REGIONS, counts[idx].tolist()))
+                       for idx, chan in enumerate(CHANNELS)},
+            'bytes': {CHANNELS[idx]: dict(zip(REGIONS, data_bytes[idx].tolist()))
+                      for idx in (CHANNEL_W, CHANNEL_R)}}
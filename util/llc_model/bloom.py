@@ -0,0 +1,167 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Model of the counting bloom filter `cb_filter` in `axi_llc_lock_box_bloom`
+
+The hashes follow `sub_per_hash` of common_cells: every round permutes the input bits and replaces
+each bit with the XOR of three permuted bits, the permutations and XOR stages are derived from the
+seeds by linear congruential generators. The lowest `HashWidth` bits of the last round select the
+bucket, a lookup is positive when all buckets of the data are non-zero. The lock box stalls on a
+positive lookup and while any bucket counter is saturated (`filter_full_o`).
+"""
+import collections
+import numpy as np
+from .config import clog2
+
+# `axi_llc_pkg::BloomSeeds` as (PermuteSeed, XorSeed) by index, the assignment pattern of the
+# package lists index `BloomKHashes-1` first
+PKG_SEEDS = ((294388, 65146511), (19921030, 995713), (299034753, 4094834))
+
+# `BloomKHashes`, `BloomHashWidth`, `BloomHashRounds` and `BloomBucketWidth`, with the defaults of
+# `axi_llc_pkg`
+BloomParams = collections.namedtuple('BloomParams',
+                                     ('k_hashes', 'hash_width', 'hash_rounds', 'bucket_width'),
+                                     defaults=(3, 6, 1, 3))
+
+
+class SubPerHash:
+    """Substitution-permutation hash of `sub_per_hash`"""
+    def __init__(self, inp_width, hash_width, rounds, permute_seed, xor_seed):
+        self.inp_width = inp_width
+        self.hash_width = hash_width
+        self.permutations = self.get_permutations(inp_width, rounds, permute_seed)
+        self.xor_stages = self.get_xor_stages(inp_width, rounds, xor_seed)
+
+    @staticmethod
+    def get_permutations(inp_width, rounds, seed):
+        """Bit permutation of every round, an inside-out Fisher-Yates shuffle"""
+        a, c, m = 2147483629, 2147483587, 2**31 - 1
+        rand = (a * seed + c) % m
+        permutations = []
+        for _ in range(rounds):
+            perm = [0] * inp_width
+            for i in range(inp_width):
+                index = 0
+                if i > 0:
+                    rand = (a * rand + c) % m
+                    index = rand % i
+                if i != index:
+                    perm[i] = perm[index]
+                    perm[index] = i
+            permutations.append(perm)
+            # advance the generator a bit
+            rand = (a * rand + c) % m
+            for _ in range(rand % rounds):
+                rand = (a * rand + c) % m
+        return np.array(permutations, dtype=np.int64)
+
+    @staticmethod
+    def get_xor_stages(inp_width, rounds, seed):
+        """The three permuted bits XORed into every output bit, per round"""
+        a, c, m = 1103515245, 12345, 2**32
+        rand = (a * seed + c) % m
+        stages = np.zeros((rounds, inp_width, 3), dtype=np.int64)
+        for r in range(rounds):
+            for i in range(inp_width):
+                for j in range(3):
+                    rand = (a * rand + c) % m
+                    stages[r, i, j] = rand % inp_width
+            rand = (a * rand + c) % m
+            for _ in range(rand % rounds):
+                rand = (a * rand + c) % m
+        return stages
+
+    def __call__(self, bits):
+        """Hash of every row of a boolean array with `inp_width` columns (bit 0 first)"""
+        state = bits
+        for perm, stage in zip(self.permutations, self.xor_stages):
+            permuted = state[:, perm]
+            state = permuted[:, stage[:, 0]] ^ permuted[:, stage[:, 1]] ^ permuted[:, stage[:, 2]]
+        weights = 1 << np.arange(self.hash_width, dtype=np.int64)
+        return state[:, :self.hash_width].astype(np.int64) @ weights
+
+
+class CbFilter:
+    """Buckets selected by the hashes of `cb_filter` for every possible lock of the LLC
+
+    The hash width is limited to the data width minus one, `params` holds the one used.
+    """
+    def __init__(self, set_associativity, num_lines, params=BloomParams(), seeds=PKG_SEEDS):
+        if len(seeds) != params.k_hashes:
+            raise ValueError('one seed pair is needed per hash')
+        # `axi_llc_lock_box_bloom` locks `{index, way_ind}` with a one-hot way
+        self.data_width = set_associativity + clog2(num_lines)
+        self.params = params._replace(hash_width=min(params.hash_width, self.data_width - 1))
+        self.seeds = tuple(seeds)
+        hashes = [SubPerHash(self.data_width, self.params.hash_width, params.hash_rounds, *seed)
+                  for seed in seeds]
+
+        index = np.repeat(np.arange(num_lines, dtype=np.int64), set_associativity)
+        way = np.tile(np.arange(set_associativity, dtype=np.int64), num_lines)
+        data = (index << set_associativity) | (1 << way)
+        bits = (data[:, None] >> np.arange(self.data_width)) & 1 == 1
+        # bucket of every hash for every lock, a bucket hit by two hashes is counted once
+        self.buckets = np.stack([fn(bits) for fn in hashes], axis=1)
+        self.indicator = np.zeros((len(data), self.num_buckets), dtype=bool)
+        self.indicator[np.arange(len(data))[:, None], self.buckets] = True
+
+    @property
+    def num_buckets(self):
+        """Number of bucket counters"""
+        return 1 << self.params.hash_width
+
+    @property
+    def num_locks(self):
+        """Number of distinct `{index, way_ind}` values"""
+        return len(self.buckets)
+
+    @property
+    def max_count(self):
+        """Value of a saturated bucket"""
+        return (1 << self.params.bucket_width) - 1
+
+    def monte_carlo(self, outstanding, trials, hold_cycles, rng):
+        """Estimate false positives and stalls with `outstanding` random distinct locks
+
+        Every trial locks random lines, each staying locked for a uniformly distributed remaining
+        time of up to `hold_cycles`, and looks up all other lines. A false positive stalls until
+        one of its buckets drains; while a bucket is saturated every lookup stalls until one of its
+        locks is released. Returns the false positive rate, the rate of lookups seeing a full
+        filter and the mean extra stall cycles per lookup of an unlocked line.
+        """
+        totals = np.zeros(4)
+        # trials evaluated at once, bounded by the size of the per-lock arrays
+        batch = max(1, (1 << 20) // self.num_locks)
+        for start in range(0, trials, batch):
+            totals += self._trials(min(batch, trials - start), outstanding, hold_cycles, rng)
+        queries, false_pos, full_hits, stall = totals.tolist()
+        return false_pos / queries, full_hits / queries, stall / queries
+
+    def _trials(self, num, outstanding, hold_cycles, rng):
+        """Lookups, false positives, full filter lookups and stall cycles summed over trials"""
+        locked = np.argpartition(rng.random((num, self.num_locks)), outstanding - 1,
+                                 axis=1)[:, :outstanding]
+        remaining = rng.random((num, outstanding)) * hold_cycles
+        counts, drain, full, full_until = self._buckets(locked, remaining)
+
+        unlocked = np.ones((num, self.num_locks), dtype=bool)
+        unlocked[np.arange(num)[:, None], locked] = False
+        # a lookup is positive if no bucket of the data is empty
+        positive = ((~(counts > 0)).astype(np.int64) @ self.indicator.T) == 0
+        # the data of a false positive is released when its first bucket drains
+        release = drain[np.arange(num)[:, None, None], self.buckets[None, :, :]].min(axis=2)
+        wait = np.maximum(np.where(positive, release, 0.0), full_until[:, None])
+        return (int(unlocked.sum()), float((positive & unlocked).sum()),
+                float((full[:, None] & unlocked).sum()), float((wait * unlocked).sum()))
+
+    def _buckets(self, locked, remaining):
+        """Bucket counters and drain cycles, and whether and until when the filter is full"""
+        ind = self.indicator[locked]
+        counts = ind.sum(axis=1)
+        drain = np.where(ind, remaining[:, :, None], 0.0).max(axis=1)
+        # a saturated bucket accepts locks again after its first release
+        first_release = np.where(ind, remaining[:, :, None], np.inf).min(axis=1)
+        saturated = counts >= self.max_count
+        full_until = np.where(saturated, first_release, 0.0).max(axis=1)
+        return counts, drain, saturated.any(axis=1), full_until
@@ -0,0 +1,158 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Static LLC configuration, mirroring `axi_llc_pkg::llc_cfg_t` and the address map"""
+import collections
+
+
+def clog2(value):
+    """`$clog2` of SystemVerilog"""
+    return max(0, (value - 1).bit_length())
+
+
+def parse_int(text):
+    """Parse an integer given in any Python notation, e.g. `0x8000_0000` or `0b1100`"""
+    return int(text, 0)
+
+
+# address width and regions of an `axi_llc_top` instance, the defaults are the ones of
+# `tb_axi_llc`; without an end, the cached region spans twice the SPM length
+AddressMap = collections.namedtuple('AddressMap',
+                                    ('addr_width', 'spm_start', 'cached_start', 'cached_end'),
+                                    defaults=(32, 0, 0x8000_0000, None))
+
+
+class LlcConfig:
+    """Parameters of an `axi_llc_top` instance
+
+    The derived fields are calculated like the localparam `Cfg` in `axi_llc_top`.
+    """
+    def __init__(self, set_associativity=8, num_lines=256, num_blocks=8, block_size=128,
+                 address_map=None):
+        if set_associativity < 1 or set_associativity > 64:
+            raise ValueError('SetAssociativity has to be between 1 and 64')
+        for name, value in (('NumLines', num_lines), ('NumBlocks', num_blocks),
+                            ('BlockSize', block_size)):
+            if value < 1 or value & (value - 1):
+                raise ValueError(f'{name} has to be a power of two')
+        if num_lines < 2 or num_blocks < 2:
+            raise ValueError('NumLines and NumBlocks have to be at least 2')
+        if block_size < 8:
+            raise ValueError('BlockSize has to be at least 8 bit')
+        self.set_associativity = set_associativity
+        self.num_lines = num_lines
+        self.num_blocks = num_blocks
+        self.block_size = block_size
+        self.address_map = AddressMap() if address_map is None else address_map
+
+    @property
+    def addr_width(self):
+        """AXI address width in bits"""
+        return self.address_map.addr_width
+
+    @property
+    def spm_start(self):
+        """Start address of the SPM region"""
+        return self.address_map.spm_start
+
+    @property
+    def cached_start(self):
+        """Start address of the cached region"""
+        return self.address_map.cached_start
+
+    @property
+    def cached_end(self):
+        """End address (exclusive) of the cached region"""
+        if self.address_map.cached_end is None:
+            return self.cached_start + 2 * self.spm_length
+        return self.address_map.cached_end
+
+    @property
+    def index_length(self):
+        """Length of the index (line address) in bits"""
+        return clog2(self.num_lines)
+
+    @property
+    def block_offset_length(self):
+        """Length of the block offset in bits"""
+        return clog2(self.num_blocks)
+
+    @property
+    def byte_offset_length(self):
+        """Length of the byte offset in bits"""
+        return clog2(self.block_size // 8)
+
+    @property
+    def tag_length(self):
+        """Length of the address tag in bits"""
+        return (self.addr_width - self.index_length - self.block_offset_length -
+                self.byte_offset_length)
+
+    @property
+    def line_bytes(self):
+        """Bytes in a cache line"""
+        return self.num_blocks * self.block_size // 8
+
+    @property
+    def way_bytes(self):
+        """Bytes of a single way, also the size of its SPM region"""
+        return self.num_lines * self.line_bytes
+
+    @property
+    def spm_length(self):
+        """Length of the SPM address region in bytes"""
+        return self.set_associativity * self.way_bytes
+
+    @property
+    def all_ways(self):
+        """Mask with a bit set for every way"""
+        return (1 << self.set_associativity) - 1
+
+    def as_llc_cfg(self):
+        """The fields of `llc_cfg_t` by their SystemVerilog names"""
+        return {
+            'SetAssociativity': self.set_associativity,
+            'NumLines': self.num_lines,
+            'NumBlocks': self.num_blocks,
+            'BlockSize': self.block_size,
+            'TagLength': self.tag_length,
+            'IndexLength': self.index_length,
+            'BlockOffsetLength': self.block_offset_length,
+            'ByteOffsetLength': self.byte_offset_length,
+            'SPMLength': self.spm_length
+        }
+
+    def __repr__(self):
+        return (f'LlcConfig(set_associativity={self.set_associativity}, '
+                f'num_lines={self.num_lines}, num_blocks={self.num_blocks}, '
+                f'block_size={self.block_size})')
+
+
+def add_config_arguments(parser):
+    """Add the options describing an `axi_llc_top` instance to an argument parser"""
+    group = parser.add_argument_group('LLC configuration')
+    group.add_argument('--set-associativity', type=int, default=8, metavar='N',
+                       help='SetAssociativity (default: %(default)s)')
+    group.add_argument('--num-lines', type=int, default=256, metavar='N',
+                       help='NumLines per way (default: %(default)s)')
+    group.add_argument('--num-blocks', type=int, default=8, metavar='N',
+                       help='NumBlocks per line (default: %(default)s)')
+    group.add_argument('--block-size', type=int, default=128, metavar='BITS',
+                       help='BlockSize, the AXI data width in bit (default: %(default)s)')
+    group.add_argument('--addr-width', type=int, default=32, metavar='BITS',
+                       help='AXI address width in bit (default: %(default)s)')
+    group.add_argument('--spm-start', type=parse_int, default=0, metavar='ADDR',
+                       help='start address of the SPM region (default: 0)')
+    group.add_argument('--cached-start', type=parse_int, default=0x8000_0000, metavar='ADDR',
+                       help='start address of the cached region (default: 0x80000000)')
+    group.add_argument('--cached-end', type=parse_int, default=None, metavar='ADDR',
+                       help='end address of the cached region (default: start plus twice the '
+                       'SPM length, like tb_axi_llc)')
+
+
+def config_from_args(args):
+    """Build the configuration from the options added by `add_config_arguments`"""
+    return LlcConfig(args.set_associativity, args.num_lines, args.num_blocks, args.block_size,
+                     AddressMap(args.addr_width, args.spm_start, args.cached_start,
+                                args.cached_end))
@@ -0,0 +1,99 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Design space exploration over `llc_cfg_t`
+
+Every candidate is rated by the bits of its SRAM macros and, per trace, by the hit rate and the
+effective bandwidth of a replay on the tag array model. The tag macros store the tag and the
+valid and dirty flags of every line (`TagDataLen = TagLength + 2`), the data macros
+`SetAssociativity * NumLines * NumBlocks * BlockSize` bits, see `doc/axi_llc.md`.
+"""
+import hashlib
+import itertools
+import numpy as np
+from .config import LlcConfig, AddressMap
+from .trace import cut_bursts
+from .tag_array import TagArray, REGION_BYPASS
+from .spm_advisor import effective_bandwidth
+
+# explored parameters of `llc_cfg_t`, in the argument order of `LlcConfig`
+GRID = ('SetAssociativity', 'NumLines', 'NumBlocks', 'BlockSize')
+
+
+def sram_bits(cfg):
+    """Bits of the tag and the data macros of a configuration"""
+    lines = cfg.set_associativity * cfg.num_lines
+    return {'tag_bits': lines * (cfg.tag_length + 2),
+            'data_bits': lines * cfg.num_blocks * cfg.block_size}
+
+
+def trace_digest(path):
+    """Hash of the content of a trace file, identifies its cached results"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def evaluate_trace(trace, cfg):
+    """Replay a trace on a configuration with all ways caching, returns the counters"""
+    outcome = TagArray(cfg).replay_trace(trace)
+    stats = outcome.stats(cfg.line_bytes).as_dict()
+    _, _, desc_len = cut_bursts(trace, cfg.line_bytes)
+    num_bytes = (desc_len.astype(np.int64) + 1) << trace.size[outcome.burst_idx].astype(np.int64)
+    bypass = stats['bypass_read'] + stats['bypass_write']
+    return {
+        'lookups': stats['hits'] + stats['misses'],
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'hit_rate': stats['hit_rate'],
+        'refill_bytes': stats['refill_bytes'],
+        'writeback_bytes': stats['writeback_bytes'],
+        'bypass_accesses': bypass,
+        'bypass_bytes': int(num_bytes[outcome.region == REGION_BYPASS].sum()) if bypass else 0,
+        'total_bytes': int(num_bytes.sum())
+    }
+
+
+def candidates(grid, addr_width=32, max_bytes=None):
+    """Valid configurations of the cross product of the values of every `GRID` parameter, and
+    the rejected ones with their reason"""
+    valid, rejected = [], []
+    for point in itertools.product(*(grid[name] for name in GRID)):
+        params = dict(zip(GRID, point))
+        try:
+            cfg = LlcConfig(*point, AddressMap(addr_width))
+        except ValueError as err:
+            rejected.append((params, str(err)))
+            continue
+        if max_bytes is not None and cfg.spm_length > max_bytes:
+            rejected.append((params, f'{cfg.spm_length} bytes exceed the limit'))
+            continue
+        valid.append(params)
+    return valid, rejected
+
+
+def rate(trace_results, beat_bytes, miss_penalty=0):
+    """Mean hit rate and mean effective bandwidth over the per-trace counters"""
+    hit_rates = [result['hit_rate'] for result in trace_results]
+    bandwidths = [effective_bandwidth(result, result['total_bytes'], beat_bytes, miss_penalty)
+                  for result in trace_results]
+    return float(np.mean(hit_rates)), float(np.mean(bandwidths))
+
+
+def pareto_front(area, hit_rate, bandwidth):
+    """Mask of the points not dominated by another, which is no larger and no worse in hit rate
+    and bandwidth and better in at least one of them"""
+    area = np.asarray(area, dtype=np.float64)
+    hit_rate = np.asarray(hit_rate, dtype=np.float64)
+    bandwidth = np.asarray(bandwidth, dtype=np.float64)
+    front = np.ones(len(area), dtype=bool)
+    for idx, (point_area, point_hit_rate, point_bandwidth) in enumerate(zip(area, hit_rate,
+                                                                           bandwidth)):
+        no_worse = (area <= point_area) & (hit_rate >= point_hit_rate) & \
+            (bandwidth >= point_bandwidth)
+        better = (area < point_area) | (hit_rate > point_hit_rate) | (bandwidth > point_bandwidth)
+        front[idx] = not np.any(no_worse & better)
+    return front
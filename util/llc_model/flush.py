@@ -0,0 +1,121 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Cost model of the flush FSM of `axi_llc_config`
+
+A write to `COMMIT_CFG` isolates the slave port (`FsmWaitAx`), waits for the splitters
+(`FsmWaitSplitter`) and flushes the ways of `(CFG_FLUSH | CFG_SPM) & ~FLUSHED` one after the other,
+lowest way first. For every way, `FsmInitFlush` is followed by `FsmSendFlush`, which sends one
+flush descriptor per index, and `FsmWaitFlush`, which waits until the W master of the evict unit
+has consumed all of them; `FsmEndFlush` moves on to the next way. The slave port stays isolated
+until the last way is done.
+
+The hit/miss unit issues a new tag request once the previous response was taken, so a flush
+descriptor leaves it every `TagMacroLatency + 1` cycles. Clean and invalid lines pass the W master
+in a cycle, a dirty line occupies it for the data way reads, the W beats and the B response. The
+evict FIFO decouples the two, when it is full the lookups wait.
+"""
+import numpy as np
+from .pipeline import LATENCIES
+
+# Idle (commit seen), WaitAx and WaitSplitter, not counting the drain of the slave port
+COMMIT_CYCLES = 3
+# InitFlush and EndFlush of every way
+WAY_CYCLES = 2
+
+
+class FlushTiming:
+    """Cycle parameters of a flush, `latencies` overrides the macro latencies of `LATENCIES`"""
+    def __init__(self, num_blocks=8, latencies=None, b_latency=20, evict_fifo_depth=4,
+                 drain_cycles=0):
+        latencies = {**LATENCIES, **(latencies or {})}
+        self.num_blocks = num_blocks
+        self.line_interval = latencies['TagMacroLatency'] + 1
+        self.dirty_cycles = num_blocks + latencies['DataMacroLatency'] + b_latency + 1
+        self.evict_fifo_depth = evict_fifo_depth
+        self.drain_cycles = drain_cycles
+
+    @property
+    def commit_cycles(self):
+        """Cycles of a commit besides the flushed ways"""
+        return self.drain_cycles + COMMIT_CYCLES
+
+    def way_cycles(self, dirty):
+        """Cycles from `FsmSendFlush` to the last flush descriptor received, for the dirty flags
+        of the lines of a way in index order"""
+        dirty = np.asarray(dirty, dtype=bool)
+        if not dirty.any():
+            # lookup bound, the W master keeps up
+            return len(dirty) * self.line_interval + 2
+        interval = self.line_interval
+        depth = self.evict_fifo_depth + 1
+        starts = []
+        issue = -interval
+        done = 0
+        for idx, line_dirty in enumerate(dirty.tolist()):
+            issue += interval
+            if idx >= depth:
+                issue = max(issue, starts[idx - depth])
+            start = max(issue + interval + 1, done)
+            starts.append(start)
+            done = start + (self.dirty_cycles if line_dirty else 1)
+        return done + 1
+
+
+def snapshot(tag_array):
+    """Dirty flags of every line as `(NumLines, SetAssociativity)` array"""
+    return tag_array.valid & tag_array.dirty
+
+
+def way_costs(dirty, timing, line_bytes):
+    """Dirty lines, writeback bytes and cycles of flushing every single way"""
+    costs = []
+    for way in range(dirty.shape[1]):
+        lines = int(np.count_nonzero(dirty[:, way]))
+        costs.append({'way': way, 'dirty_lines': lines, 'writeback_bytes': lines * line_bytes,
+                      'cycles': timing.way_cycles(dirty[:, way]) + WAY_CYCLES})
+    return costs
+
+
+def estimate(dirty, mask, timing, line_bytes, flushed=0):
+    """Duration and writebacks of one commit flushing the ways of `mask`
+
+    Ways in `flushed` (SPM ways flushed before) are skipped like in `FsmInitFlush`.
+    """
+    costs = way_costs(dirty, timing, line_bytes)
+    ways = [cost for cost in costs if (mask & ~flushed) >> cost['way'] & 1]
+    cycles = timing.commit_cycles + sum(cost['cycles'] for cost in ways)
+    return {'mask': mask, 'ways': [cost['way'] for cost in ways], 'cycles': cycles,
+            'dirty_lines': sum(cost['dirty_lines'] for cost in ways),
+            'writeback_bytes': sum(cost['writeback_bytes'] for cost in ways)}
+
+
+def plan(dirty, timing, line_bytes, spm_ways=None, spm=0):
+    """Recommend the cheapest ways to turn into SPM and the order of per-way commits
+
+    With `spm_ways`, the ways already in `spm` are kept and the cheapest other ways are added.
+    Without, all cache ways are flushed. Committing one way at a time (cheapest first) bounds the
+    isolation of the slave port to the cost of a single way.
+    """
+    costs = [cost for cost in way_costs(dirty, timing, line_bytes) if not spm >> cost['way'] & 1]
+    costs.sort(key=lambda cost: (cost['cycles'], cost['way']))
+    if spm_ways is not None:
+        kept = bin(spm).count('1')
+        costs = costs[:max(spm_ways - kept, 0)]
+    mask = 0
+    for cost in costs:
+        mask |= 1 << cost['way']
+    single = estimate(dirty, mask, timing, line_bytes, spm)
+    overhead = timing.commit_cycles
+    return {
+        'cfg_spm': spm | mask if spm_ways is not None else spm,
+        # new SPM ways are flushed by the commit of CFG_SPM alone
+        'cfg_flush': 0 if spm_ways is not None else mask,
+        'single_commit': single,
+        'order': [cost['way'] for cost in costs],
+        'per_way_commits': {
+            'max_cycles': max((cost['cycles'] for cost in costs), default=0) + overhead,
+            'total_cycles': sum(cost['cycles'] for cost in costs) + len(costs) * overhead
+        }
+    }
@@ -0,0 +1,141 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Fragmentation of AXI bursts by `axi_llc_burst_cutter`
+
+Every descriptor takes a lookup in the hit/miss unit, which accepts one every
+`TagMacroLatency + 1` cycles, and moves its beats through the read or write unit. A descriptor
+therefore costs `max(beats, TagMacroLatency + 1)` cycles. Bursts which start in the middle of a
+line are cut into more descriptors than the same bytes starting on a line boundary, and narrow
+bursts need more beats than full-width ones. The ideal cost of a burst is the one of its bytes
+moved in full-width beats from a line boundary, the bandwidth loss compares the two.
+
+Write descriptors which do not cover their whole line still refill it on a miss, they are counted
+as partial-line writes.
+"""
+import numpy as np
+from .trace import cut_bursts, BURST_FIXED
+from .tag_array import REGION_BYPASS, REGION_SPM, REGION_CACHED
+
+REGION_NAMES = {REGION_BYPASS: 'bypass', REGION_SPM: 'spm', REGION_CACHED: 'cached'}
+# counters summed per group
+COUNTERS = ('bursts', 'writes', 'bytes', 'descriptors', 'write_descriptors', 'ideal_descriptors',
+            'unaligned_bursts', 'split_bursts', 'narrow_bursts', 'partial_writes', 'cycles',
+            'ideal_cycles')
+
+
+def llc_region(addr, cfg):
+    """Region of the LLC address map of every address"""
+    addr = np.asarray(addr, dtype=np.int64)
+    region = np.full(len(addr), REGION_BYPASS, dtype=np.uint8)
+    region[(addr >= cfg.cached_start) & (addr < cfg.cached_end)] = REGION_CACHED
+    region[(addr >= cfg.spm_start) & (addr < cfg.spm_start + cfg.spm_length)] = REGION_SPM
+    return region
+
+
+def label_bursts(trace, cfg, ranges=()):
+    """Names of the regions and the region index of every burst
+
+    The regions are the given address ranges `(start, end, name)`, sorted and disjoint like
+    returned by `load_ranges`, bursts outside of all of them get their LLC region.
+    """
+    addr = trace.addr.astype(np.int64)
+    names = [name for _, _, name in ranges] + [REGION_NAMES[region] for region in sorted(
+        REGION_NAMES)]
+    label = len(ranges) + llc_region(addr, cfg).astype(np.int64)
+    if ranges:
+        starts = np.array([start for start, _, _ in ranges], dtype=np.int64)
+        ends = np.array([end for _, end, _ in ranges], dtype=np.int64)
+        pos = np.searchsorted(starts, addr, side='right') - 1
+        inside = (pos >= 0) & (addr < ends[np.maximum(pos, 0)])
+        label = np.where(inside, pos, label)
+    return names, label
+
+
+def ideal_cycles(num_bytes, beat_bytes, line_bytes, interval):
+    """Cycles of bursts moving their bytes in full-width beats from a line boundary"""
+    num_bytes = np.asarray(num_bytes, dtype=np.int64)
+    full = num_bytes // line_bytes
+    rest = num_bytes % line_bytes
+    rest_beats = -(-rest // beat_bytes)
+    return full * max(line_bytes // beat_bytes, interval) + \
+        np.where(rest > 0, np.maximum(rest_beats, interval), 0)
+
+
+def fragmentation(trace, cfg, ranges=(), tag_latency=1):
+    """Fragmentation counters per AXI ID and region, sorted by the cycles lost"""
+    names, label = label_bursts(trace, cfg, ranges)
+    groups, group = np.unique(trace.id.astype(np.int64) * len(names) + label,
+                              return_inverse=True)
+    offset = trace.addr.astype(np.int64) & (cfg.line_bytes - 1)
+    sums = {name: np.bincount(group, weights=values, minlength=len(groups))
+            for name, values in _burst_counters(trace, cfg, tag_latency, offset).items()}
+    common_offset = _common_offsets(group, offset, len(groups), cfg.line_bytes)
+    results = []
+    for idx, value in enumerate(groups.tolist()):
+        entry = {'id': value // len(names), 'region': names[value % len(names)]}
+        entry.update({name: int(counts[idx]) for name, counts in sums.items()})
+        entry['common_offset'] = int(common_offset[idx])
+        _rates(entry)
+        results.append(entry)
+    results.sort(key=lambda entry: (-entry['lost_cycles'], entry['id'], entry['region']))
+    return results
+
+
+def _burst_counters(trace, cfg, tag_latency, offset):
+    """Counters of every burst, by their names in `COUNTERS`"""
+    line_bytes = cfg.line_bytes
+    beat_bytes = cfg.block_size // 8
+    interval = tag_latency + 1
+    size = trace.size.astype(np.int64)
+    burst_bytes = (trace.len.astype(np.int64) + 1) << size
+    fixed = trace.burst == BURST_FIXED
+    descs, cycles, partial = _descriptor_counts(trace, line_bytes, interval)
+    ideal_descs = np.where(fixed, descs, -(-burst_bytes // line_bytes))
+    ideal = np.where(fixed, cycles, ideal_cycles(burst_bytes, beat_bytes, line_bytes, interval))
+    return dict(zip(COUNTERS, (
+        np.ones(len(trace)), trace.write, burst_bytes, descs, descs * trace.write, ideal_descs,
+        offset != 0, descs > ideal_descs, size < int(beat_bytes).bit_length() - 1, partial,
+        cycles, ideal)))
+
+
+def _descriptor_counts(trace, line_bytes, interval):
+    """Descriptors, cycles and partial-line write descriptors of every burst"""
+    burst_idx, _, desc_len = cut_bursts(trace, line_bytes)
+    size = trace.size[burst_idx].astype(np.int64)
+    desc_beats = desc_len.astype(np.int64) + 1
+    # FIXED bursts stay on their address, they cover a single beat of the line
+    covered = np.where(trace.burst[burst_idx] == BURST_FIXED, 1 << size, desc_beats << size)
+    partial = trace.write[burst_idx] & (covered < line_bytes)
+    return (np.bincount(burst_idx, minlength=len(trace)),
+            np.bincount(burst_idx, weights=np.maximum(desc_beats, interval),
+                        minlength=len(trace)),
+            np.bincount(burst_idx, weights=partial, minlength=len(trace)))
+
+
+def _common_offsets(group, offset, num_groups, line_bytes):
+    """Most frequent line offset of the unaligned bursts of every group, 0 if all are aligned"""
+    unaligned = offset != 0
+    counts = np.bincount(group[unaligned] * line_bytes + offset[unaligned],
+                         minlength=num_groups * line_bytes)
+    return counts.reshape(num_groups, line_bytes).argmax(axis=1)
+
+
+def fragmentation_total(results):
+    """Counters summed over all groups"""
+    entry = {'id': None, 'region': None, 'common_offset': None}
+    entry.update({name: sum(result[name] for result in results) for name in COUNTERS})
+    _rates(entry)
+    return entry
+
+
+def _rates(entry):
+    """Derived values of a group"""
+    entry['lost_cycles'] = entry['cycles'] - entry['ideal_cycles']
+    entry['descriptors_per_burst'] = round(entry['descriptors'] / entry['bursts'], 4) \
+        if entry['bursts'] else 0.0
+    entry['partial_write_rate'] = round(entry['partial_writes'] / entry['write_descriptors'], 6) \
+        if entry['write_descriptors'] else 0.0
+    entry['bandwidth_loss'] = round(entry['lost_cycles'] / entry['cycles'], 6) \
+        if entry['cycles'] else 0.0
@@ -0,0 +1,186 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Model of `axi_llc_miss_counters` and its stalls of the hit/miss unit
+
+There is one counter of `MissCntWidth` bits for every value of the lower `UseIdBits` bits of the
+AXI ID and one counter of `MissCntMaxWWidth` bits for all writes. A descriptor counts up when it
+enters the miss pipeline and down when it leaves it through the merge unit. A hit is sent through
+the miss pipeline as well while its counter, or for a write the write counter, is not zero, so it
+stays behind the older misses of its ID. Once a counter reaches `2**width` (the overflow bit of
+the common_cells counter), the hit/miss unit stalls every descriptor until it counts down again.
+
+The time a descriptor spends in the miss pipeline follows the evict unit (one W master, waiting
+for the B of a dirty victim) and the refill unit, both keep the order of the descriptors and move
+their lines with the `MemoryTiming` of the pipeline model. Unlike `PipelineModel` the replay
+takes one step per descriptor instead of per cycle and leaves out the FIFOs between the units, so
+only the counters bound the descriptors in the miss pipeline. The counts and stalls are therefore
+upper bounds, which is what sizing the counters needs.
+"""
+from collections import deque
+import numpy as np
+from .tag_array import REGION_BYPASS, REGION_CACHED
+from .pipeline import MemoryTiming
+
+# `axi_llc_pkg` defaults
+MISS_CNT_WIDTH = 5
+MISS_CNT_MAX_W_WIDTH = 7
+USE_ID_BITS = 4
+
+# upper bounds of the stall duration histogram, the last bucket is open
+STALL_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class MissCounters:
+    """The per-ID counters and the write counter, with the number of saturated ones"""
+    def __init__(self, cnt_width=MISS_CNT_WIDTH, max_w_width=MISS_CNT_MAX_W_WIDTH,
+                 use_id_bits=USE_ID_BITS):
+        self.limit = 1 << cnt_width
+        self.w_limit = 1 << max_w_width
+        self.id_mask = (1 << use_id_bits) - 1
+        self.counts = [0] * (1 << use_id_bits)
+        self.writes = 0
+        self.saturated = 0
+        self.peaks = {'max_outstanding': 0, 'max_outstanding_writes': 0}
+
+    def to_miss(self, axi_id, write):
+        """A descriptor has to take the miss pipeline behind outstanding ones"""
+        return self.counts[axi_id & self.id_mask] != 0 or (write and self.writes != 0)
+
+    @property
+    def stall(self):
+        """One of the counters overflows"""
+        return self.saturated != 0
+
+    @property
+    def write_stall(self):
+        """The write counter overflows"""
+        return self.writes >= self.w_limit
+
+    def up(self, axi_id, write):
+        """A descriptor enters the miss pipeline"""
+        idx = axi_id & self.id_mask
+        self.counts[idx] += 1
+        self.saturated += self.counts[idx] == self.limit
+        self.peaks['max_outstanding'] = max(self.peaks['max_outstanding'], self.counts[idx])
+        if write:
+            self.writes += 1
+            self.saturated += self.writes == self.w_limit
+            self.peaks['max_outstanding_writes'] = max(self.peaks['max_outstanding_writes'],
+                                                       self.writes)
+
+    def down(self, axi_id, write):
+        """A descriptor leaves the miss pipeline"""
+        idx = axi_id & self.id_mask
+        self.saturated -= self.counts[idx] == self.limit
+        self.counts[idx] -= 1
+        if write:
+            self.saturated -= self.writes == self.w_limit
+            self.writes -= 1
+
+
+class IdDescriptors:
+    """Arrays of the descriptors looked up by the hit/miss unit, with their AXI IDs"""
+    def __init__(self, arrival, axi_id, write, miss, evict):
+        self.arrival = np.asarray(arrival, dtype=np.int64)
+        self.id = np.asarray(axi_id, dtype=np.int64)
+        self.write = np.asarray(write, dtype=bool)
+        self.miss = np.asarray(miss, dtype=bool)
+        self.evict = np.asarray(evict, dtype=bool)
+
+    def __len__(self):
+        return len(self.arrival)
+
+    @classmethod
+    def from_outcome(cls, outcome, trace):
+        """Descriptors of a `TagArray` replay, bypass descriptors are dropped"""
+        keep = outcome.region != REGION_BYPASS
+        cached = outcome.region == REGION_CACHED
+        return cls(trace.cycle[outcome.burst_idx][keep], trace.id[outcome.burst_idx][keep],
+                   outcome.write[keep], (cached & ~outcome.hit)[keep],
+                   (cached & outcome.writeback)[keep])
+
+
+class MissPipeline:
+    """Descriptors in the evict and refill units, counted by the miss counters until they leave"""
+    def __init__(self, counters, timing):
+        self.counters = counters
+        self.timing = timing
+        # (exit cycle, id, write) of the descriptors in the miss pipeline, exits are in order
+        self.entries = deque()
+        self.evict_exit = 0
+        self.refill_exit = 0
+
+    def leave(self, now):
+        """Count down the descriptors which left the miss pipeline until `now`"""
+        while self.entries and self.entries[0][0] <= now:
+            self.counters.down(*self.entries.popleft()[1:])
+
+    def drain(self, now):
+        """Cycle the counters leave their overflow, waiting from `now` on"""
+        while self.counters.stall:
+            now = self.entries[0][0]
+            self.leave(now)
+        return now
+
+    def enter(self, now, axi_id, write, miss, evict):
+        """A descriptor looked up in `now` enters the miss pipeline, hits pass it in a cycle"""
+        issue = max(now + 1, self.evict_exit)
+        self.evict_exit = self.timing.writeback(issue) if evict else issue
+        self.refill_exit = max(self.timing.refill(self.evict_exit) if miss
+                               else self.evict_exit + 1, self.refill_exit)
+        self.counters.up(axi_id, write)
+        self.entries.append((self.refill_exit, axi_id, write))
+
+
+def _stall_report(stalls, num):
+    """Counters of the stall durations, per cause"""
+    durations = stalls['id'] + stalls['write']
+    histogram = np.bincount(np.searchsorted(STALL_BUCKETS, np.asarray(durations, np.int64)),
+                            minlength=len(STALL_BUCKETS) + 1)
+    labels = [f'<={bound}' for bound in STALL_BUCKETS] + [f'>{STALL_BUCKETS[-1]}']
+    return {
+        'stalls': len(durations),
+        'stall_rate': round(len(durations) / num, 6) if num else 0.0,
+        'stall_cycles': sum(durations),
+        'id_stall_cycles': sum(stalls['id']),
+        'write_stall_cycles': sum(stalls['write']),
+        'mean_stall': round(sum(durations) / len(durations), 2) if durations else 0.0,
+        'max_stall': max(durations) if durations else 0,
+        'stall_histogram': dict(zip(labels, histogram.tolist()))
+    }
+
+
+def replay_miss_counters(descs, counters=None, timing=None):
+    """Look the descriptors up in order, one per cycle, and count the counter stalls"""
+    counters = MissCounters() if counters is None else counters
+    pipeline = MissPipeline(counters, MemoryTiming() if timing is None else timing)
+    # stall durations by the overflowing counter
+    stalls = {'id': [], 'write': []}
+    counts = {'miss_pipeline': 0, 'forced_hits': 0}
+    lookup = None
+
+    for now, axi_id, write, miss, evict in zip(descs.arrival.tolist(), descs.id.tolist(),
+                                               descs.write.tolist(), descs.miss.tolist(),
+                                               descs.evict.tolist()):
+        now = now if lookup is None else max(now, lookup + 1)
+        pipeline.leave(now)
+        if counters.stall:
+            cause = 'write' if counters.write_stall else 'id'
+            start, now = now, pipeline.drain(now)
+            stalls[cause].append(now - start)
+        lookup = now
+        if miss or counters.to_miss(axi_id, write):
+            counts['miss_pipeline'] += 1
+            counts['forced_hits'] += not miss
+            pipeline.enter(now, axi_id, write, miss, evict)
+
+    num = len(descs)
+    return {
+        'descriptors': num,
+        'lookup_cycles': int(lookup - descs.arrival[0] + 1) if num else 0,
+        **counts,
+        **_stall_report(stalls, num),
+        **counters.peaks
+    }
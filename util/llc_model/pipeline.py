@@ -0,0 +1,365 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Cycle-approximate model of the descriptor flow of `axi_llc_top` for sizing its FIFOs
+
+The descriptors leave `axi_llc_hit_miss` in order after the tag lookup (`TagMacroLatency` plus
+the spill register of the tag store). Hits go straight to `axi_llc_merge_unit`, misses pass the
+evict unit (AW master, `EvictFifoDepth`, W master writing back a dirty victim and waiting for its
+B), the `MissBufferDepth` FIFO and the refill unit (AR master, `RefillFifoDepth`, R master
+waiting for the line). The AW/AR masters issue the memory request when they push the descriptor
+into their FIFO, so the FIFO depths bound the outstanding writebacks and refills. The merge unit
+hands one descriptor at a time to the read unit and to the write unit, which takes its W beats
+from the `WChanBufferDepth` buffer. Writes stay in order, as their W beats are.
+
+Memory answers a request after `mem_latency` cycles with one beat per cycle on R and on W. The
+slave port always accepts R and B. Not modelled are the ID ordering of the miss counters, the
+lock box, bypass traffic and the arbitration of the data ways between the units.
+"""
+from collections import deque, namedtuple
+import numpy as np
+from .tag_array import REGION_BYPASS, REGION_CACHED
+
+# FIFO parameters of `axi_llc_pkg`, with their defaults
+DEPTHS = {
+    'WChanBufferDepth': 6,
+    'EvictFifoDepth': 4,
+    'MissBufferDepth': 2,
+    'RefillFifoDepth': 4
+}
+LATENCIES = {
+    'TagMacroLatency': 1,
+    'DataMacroLatency': 1
+}
+# FIFOs of the model and the parameter of their depth
+FIFOS = (('w_chan_buffer', 'WChanBufferDepth'), ('evict_fifo', 'EvictFifoDepth'),
+         ('miss_buffer', 'MissBufferDepth'), ('refill_fifo', 'RefillFifoDepth'))
+
+
+class Fifo:
+    """Bounded FIFO counting its occupancy and the cycles its producer is held back"""
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.items = deque()
+        self.blocked = 0
+        self.full_cycles = 0
+        self.occupancy = 0
+        self.max_used = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def space(self):
+        """The FIFO takes a push in this cycle, otherwise count a backpressure cycle"""
+        if len(self.items) < self.depth:
+            return True
+        self.blocked += 1
+        return False
+
+    def push(self, item):
+        """Push an item if there is space, otherwise count a backpressure cycle"""
+        if self.space():
+            self.items.append(item)
+            return True
+        return False
+
+    def sample(self):
+        """Accumulate the occupancy at the end of a cycle"""
+        used = len(self.items)
+        self.occupancy += used
+        self.max_used = max(self.max_used, used)
+        if used == self.depth:
+            self.full_cycles += 1
+
+    def report(self, cycles):
+        """Counters of the FIFO, ready for JSON"""
+        return {'depth': self.depth, 'max_used': self.max_used,
+                'mean_used': round(self.occupancy / cycles, 4) if cycles else 0.0,
+                'full_cycles': self.full_cycles, 'backpressure_cycles': self.blocked}
+
+
+class MemoryTiming:
+    """Memory R and W channels moving a line with one beat per cycle, shared by the refills and
+    the writebacks of dirty victims"""
+    def __init__(self, num_blocks=8, mem_latency=20, data_latency=1):
+        self.num_blocks = num_blocks
+        self.mem_latency = mem_latency
+        self.data_latency = data_latency
+        self.r_free = 0
+        self.w_free = 0
+
+    def refill(self, cycle):
+        """Cycle the line requested on AR in `cycle` is written into the data ways"""
+        r_start = max(cycle + self.mem_latency, self.r_free)
+        self.r_free = r_start + self.num_blocks
+        return self.r_free + self.data_latency
+
+    def writeback(self, cycle):
+        """Cycle the B arrives of a victim read out of the data ways from `cycle` on"""
+        w_start = max(cycle + self.data_latency, self.w_free)
+        self.w_free = w_start + self.num_blocks
+        return self.w_free + self.mem_latency
+
+
+# Random descriptor load of `Descriptors.synthetic`: arrivals per cycle, fraction of hits, of
+# misses evicting a dirty line and of writes, and the beats of every descriptor
+SyntheticLoad = namedtuple('SyntheticLoad', ('rate', 'hit_rate', 'dirty_rate', 'write_fraction',
+                                             'beats'), defaults=(0.1, 0.7, 0.3, 0.4, 8))
+
+
+class Descriptors:
+    """Arrays of the descriptors entering the hit/miss unit, in their order"""
+    def __init__(self, arrival, write, beats, miss, evict):
+        self.arrival = np.asarray(arrival, dtype=np.int64)
+        self.write = np.asarray(write, dtype=bool)
+        self.beats = np.asarray(beats, dtype=np.int64)
+        self.miss = np.asarray(miss, dtype=bool)
+        self.evict = np.asarray(evict, dtype=bool)
+
+    def __len__(self):
+        return len(self.arrival)
+
+    @classmethod
+    def from_outcome(cls, outcome, trace, desc_len):
+        """Descriptors of a `TagArray` replay, bypass descriptors are dropped"""
+        keep = outcome.region != REGION_BYPASS
+        cached = outcome.region == REGION_CACHED
+        return cls(trace.cycle[outcome.burst_idx][keep], outcome.write[keep],
+                   desc_len[keep].astype(np.int64) + 1, (cached & ~outcome.hit)[keep],
+                   (cached & outcome.writeback)[keep])
+
+    @classmethod
+    def synthetic(cls, num, load, rng):
+        """Random `SyntheticLoad` of `num` descriptors"""
+        gaps = rng.geometric(min(max(load.rate, 1e-9), 1.0), num) if num else \
+            np.zeros(0, np.int64)
+        arrival = np.cumsum(gaps) - gaps[0] if num else gaps
+        miss = rng.random(num) >= load.hit_rate
+        return cls(arrival, rng.random(num) < load.write_fraction, np.full(num, load.beats),
+                   miss, miss & (rng.random(num) < load.dirty_rate))
+
+
+class _PipelineState:
+    """Descriptors held by the units of one `PipelineModel.run`, every unit has its step"""
+    def __init__(self, model, descs):
+        self.timing = MemoryTiming(model.num_blocks, model.mem_latency,
+                                   model.latencies['DataMacroLatency'])
+        self.desc = {name: getattr(descs, name).tolist()
+                     for name in ('arrival', 'write', 'beats', 'miss', 'evict')}
+        # order of the writes, their W beats arrive in this order
+        self.desc['write_seq'] = (np.cumsum(descs.write) - 1).tolist()
+        self.desc['w_beats'] = [(idx, beats) for idx, (write, beats) in
+                                enumerate(zip(self.desc['write'], self.desc['beats'])) if write]
+        self.fifos = {name: Fifo(name, model.depths[param]) for name, param in FIFOS}
+        # ready cycles of the descriptors in the tag lookup
+        self.lookup = deque(maxlen=model.latencies['TagMacroLatency'] + 1)
+        # descriptor of every register, None while empty; the masters and the read unit hold it
+        # with the cycle they are done, the write unit with the beats left
+        self.units = {'hit': None, 'aw': None, 'ar': None, 'refill_out': None,
+                      'w_master': (None, 0), 'r_master': (None, 0), 'read': (None, 0),
+                      'write': (None, 0)}
+        w_beats = self.desc['w_beats']
+        self.progress = {'next_desc': 0, 'next_write': 0, 'w_src': 0,
+                         'w_src_left': w_beats[0][1] if w_beats else 0}
+        self.stats = {'completed': 0, 'beats': 0, 'latency_sum': 0,
+                      'stalls': dict.fromkeys(('lookup_output', 'slave_ax', 'slave_w',
+                                               'write_unit_data'), 0)}
+
+    def idle_until(self, cycle):
+        """Cycle the next descriptor or W beat arrives if every FIFO and unit is idle until then,
+        otherwise `cycle`"""
+        units = self.units
+        if self.lookup or any(self.fifos.values()) or \
+                any(units[name] is not None for name in ('hit', 'aw', 'ar', 'refill_out')) or \
+                any(units[name][0] is not None for name in ('w_master', 'r_master', 'read',
+                                                            'write')):
+            return cycle
+        arrivals = []
+        if self.progress['next_desc'] < len(self.desc['arrival']):
+            arrivals.append(self.desc['arrival'][self.progress['next_desc']])
+        if self.progress['w_src'] < len(self.desc['w_beats']):
+            arrivals.append(self.desc['arrival'][self.desc['w_beats'][self.progress['w_src']][0]])
+        return max(cycle, min(arrivals, default=cycle))
+
+    def step(self, cycle):
+        """Advance every unit by one cycle, the consumers before their producers"""
+        self.write_unit(cycle)
+        self.read_unit(cycle)
+        self.merge(cycle)
+        self.refill(cycle)
+        self.evict(cycle)
+        self.hit_miss(cycle)
+        self.slave_w(cycle)
+        for fifo in self.fifos.values():
+            fifo.sample()
+
+    def _complete(self, desc, cycle):
+        self.stats['completed'] += 1
+        self.stats['beats'] += self.desc['beats'][desc]
+        self.stats['latency_sum'] += cycle - self.desc['arrival'][desc]
+
+    def write_unit(self, cycle):
+        """Write unit, one W beat per cycle out of the buffer"""
+        desc, left = self.units['write']
+        if desc is None:
+            return
+        w_buffer = self.fifos['w_chan_buffer'].items
+        if w_buffer and w_buffer[0][1] < cycle:
+            w_buffer.popleft()
+            if left == 1:
+                self._complete(desc, cycle)
+                self.units['write'] = (None, 0)
+            else:
+                self.units['write'] = (desc, left - 1)
+        else:
+            self.stats['stalls']['write_unit_data'] += 1
+
+    def read_unit(self, cycle):
+        """Read unit, the beats leave after the data way latency"""
+        desc, until = self.units['read']
+        if desc is not None and cycle >= until:
+            self._complete(desc, cycle)
+            self.units['read'] = (None, 0)
+
+    def merge(self, cycle):
+        """Merge unit, hands the refilled descriptor before the hit to the read or write unit"""
+        units = self.units
+        for source in ('refill_out', 'hit'):
+            desc = units[source]
+            if desc is None:
+                continue
+            beats = self.desc['beats'][desc]
+            if self.desc['write'][desc]:
+                if units['write'][0] is not None or \
+                        self.desc['write_seq'][desc] != self.progress['next_write']:
+                    continue
+                units['write'] = (desc, beats)
+                self.progress['next_write'] += 1
+            else:
+                if units['read'][0] is not None:
+                    continue
+                units['read'] = (desc, cycle + beats + self.timing.data_latency)
+            units[source] = None
+
+    def refill(self, cycle):
+        """Refill unit, the AR master issues the refill with the push into the refill FIFO and
+        the R master waits for the line"""
+        units = self.units
+        refill_fifo = self.fifos['refill_fifo']
+        desc, until = units['r_master']
+        if desc is not None and cycle >= until and units['refill_out'] is None:
+            units['refill_out'], units['r_master'] = desc, (None, 0)
+        if units['r_master'][0] is None and refill_fifo.items:
+            units['r_master'] = refill_fifo.items.popleft()
+        if units['ar'] is not None and refill_fifo.space():
+            refill_fifo.items.append((units['ar'], self.timing.refill(cycle)))
+            units['ar'] = None
+        miss_buffer = self.fifos['miss_buffer']
+        if units['ar'] is None and miss_buffer.items:
+            units['ar'] = miss_buffer.items.popleft()
+
+    def evict(self, cycle):
+        """Evict unit, the W master writes the victim back and waits for its B, the AW master
+        pushes the descriptor into the evict FIFO"""
+        units = self.units
+        evict_fifo = self.fifos['evict_fifo']
+        desc, until = units['w_master']
+        if desc is not None and cycle >= until and self.fifos['miss_buffer'].push(desc):
+            units['w_master'] = (None, 0)
+        if units['w_master'][0] is None and evict_fifo.items:
+            desc = evict_fifo.items.popleft()
+            units['w_master'] = (desc, self.timing.writeback(cycle) if self.desc['evict'][desc]
+                                 else cycle + 1)
+        if units['aw'] is not None and evict_fifo.push(units['aw']):
+            units['aw'] = None
+
+    def hit_miss(self, cycle):
+        """Hit/miss unit, the oldest looked up descriptor leaves in order"""
+        lookup = self.lookup
+        stalls = self.stats['stalls']
+        next_desc = self.progress['next_desc']
+        if lookup and lookup[0] <= cycle:
+            desc = next_desc - len(lookup)
+            target = 'aw' if self.desc['miss'][desc] else 'hit'
+            if self.units[target] is None:
+                self.units[target] = desc
+                lookup.popleft()
+            else:
+                stalls['lookup_output'] += 1
+        if next_desc < len(self.desc['arrival']) and self.desc['arrival'][next_desc] <= cycle:
+            if len(lookup) < lookup.maxlen:
+                lookup.append(cycle + lookup.maxlen)
+                self.progress['next_desc'] += 1
+            else:
+                stalls['slave_ax'] += 1
+
+    def slave_w(self, cycle):
+        """W beats of the slave port, in the order of the writes"""
+        w_beats = self.desc['w_beats']
+        progress = self.progress
+        w_src = progress['w_src']
+        if w_src < len(w_beats) and self.desc['arrival'][w_beats[w_src][0]] <= cycle:
+            if self.fifos['w_chan_buffer'].push((w_beats[w_src][0], cycle)):
+                progress['w_src_left'] -= 1
+                if progress['w_src_left'] == 0:
+                    progress['w_src'] = w_src = w_src + 1
+                    progress['w_src_left'] = w_beats[w_src][1] if w_src < len(w_beats) else 0
+            else:
+                self.stats['stalls']['slave_w'] += 1
+
+
+class PipelineModel:
+    """Steps the descriptors through the units cycle by cycle
+
+    Idle stretches without any descriptor in the units or FIFOs are skipped, they add nothing to
+    the FIFO statistics.
+    """
+    def __init__(self, num_blocks=8, beat_bytes=16, mem_latency=20, depths=None,
+                 latencies=None):
+        self.num_blocks = num_blocks
+        self.beat_bytes = beat_bytes
+        self.mem_latency = mem_latency
+        self.depths = {**DEPTHS, **(depths or {})}
+        self.latencies = {**LATENCIES, **(latencies or {})}
+        for name, value in self.depths.items():
+            if value < 1:
+                raise ValueError(f'{name} has to be at least 1')
+
+    @classmethod
+    def from_config(cls, cfg, mem_latency, depths=None, latencies=None):
+        """Model of the lines and beats of an `LlcConfig`"""
+        return cls(cfg.num_blocks, cfg.block_size // 8, mem_latency, depths, latencies)
+
+    def run(self, descs, max_cycles=None):
+        """Simulate until every descriptor is done, returns the report"""
+        num = len(descs)
+        state = _PipelineState(self, descs)
+        stats = state.stats
+        cycle = start = int(descs.arrival[0]) if num else 0
+        while stats['completed'] < num:
+            cycle = state.idle_until(cycle)
+            if max_cycles is not None and cycle - start >= max_cycles:
+                # an idle stretch ends at the limit
+                cycle = min(cycle, start + max_cycles)
+                break
+            state.step(cycle)
+            cycle += 1
+
+        cycles = cycle - start
+        done_bytes = stats['beats'] * self.beat_bytes
+        offered = int(descs.beats.sum()) * self.beat_bytes
+        return {
+            'descriptors': num,
+            'completed': stats['completed'],
+            'cycles': cycles,
+            'bytes': done_bytes,
+            'throughput': round(done_bytes / cycles, 4) if cycles else 0.0,
+            'offered_load': round(offered / max(int(descs.arrival[-1]) - start + 1, 1), 4)
+            if num else 0.0,
+            'mean_latency': round(stats['latency_sum'] / stats['completed'], 2)
+            if stats['completed'] else 0.0,
+            'stall_cycles': stats['stalls'],
+            'fifos': {name: fifo.report(cycles) for name, fifo in state.fifos.items()}
+        }
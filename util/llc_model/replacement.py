@@ -0,0 +1,235 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Replacement policies of the tag array model, operating on a batch of distinct sets"""
+import abc
+import numpy as np
+
+
+class ReplacementPolicy(abc.ABC):
+    """Interface of a replacement policy
+
+    Every call gets the set indices of a batch of accesses, no set occurs twice in a batch. The
+    boolean arrays `occupied` (valid or SPM) and `eligible` (not SPM) have one row per access and
+    one column per way. Policies with state shared between the sets are `sequential`, the tag
+    array then hands them one access at a time in trace order. A policy is created with the
+    dimensions of its tag array and starts with its reset state.
+    """
+    name = None
+    sequential = False
+
+    def __init__(self, num_sets, num_ways):
+        self.num_sets = num_sets
+        self.num_ways = num_ways
+
+    @abc.abstractmethod
+    def victim(self, sets, occupied, eligible, cycles):
+        """Way replaced by a miss of each access"""
+
+    def update(self, sets, ways, hit, cycles):
+        """Record the way accessed by each access, after a hit or the refill of a miss"""
+
+
+def first_in_order(candidates, order):
+    """The first way in `order` (one row per access) for which `candidates` is set"""
+    rows = np.arange(len(order))[:, None]
+    picked = candidates[rows, order]
+    return order[rows[:, 0], np.argmax(picked, axis=1)]
+
+
+def free_ways(occupied, eligible):
+    """Lowest free way of every access and whether there is one"""
+    free = eligible & ~occupied
+    return np.argmax(free, axis=1), free.any(axis=1)
+
+
+class EvictBoxPolicy(ReplacementPolicy):
+    """Victim selection of `axi_llc_evict_box`
+
+    The one-hot counter of the evict box resets to way 0 and moves to the next lower way (way 0
+    wraps to the highest one) in every cycle the box is not handing out a victim. On a miss it
+    waits until the counter points onto a free way, or, if every way of the set is occupied, onto
+    a way not used as SPM. The counter position is derived from the cycle of the access; the single
+    cycle the counter holds for every victim handed out is neglected, see `ExactEvictBoxPolicy`.
+    """
+    name = 'evict_box'
+
+    def victim(self, sets, occupied, eligible, cycles):
+        pointer = (-np.asarray(cycles, dtype=np.int64)) % self.num_ways
+        order = (pointer[:, None] - np.arange(self.num_ways)[None, :]) % self.num_ways
+        full = occupied.all(axis=1)
+        candidates = np.where(full[:, None], eligible, ~occupied)
+        return first_in_order(candidates, order)
+
+
+class EvictBoxCounter:
+    """Bit-accurate model of the register `onehot_ind_q` of `axi_llc_evict_box`
+
+    The counter state is known up to `time`, the first cycle not yet simulated.
+    """
+    def __init__(self, num_ways):
+        self.num_ways = num_ways
+        self.onehot = 1
+        self.time = 0
+
+    def rotate(self, cycles):
+        """Advance the counter by enabled cycles, bit i moves to bit i-1 and bit 0 to the top"""
+        if self.num_ways == 1:
+            return
+        cycles %= self.num_ways
+        mask = (1 << self.num_ways) - 1
+        self.onehot = ((self.onehot >> cycles) | (self.onehot << (self.num_ways - cycles))) & mask
+
+    def request(self, cycle, tag_valid, tag_dirty, spm_lock):
+        """Raise `req_i` at the cycle (or once the previous request is done) until `valid_o`
+
+        The arguments are way bit masks. Returns the one-hot `way_ind_o`, `evict_o` and the cycle
+        in which the victim was handed out.
+        """
+        all_ways = (1 << self.num_ways) - 1
+        occupied = tag_valid | spm_lock
+        if occupied == all_ways and spm_lock == all_ways:
+            raise ValueError('the evict box never answers when all ways are SPM')
+        if cycle > self.time:
+            self.rotate(cycle - self.time)
+            self.time = cycle
+        while True:
+            if occupied == all_ways:
+                valid = not spm_lock & self.onehot
+            else:
+                valid = not occupied & self.onehot
+            if valid:
+                # `en_cnt` is low in the cycle the victim is handed out
+                way_ind = self.onehot
+                self.time += 1
+                return way_ind, bool(tag_dirty & way_ind), self.time - 1
+            self.rotate(1)
+            self.time += 1
+
+
+class ExactEvictBoxPolicy(ReplacementPolicy):
+    """`axi_llc_evict_box` with the bit-accurate counter, which is shared between the sets
+
+    The trace cycle is the cycle the miss raises `req_i`. A miss arriving before the evict box
+    handed out the previous victim raises it once the box is free again.
+    """
+    name = 'evict_box_exact'
+    sequential = True
+
+    def __init__(self, num_sets, num_ways):
+        super().__init__(num_sets, num_ways)
+        self.counter = EvictBoxCounter(num_ways)
+        self.bits = 1 << np.arange(num_ways, dtype=np.int64)
+
+    def victim(self, sets, occupied, eligible, cycles):
+        ways = np.zeros(len(sets), dtype=np.int64)
+        for idx in range(len(sets)):
+            spm_lock = int(self.bits[~eligible[idx]].sum())
+            tag_valid = int(self.bits[occupied[idx]].sum()) & ~spm_lock
+            way_ind, _, _ = self.counter.request(int(cycles[idx]), tag_valid, 0, spm_lock)
+            ways[idx] = way_ind.bit_length() - 1
+        return ways
+
+
+class LruPolicy(ReplacementPolicy):
+    """Least recently used way, free ways are filled first"""
+    name = 'lru'
+
+    def __init__(self, num_sets, num_ways):
+        super().__init__(num_sets, num_ways)
+        self.stamps = np.zeros((num_sets, num_ways), dtype=np.int64)
+        self.now = 0
+
+    def victim(self, sets, occupied, eligible, cycles):
+        free, has_free = free_ways(occupied, eligible)
+        stamps = np.where(eligible, self.stamps[sets], np.iinfo(np.int64).max)
+        return np.where(has_free, free, np.argmin(stamps, axis=1))
+
+    def update(self, sets, ways, hit, cycles):
+        self.now += 1
+        self.stamps[sets, ways] = self.now
+
+
+class FifoPolicy(LruPolicy):
+    """The way filled first is replaced first, hits do not change the order"""
+    name = 'fifo'
+
+    def update(self, sets, ways, hit, cycles):
+        self.now += 1
+        self.stamps[sets[~hit], ways[~hit]] = self.now
+
+
+class TreePlruPolicy(ReplacementPolicy):
+    """Tree pseudo-LRU over the ways padded to a power of two
+
+    Every node bit points to the half holding the next victim. Halves without a way eligible for
+    replacement (padding or SPM) are never entered.
+    """
+    name = 'plru'
+
+    def __init__(self, num_sets, num_ways):
+        super().__init__(num_sets, num_ways)
+        self.levels = max(1, (num_ways - 1).bit_length())
+        self.leaves = 1 << self.levels
+        # heap layout, node n has the children 2n+1 and 2n+2
+        self.tree = np.zeros((num_sets, self.leaves - 1), dtype=bool)
+
+    def victim(self, sets, occupied, eligible, cycles):
+        free, has_free = free_ways(occupied, eligible)
+        rows = np.arange(len(sets))
+        padded = np.zeros((len(sets), self.leaves), dtype=bool)
+        padded[:, :self.num_ways] = eligible
+        node = np.zeros(len(sets), dtype=np.int64)
+        leaf = np.zeros(len(sets), dtype=np.int64)
+        for level in range(self.levels):
+            halves = padded.reshape((len(sets), 2 << level, -1)).any(axis=2)
+            # never descend into a half without an eligible way
+            go_right = np.where(self.tree[sets, node], halves[rows, 2 * leaf + 1],
+                                ~halves[rows, 2 * leaf])
+            leaf = 2 * leaf + go_right
+            node = 2 * node + 1 + go_right
+        return np.where(has_free, free, leaf)
+
+    def update(self, sets, ways, hit, cycles):
+        node = np.zeros(len(sets), dtype=np.int64)
+        for level in range(self.levels):
+            right = (ways >> (self.levels - 1 - level)) & 1
+            # point away from the accessed way
+            self.tree[sets, node] = right == 0
+            node = 2 * node + 1 + right
+
+
+class RripPolicy(ReplacementPolicy):
+    """Static re-reference interval prediction with 2-bit values, hits predict a near reuse"""
+    name = 'rrip'
+    max_rrpv = 3
+
+    def __init__(self, num_sets, num_ways):
+        super().__init__(num_sets, num_ways)
+        self.rrpv = np.full((num_sets, num_ways), self.max_rrpv, dtype=np.int8)
+
+    def victim(self, sets, occupied, eligible, cycles):
+        free, has_free = free_ways(occupied, eligible)
+        rrpv = self.rrpv[sets]
+        # age all eligible ways until one reaches the maximum value
+        oldest = np.where(eligible, rrpv, -1).max(axis=1)
+        rrpv = np.where(eligible, rrpv + (self.max_rrpv - oldest)[:, None], rrpv)
+        self.rrpv[sets] = np.where(has_free[:, None], self.rrpv[sets], rrpv)
+        victim = np.argmax(eligible & (rrpv == self.max_rrpv), axis=1)
+        return np.where(has_free, free, victim)
+
+    def update(self, sets, ways, hit, cycles):
+        self.rrpv[sets, ways] = np.where(hit, 0, self.max_rrpv - 1)
+
+
+POLICIES = {policy.name: policy for policy in (EvictBoxPolicy, ExactEvictBoxPolicy, LruPolicy,
+                                               TreePlruPolicy, FifoPolicy, RripPolicy)}
+
+
+def make_policy(name, num_sets, num_ways):
+    """Create a replacement policy by its name for a tag array of the given dimensions"""
+    try:
+        return POLICIES[name](num_sets, num_ways)
+    except KeyError:
+        raise ValueError(f'unknown replacement policy `{name}`') from None
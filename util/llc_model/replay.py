@@ -0,0 +1,152 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Replay files driving `tb_axi_llc` with recorded or synthetic traffic (`+axi_replay=<file>`)
+
+A replay file is a 16 byte header followed by one 16 byte record per AW or AR, all big-endian so
+the testbench reads them in bulk with `$fread` into 128-bit words. The header holds `MAGIC`, the
+format version, the number of writes and the number of reads as 32-bit words. A record holds, from
+the most significant bit:
+
+    [127:96] GAP    cycles after the issue of the previous record
+    [ 95:80] ID
+    [ 79:72] LEN
+    [ 71:69] SIZE
+    [ 68:67] BURST
+    [    66] WRITE
+    [ 63: 0] ADDR
+
+The patterns are generated vectorized from their `PatternParams`, every one returns a `Trace` with
+one INCR burst per access and the IDs chosen round robin. Bursts are placed at a power of two
+pitch, so they never cross a 4 KiB boundary.
+"""
+import struct
+from collections import namedtuple
+import numpy as np
+from .trace import Trace, BURST_INCR
+
+MAGIC = b'AXLR'
+VERSION = 1
+
+HEADER = struct.Struct('>4sIII')
+RECORD_DTYPE = np.dtype([
+    ('gap', '>u4'),
+    ('id', '>u2'),
+    ('len', 'u1'),
+    ('ctrl', 'u1'),
+    ('addr', '>u8')
+])
+
+# Bursts of a pattern: their number, the address range they span, the AXI length and size of
+# every burst, the fraction of writes and the number of IDs used
+PatternParams = namedtuple('PatternParams', ('num', 'base', 'footprint', 'length', 'size',
+                                             'write_fraction', 'num_ids'),
+                           defaults=(0, 4, 0.0, 1))
+
+
+def check_replay(trace, addr_width=32, id_width=6, data_width=128):
+    """Raise a ValueError if the bursts do not fit the slave port of `tb_axi_llc`"""
+    beats = trace.len.astype(np.int64) + 1
+    start = trace.addr.astype(np.int64)
+    end = start + ((beats << trace.size.astype(np.int64)) - 1)
+    checks = (
+        (trace.len > 255, 'have more than 256 beats'),
+        ((1 << trace.size.astype(np.int64)) > data_width // 8, 'are wider than the data width'),
+        (trace.id >= 1 << id_width, f'have an ID wider than {id_width} bit'),
+        (end >= 1 << addr_width, f'exceed the {addr_width} bit address space'),
+        ((trace.burst == BURST_INCR) & (start >> 12 != end >> 12), 'cross a 4 KiB boundary')
+    )
+    for failed, reason in checks:
+        count = int(np.count_nonzero(failed))
+        if count:
+            raise ValueError(f'{count} bursts {reason}, the first is number '
+                             f'{int(np.argmax(failed))}')
+
+
+def write_replay(path, trace, gap=None):
+    """Write a trace as replay file, by default the gaps follow the cycles of the trace"""
+    num = len(trace)
+    records = np.zeros(num, dtype=RECORD_DTYPE)
+    if gap is None:
+        gap = np.diff(trace.cycle, prepend=trace.cycle[:1])
+    records['gap'] = np.clip(np.broadcast_to(gap, num), 0, 0xffff_ffff)
+    records['id'] = trace.id
+    records['len'] = trace.len
+    records['ctrl'] = (trace.size.astype(np.uint8) << 5) | ((trace.burst & 3) << 3) | \
+        (trace.write.astype(np.uint8) << 2)
+    records['addr'] = trace.addr
+    writes = int(np.count_nonzero(trace.write))
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, writes, num - writes))
+        records.tofile(f)
+    return HEADER.size + records.nbytes
+
+
+def read_replay(path):
+    """Read a replay file back into a `Trace`, the cycles are the summed gaps"""
+    with open(path, 'rb') as f:
+        magic, version, writes, reads = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path}: not a replay file of version {VERSION}')
+        records = np.fromfile(f, dtype=RECORD_DTYPE)
+    if len(records) != writes + reads:
+        raise ValueError(f'{path}: expected {writes + reads} records, found {len(records)}')
+    ctrl = records['ctrl']
+    return Trace(records['addr'], ctrl >> 2 & 1 == 1, len=records['len'], size=ctrl >> 5,
+                 burst=ctrl >> 3 & 3, cycle=np.cumsum(records['gap'], dtype=np.int64),
+                 id=records['id'])
+
+
+def _pitch(length, size):
+    """Power of two at least as large as the bytes of a burst"""
+    return 1 << (((length + 1) << size) - 1).bit_length()
+
+
+def _bursts(addr, params, rng):
+    num = params.num
+    return Trace(addr, rng.random(num) < params.write_fraction, len=np.full(num, params.length),
+                 size=np.full(num, params.size), burst=np.full(num, BURST_INCR),
+                 cycle=np.arange(num), id=np.arange(num) % params.num_ids)
+
+
+def streaming(params, rng=None):
+    """Every ID walks sequentially through its own slice of the footprint, wrapping around"""
+    rng = np.random.default_rng() if rng is None else rng
+    burst_bytes = _pitch(params.length, params.size)
+    slots = max(params.footprint // burst_bytes // params.num_ids, 1)
+    idx = np.arange(params.num, dtype=np.int64)
+    slot = (idx % params.num_ids) * slots + (idx // params.num_ids) % slots
+    return _bursts(params.base + slot * burst_bytes, params, rng)
+
+
+def strided(params, stride, rng=None):
+    """Accesses `stride` bytes apart, wrapping around in the footprint"""
+    rng = np.random.default_rng() if rng is None else rng
+    offset = (np.arange(params.num, dtype=np.int64) * stride) % max(params.footprint, 1)
+    offset &= ~np.int64(_pitch(params.length, params.size) - 1)
+    return _bursts(params.base + offset, params, rng)
+
+
+def pointer_chase(params, node_bytes=64, rng=None):
+    """Single-beat accesses following a random cyclic list of nodes, one ID keeps them in order;
+    the length and the IDs of `params` are ignored"""
+    rng = np.random.default_rng() if rng is None else rng
+    nodes = max(params.footprint // node_bytes, 1)
+    order = rng.permutation(nodes).astype(np.int64)
+    addr = params.base + order[np.arange(params.num, dtype=np.int64) % nodes] * node_bytes
+    return _bursts(addr, params._replace(length=0, num_ids=1), rng)
+
+
+def hot_set(params, hot_bytes, hot_fraction=0.9, rng=None):
+    """Random accesses, `hot_fraction` of them into the first `hot_bytes` of the footprint"""
+    rng = np.random.default_rng() if rng is None else rng
+    burst_bytes = _pitch(params.length, params.size)
+    hot = rng.random(params.num) < hot_fraction
+    slots = np.where(hot, max(hot_bytes // burst_bytes, 1),
+                     max(params.footprint // burst_bytes, 1))
+    addr = params.base + (rng.random(params.num) * slots).astype(np.int64) * burst_bytes
+    return _bursts(addr, params, rng)
+
+
+PATTERNS = ('streaming', 'strided', 'pointer_chase', 'hot_set')
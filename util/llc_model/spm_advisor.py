@@ -0,0 +1,222 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Evaluate every SPM/cache split of the ways in a single pass over a trace
+
+Software can move address ranges (buffers, stacks, lookup tables) into the SPM region. The ranges
+are placed in order of their accesses per byte, each as long as all ranges before it fit, so the
+ranges moved with `s` SPM ways are a prefix of the ones moved with `s + 1` ways. Every range gets
+the smallest way count which holds it as its class, ranges which never fit get the class
+`SetAssociativity + 1`.
+
+The cache keeps `SetAssociativity - s` ways of every set. The hits are counted with LRU stack
+distances (Mattson et al.) per set: the stack entries carry the class of their line, so one walk
+gives the distance of an access for every `s`, counting only the lines with a class above `s`.
+LRU approximates the pseudo-random replacement of `axi_llc_evict_box`. The dirty state of every
+line is kept as a bit mask over `s`; a dirty line is written back once it is evicted. The trace
+ends with a flush (`CFG_FLUSH`), which writes back the lines still dirty in the cache.
+"""
+import numpy as np
+from .trace import cut_bursts
+
+
+def load_ranges(path):
+    """Read the address ranges which may be moved to the SPM, lines `START END [NAME]`
+
+    END is exclusive, `#` starts a comment.
+    """
+    ranges = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) not in (2, 3):
+                raise ValueError(f'{path}:{line_no}: expected `START END [NAME]`')
+            start, end = int(fields[0], 0), int(fields[1], 0)
+            if end <= start:
+                raise ValueError(f'{path}:{line_no}: empty range')
+            ranges.append((start, end, fields[2] if len(fields) > 2 else f'range{len(ranges)}'))
+    ranges.sort()
+    for (_, end, name), (start, _, other) in zip(ranges[:-1], ranges[1:]):
+        if start < end:
+            raise ValueError(f'{path}: ranges `{name}` and `{other}` overlap')
+    return ranges
+
+
+def place_ranges(ranges, access_bytes, cfg):
+    """Class (smallest SPM way count holding it) and SPM address of every range"""
+    num = len(ranges)
+    sizes = np.array([end - start for start, end, _ in ranges], dtype=np.int64)
+    density = np.asarray(access_bytes, dtype=np.float64) / np.maximum(sizes, 1)
+    order = np.argsort(-density, kind='stable')
+    classes = np.full(num, cfg.set_associativity + 1, dtype=np.int64)
+    spm_addr = np.zeros(num, dtype=np.int64)
+    used = 0
+    for idx in order:
+        if used + sizes[idx] > cfg.spm_length:
+            break
+        spm_addr[idx] = cfg.spm_start + used
+        used += sizes[idx]
+        classes[idx] = max(1, -(-used // cfg.way_bytes))
+    return classes, spm_addr, order
+
+
+def advise(trace, ranges, cfg):
+    """Counters of every SPM way count `s` from 0 to SetAssociativity, in one pass"""
+    burst_idx, desc_addr, desc_len = cut_bursts(trace, cfg.line_bytes)
+    num_bytes = (desc_len.astype(np.int64) + 1) << trace.size[burst_idx].astype(np.int64)
+    addr = desc_addr.astype(np.int64)
+    cls, placement = _place(addr, num_bytes, ranges, cfg)
+    cached = (addr >= cfg.cached_start) & (addr < cfg.cached_end)
+    in_spm = (addr >= cfg.spm_start) & (addr < cfg.spm_start + cfg.spm_length)
+    counters = {**_region_traffic(cls, num_bytes, in_spm, cached, cfg.set_associativity),
+                **_stack_pass(addr, trace.write[burst_idx], cls, cached & ~in_spm, cfg)}
+    return {'total_bytes': int(num_bytes.sum()), 'results': _results(counters, placement, cfg),
+            'placement': placement}
+
+
+def _place(addr, num_bytes, ranges, cfg):
+    """Class of every access and the placement of the ranges moved for some `s`"""
+    starts = np.array([start for start, _, _ in ranges], dtype=np.int64)
+    ends = np.array([end for _, end, _ in ranges], dtype=np.int64)
+    # index of the range holding an access, -1 outside of all of them
+    range_idx = np.searchsorted(starts, addr, side='right') - 1
+    if ranges:
+        range_idx[addr >= ends[np.maximum(range_idx, 0)]] = -1
+    in_range = range_idx >= 0
+    range_bytes = np.bincount(range_idx[in_range], weights=num_bytes[in_range],
+                              minlength=len(ranges))
+    classes, spm_addr, order = place_ranges(ranges, range_bytes, cfg)
+    placement = [{'name': ranges[idx][2], 'start': ranges[idx][0], 'end': ranges[idx][1],
+                  'spm_addr': int(spm_addr[idx]), 'spm_ways': int(classes[idx]),
+                  'access_bytes': int(range_bytes[idx])}
+                 for idx in order if classes[idx] <= cfg.set_associativity]
+    # accesses outside of the ranges never move to the SPM
+    return np.append(classes, cfg.set_associativity + 1)[range_idx], placement
+
+
+def _region_traffic(cls, num_bytes, in_spm, cached, ways):
+    """SPM accesses, and the uncached ones taking the bypass, for every `s`"""
+    traffic = {name: [0] * (ways + 1) for name in ('spm_accesses', 'spm_bytes',
+                                                   'bypass_accesses', 'bypass_bytes')}
+    for s in range(ways + 1):
+        spm = (cls <= s) | in_spm
+        uncached = ~spm & (~cached | (s == ways))
+        traffic['spm_accesses'][s] = int(np.count_nonzero(spm))
+        traffic['spm_bytes'][s] = int(num_bytes[spm].sum())
+        traffic['bypass_accesses'][s] = int(np.count_nonzero(uncached))
+        traffic['bypass_bytes'][s] = int(num_bytes[uncached].sum())
+    return traffic
+
+
+def _results(counters, placement, cfg):
+    """Counters of every `s`, with the names of the ranges in the SPM"""
+    results = []
+    for s in range(cfg.set_associativity + 1):
+        lookups = counters['hits'][s] + counters['misses'][s]
+        results.append({
+            'spm_ways': s,
+            'cfg_spm': (1 << s) - 1,
+            'ranges': [entry['name'] for entry in placement if entry['spm_ways'] <= s],
+            'spm_accesses': counters['spm_accesses'][s],
+            'spm_bytes': counters['spm_bytes'][s],
+            'hits': counters['hits'][s],
+            'misses': counters['misses'][s],
+            'hit_rate': round(counters['hits'][s] / lookups, 6) if lookups else 0.0,
+            'refill_bytes': counters['misses'][s] * cfg.line_bytes,
+            'writeback_bytes': counters['writebacks'][s] * cfg.line_bytes,
+            'bypass_accesses': counters['bypass_accesses'][s],
+            'bypass_bytes': counters['bypass_bytes'][s]
+        })
+    return results
+
+
+def _stack_pass(addr, write, cls, cacheable, cfg):
+    """LRU hits, misses and dirty writebacks of the cacheable accesses for every `s`"""
+    line_shift = cfg.block_offset_length + cfg.byte_offset_length
+    stacks = _LruStacks(cfg.num_lines, cfg.set_associativity)
+    for line, line_cls, line_write in zip((addr[cacheable] >> line_shift).tolist(),
+                                          cls[cacheable].tolist(), write[cacheable].tolist()):
+        stacks.access(line, line_cls, line_write)
+    stacks.flush()
+    return stacks.counts
+
+
+def _distances(counts, ways):
+    """Stack distance of a line for every `s`, from `ways - 1` down to 0, given the number of
+    more recent lines of every class; only the lines with a class above `s` are cached"""
+    distance = counts[ways + 1]
+    for s in range(ways - 1, -1, -1):
+        distance += counts[s + 1]
+        yield s, distance
+
+
+class _LruStacks:
+    """LRU stacks of every set, with the dirty bit mask over `s` of the lines"""
+    def __init__(self, num_sets, ways):
+        self.ways = ways
+        self.stacks = [[] for _ in range(num_sets)]
+        self.dirty = {}
+        self.counts = {name: [0] * (ways + 1) for name in ('hits', 'misses', 'writebacks')}
+
+    def _move_to_front(self, line, line_cls):
+        """Move the line to the top of its stack, returns its depth (-1 if it was not on the
+        stack) and the more recent lines per class"""
+        ways = self.ways
+        stack = self.stacks[line % len(self.stacks)]
+        counts = [0] * (ways + 2)
+        found = -1
+        for depth, (other, other_cls) in enumerate(stack):
+            if other == line:
+                found = depth
+                break
+            counts[other_cls] += 1
+            if depth % ways == ways - 1 and \
+                    all(distance >= ways - s for s, distance in _distances(counts, ways)):
+                # deeper lines miss for every way count, forget them
+                del stack[depth + 1:]
+                break
+        if found >= 0:
+            del stack[found]
+        stack.insert(0, (line, line_cls))
+        return found, counts
+
+    def access(self, line, line_cls, write):
+        """Count the hits, misses and writebacks of an access for every `s` below its class"""
+        found, counts = self._move_to_front(line, line_cls)
+        bits = self.dirty.get(line, 0)
+        # the line is cached while s is below its class, the cache has `ways - s` ways
+        for s, distance in _distances(counts, self.ways):
+            if s >= line_cls:
+                continue
+            if found >= 0 and distance < self.ways - s:
+                self.counts['hits'][s] += 1
+                if write:
+                    bits |= 1 << s
+            else:
+                self.counts['misses'][s] += 1
+                if bits >> s & 1:
+                    self.counts['writebacks'][s] += 1
+                bits = bits | 1 << s if write else bits & ~(1 << s)
+        if bits & ((1 << self.ways) - 1):
+            self.dirty[line] = bits
+        else:
+            self.dirty.pop(line, None)
+
+    def flush(self):
+        """Count the writebacks of the lines dirty after their last access, evicted since then
+        or written back by the final flush"""
+        for bits in self.dirty.values():
+            for s in range(self.ways):
+                self.counts['writebacks'][s] += bits >> s & 1
+
+
+def effective_bandwidth(result, total_bytes, beat_bytes, miss_penalty=0):
+    """Bytes per cycle at the slave port, bound by the memory traffic and the exposed latency of
+    the misses and bypass accesses"""
+    mem_bytes = result['refill_bytes'] + result['writeback_bytes'] + result['bypass_bytes']
+    mem_accesses = result['misses'] + result['bypass_accesses']
+    cycles = max(total_bytes, mem_bytes) / beat_bytes + mem_accesses * miss_penalty
+    return total_bytes / cycles if cycles else 0.0
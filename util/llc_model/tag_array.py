@@ -0,0 +1,267 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Functional model of the tag array of `axi_llc_top`
+
+Descriptors are routed like in `axi_llc_config` and `axi_llc_burst_cutter`: addresses in the SPM
+region go to the SPM way they map to, addresses in the cached region make a lookup and all other
+addresses (and all cached ones, once every way is SPM) take the bypass. The cache is write-back and
+write-allocate: every miss refills the line, and a dirty victim is written back first.
+
+The engine processes the accesses in rounds. Accesses to different sets are independent, so the
+n-th access of every set is looked up in the same round with NumPy array operations. The number of
+rounds is the highest number of accesses going to a single set. Replacement policies with state
+shared between the sets get one access per round instead.
+"""
+import numpy as np
+from .replacement import make_policy
+from .trace import cut_bursts
+
+REGION_BYPASS = 0
+REGION_SPM = 1
+REGION_CACHED = 2
+
+# counters reported by `Stats`, the ones named like `axi_llc_pkg::events_t` count the same
+COUNTERS = (
+    'descriptors', 'bypass_read', 'bypass_write',
+    'hit_read_spm', 'hit_write_spm', 'miss_read_spm', 'miss_write_spm',
+    'hit_read_cache', 'hit_write_cache', 'miss_read_cache', 'miss_write_cache',
+    'refill_read', 'refill_write', 'evictions', 'evict_read', 'evict_write', 'evict_flush'
+)
+# result of the lookup of a descriptor
+LOOKUP_DTYPE = np.dtype([
+    ('hit', bool),
+    ('way', np.int64),
+    ('evicted', bool),
+    ('writeback', bool)
+])
+
+
+class Stats:
+    """Event counters of the tag array"""
+    def __init__(self, line_bytes, counts=None):
+        self.line_bytes = line_bytes
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        if counts:
+            self.counts.update(counts)
+
+    def __getitem__(self, name):
+        return self.counts[name]
+
+    def __add__(self, other):
+        return Stats(self.line_bytes,
+                     {name: self.counts[name] + other.counts[name] for name in COUNTERS})
+
+    @property
+    def hits(self):
+        """Lookups hitting in the cache"""
+        return self.counts['hit_read_cache'] + self.counts['hit_write_cache']
+
+    @property
+    def misses(self):
+        """Lookups missing in the cache"""
+        return self.counts['miss_read_cache'] + self.counts['miss_write_cache']
+
+    @property
+    def writebacks(self):
+        """Dirty lines written back to memory, by misses and flushes"""
+        return self.counts['evict_read'] + self.counts['evict_write'] + self.counts['evict_flush']
+
+    @property
+    def hit_rate(self):
+        """Fraction of the lookups which hit, 0 without lookups"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self):
+        """Counters and the derived values, ready for JSON"""
+        return {
+            **{name: int(value) for name, value in self.counts.items()},
+            'hits': int(self.hits),
+            'misses': int(self.misses),
+            'writebacks': int(self.writebacks),
+            'hit_rate': round(self.hit_rate, 6),
+            'refill_bytes': int((self['refill_read'] + self['refill_write']) * self.line_bytes),
+            'writeback_bytes': int(self.writebacks * self.line_bytes)
+        }
+
+
+class Outcome:
+    """Per-descriptor result of a replay, all arrays have one entry per descriptor"""
+    def __init__(self, burst_idx, addr, write, region, lookup):
+        self.burst_idx = burst_idx
+        self.addr = addr
+        self.write = write
+        self.region = region
+        self.lookup = lookup
+
+    @property
+    def hit(self):
+        """Hits, in the SPM also the accesses to ways configured as SPM"""
+        return self.lookup['hit']
+
+    @property
+    def way(self):
+        """Way accessed by the descriptor"""
+        return self.lookup['way']
+
+    @property
+    def evicted(self):
+        """Misses which replaced a valid line"""
+        return self.lookup['evicted']
+
+    @property
+    def writeback(self):
+        """Misses which wrote back a dirty line"""
+        return self.lookup['writeback']
+
+    def stats(self, line_bytes):
+        """Count the events of the descriptors"""
+        counts = {'descriptors': len(self.addr)}
+        for region, suffix in ((REGION_SPM, 'spm'), (REGION_CACHED, 'cache')):
+            in_region = self.region == region
+            for write, kind in ((False, 'read'), (True, 'write')):
+                selected = in_region & (self.write == write)
+                hits = int(np.count_nonzero(selected & self.hit))
+                counts[f'hit_{kind}_{suffix}'] = hits
+                counts[f'miss_{kind}_{suffix}'] = int(np.count_nonzero(selected)) - hits
+        cached = self.region == REGION_CACHED
+        for write, kind in ((False, 'read'), (True, 'write')):
+            selected = cached & (self.write == write) & ~self.hit
+            counts[f'refill_{kind}'] = int(np.count_nonzero(selected))
+            counts[f'evict_{kind}'] = int(np.count_nonzero(selected & self.writeback))
+            counts[f'bypass_{kind}'] = int(np.count_nonzero((self.region == REGION_BYPASS) &
+                                                            (self.write == write)))
+        counts['evictions'] = int(np.count_nonzero(self.evicted))
+        return Stats(line_bytes, counts)
+
+
+class TagArray:
+    """Tags, valid and dirty flags of every line, replayed against descriptor traces"""
+    def __init__(self, cfg, policy='evict_box', spm_mask=0):
+        self.cfg = cfg
+        shape = (cfg.num_lines, cfg.set_associativity)
+        self.policy = make_policy(policy, *shape)
+        self.tags = np.zeros(shape, dtype=np.uint64)
+        self.valid = np.zeros(shape, dtype=bool)
+        self.dirty = np.zeros(shape, dtype=bool)
+        self.spm_mask = 0
+        self.flush_stats = Stats(cfg.line_bytes)
+        self.set_spm(spm_mask)
+
+    def way_mask(self, mask):
+        """Boolean array of the ways set in a bit mask"""
+        return (mask >> np.arange(self.cfg.set_associativity)) & 1 == 1
+
+    def flush(self, mask):
+        """Write back and invalidate the ways in the mask, returns the written back lines"""
+        ways = self.way_mask(mask)
+        writebacks = int(np.count_nonzero(self.valid[:, ways] & self.dirty[:, ways]))
+        self.valid[:, ways] = False
+        self.dirty[:, ways] = False
+        self.flush_stats.counts['evict_flush'] += writebacks
+        return writebacks
+
+    def set_spm(self, mask):
+        """Configure the ways in the mask (`CFG_SPM`) as SPM, newly added ways are flushed first"""
+        mask &= self.cfg.all_ways
+        self.flush(mask & ~self.spm_mask)
+        self.spm_mask = mask
+
+    @property
+    def spm_ways(self):
+        """Boolean array of the ways configured as SPM"""
+        return self.way_mask(self.spm_mask)
+
+    def dirty_lines(self):
+        """Number of dirty lines in every way"""
+        return np.count_nonzero(self.valid & self.dirty, axis=0)
+
+    def split(self, addr):
+        """Region, set index, tag and SPM way of descriptor addresses"""
+        cfg = self.cfg
+        addr = np.asarray(addr, dtype=np.uint64)
+        spm_offset = addr - np.uint64(cfg.spm_start)
+        in_spm = (addr >= np.uint64(cfg.spm_start)) & (spm_offset < np.uint64(cfg.spm_length))
+        in_cached = (addr >= np.uint64(cfg.cached_start)) & (addr < np.uint64(cfg.cached_end))
+        region = np.full(len(addr), REGION_BYPASS, dtype=np.uint8)
+        if not self.spm_ways.all():
+            region[in_cached] = REGION_CACHED
+        region[in_spm] = REGION_SPM
+
+        line_shift = np.uint64(cfg.block_offset_length + cfg.byte_offset_length)
+        index = ((addr >> line_shift) & np.uint64(cfg.num_lines - 1)).astype(np.int64)
+        tag = (addr & np.uint64((1 << cfg.addr_width) - 1)) >> (line_shift +
+                                                                  np.uint64(cfg.index_length))
+        spm_way = np.where(in_spm, spm_offset // np.uint64(cfg.way_bytes), 0).astype(np.int64)
+        return region, index, tag, spm_way
+
+    def replay(self, addr, write, cycle=None):
+        """Replay descriptor addresses (one cache line each) in order, updating the state"""
+        addr = np.asarray(addr, dtype=np.uint64)
+        write = np.asarray(write, dtype=bool)
+        num = len(addr)
+        cycle = np.arange(num, dtype=np.int64) if cycle is None else np.asarray(cycle, np.int64)
+        region, index, tag, spm_way = self.split(addr)
+
+        result = np.zeros(num, dtype=LOOKUP_DTYPE)
+        spm = region == REGION_SPM
+        result['hit'][spm] = self.spm_ways[spm_way[spm]]
+        result['way'][spm] = spm_way[spm]
+
+        cached = np.flatnonzero(region == REGION_CACHED)
+        if self.policy.sequential:
+            batches = np.arange(len(cached))[:, None]
+        else:
+            batches = self.rounds(index[cached])
+        for sel in batches:
+            acc = cached[sel]
+            result[acc] = self.lookup(index[acc], tag[acc], write[acc], cycle[acc])
+        return Outcome(np.arange(num), addr, write, region, result)
+
+    def replay_trace(self, trace):
+        """Cut the bursts of a `Trace` into descriptors and replay them"""
+        burst_idx, desc_addr, _ = cut_bursts(trace, self.cfg.line_bytes)
+        outcome = self.replay(desc_addr, trace.write[burst_idx], trace.cycle[burst_idx])
+        outcome.burst_idx = burst_idx
+        return outcome
+
+    @staticmethod
+    def rounds(sets):
+        """Split accesses into rounds, each with at most one access per set, keeping the order"""
+        if len(sets) == 0:
+            return
+        order = np.argsort(sets, kind='stable')
+        sorted_sets = sets[order]
+        starts = np.flatnonzero(np.r_[True, sorted_sets[1:] != sorted_sets[:-1]])
+        counts = np.diff(np.r_[starts, len(sets)])
+        rank = np.arange(len(sets)) - np.repeat(starts, counts)
+        by_round = order[np.argsort(rank, kind='stable')]
+        bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            yield by_round[start:end]
+
+    def lookup(self, sets, tags, write, cycles):
+        """Look up one access per distinct set, refilling the misses, returns `LOOKUP_DTYPE`"""
+        eligible = np.broadcast_to(~self.spm_ways, (len(sets), self.cfg.set_associativity))
+        valid = self.valid[sets]
+        matches = valid & (self.tags[sets] == tags[:, None]) & eligible
+        result = np.zeros(len(sets), dtype=LOOKUP_DTYPE)
+        result['hit'] = matches.any(axis=1)
+        result['way'] = np.argmax(matches, axis=1)
+
+        miss = ~result['hit']
+        if miss.any():
+            miss_sets = sets[miss]
+            occupied = valid[miss] | self.spm_ways
+            victim = self.policy.victim(miss_sets, occupied, eligible[miss], cycles[miss])
+            result['way'][miss] = victim
+            result['evicted'][miss] = self.valid[miss_sets, victim]
+            result['writeback'][miss] = result['evicted'][miss] & self.dirty[miss_sets, victim]
+            self.tags[miss_sets, victim] = tags[miss]
+            self.valid[miss_sets, victim] = True
+            self.dirty[miss_sets, victim] = False
+        self.dirty[sets, result['way']] |= write
+        self.policy.update(sets, result['way'], result['hit'], cycles)
+        return result
@@ -0,0 +1,155 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Stand-in for `tb_axi_llc` running the test sequence on the functional model
+
+The random traffic follows the memory regions of the testbench: the SPM region and twice the
+cached region, of which the upper half takes the bypass. The four test blocks (no SPM, lower half
+SPM, all SPM, no SPM) each run `TbNumReads` reads and `TbNumWrites` writes and end with a flush of
+all ways. The byte counters are derived from the model; the cycle count assumes that every AXI
+channel moves one beat per cycle, so the bandwidths only show trends.
+"""
+import numpy as np
+from .config import LlcConfig
+from .tag_array import TagArray, REGION_BYPASS, REGION_SPM, REGION_CACHED
+from .trace import Trace, cut_bursts
+
+# parameters of `tb_axi_llc` with their defaults
+TB_PARAMS = {
+    'TbSetAssociativity': 8,
+    'TbNumLines': 256,
+    'TbNumBlocks': 8,
+    'TbAxiDataWidthFull': 128,
+    'TbNumWrites': 1100,
+    'TbNumReads': 1500
+}
+
+# maximal AXI length of the random bursts
+MAX_LEN = 15
+
+
+def tb_config(params):
+    """LLC configuration and address map instantiated by the testbench"""
+    return LlcConfig(params['TbSetAssociativity'], params['TbNumLines'], params['TbNumBlocks'],
+                     params['TbAxiDataWidthFull'])
+
+
+def random_traffic(cfg, num_reads, num_writes, rng):
+    """Random full-width INCR bursts into the memory regions of the testbench master"""
+    num = num_reads + num_writes
+    write = np.zeros(num, dtype=bool)
+    write[rng.choice(num, num_writes, replace=False)] = True
+    size = cfg.byte_offset_length
+    length = rng.integers(0, MAX_LEN + 1, num)
+    # the master knows the SPM region and twice the cached region of the LLC
+    in_spm = rng.random(num) < 0.5
+    span = np.where(in_spm, cfg.spm_length, 2 * (cfg.cached_end - cfg.cached_start))
+    start = np.where(in_spm, cfg.spm_start, cfg.cached_start)
+    offset = (rng.random(num) * (span - ((length + 1) << size))).astype(np.int64)
+    addr = start + (offset >> size << size)
+    return Trace(addr, write, len=length, size=np.full(num, size))
+
+
+class TbCounters:
+    """Bytes and transfer counts of the `events_t` counters of the testbench"""
+    def __init__(self):
+        self.bytes = {}
+        self.num = {}
+        self.beats = {'slv_r': 0, 'slv_w': 0, 'mst_r': 0, 'mst_w': 0}
+
+    def add(self, event, num_bytes, num=1):
+        """Count `num` transfers of together `num_bytes` bytes"""
+        self.bytes[event] = self.bytes.get(event, 0) + int(num_bytes)
+        self.num[event] = self.num.get(event, 0) + int(num)
+
+    @property
+    def cycles(self):
+        """Cycle estimate, the busiest channel moving one beat per cycle"""
+        return max(1, *self.beats.values())
+
+
+def count_block(counters, tag_array, trace):
+    """Replay one test block and accumulate the counters"""
+    cfg = tag_array.cfg
+    burst_idx, desc_addr, desc_len = cut_bursts(trace, cfg.line_bytes)
+    outcome = tag_array.replay(desc_addr, trace.write[burst_idx], trace.cycle[burst_idx])
+    desc_bytes = (desc_len.astype(np.int64) + 1) << trace.size[burst_idx].astype(np.int64)
+    bypass = np.zeros(len(trace), dtype=bool)
+    bypass[burst_idx[outcome.region == REGION_BYPASS]] = True
+
+    _count_bursts(counters, trace, bypass)
+    _count_lookups(counters, outcome, desc_bytes)
+    refills, evictions = _count_misses(counters, outcome, cfg.line_bytes)
+    # the master port also carries the refills and evictions
+    counters.add('aw_mst_transfer', evictions * cfg.line_bytes, evictions)
+    counters.add('ar_mst_transfer', refills * cfg.line_bytes, refills)
+    counters.beats['mst_r'] += refills * cfg.num_blocks
+    counters.beats['mst_w'] += evictions * cfg.num_blocks
+
+
+def _count_bursts(counters, trace, bypass):
+    """Bursts of the slave port, the ones taking the bypass also go to the master port"""
+    beats = trace.len.astype(np.int64) + 1
+    num_bytes = beats << trace.size.astype(np.int64)
+    for write, chan, side in ((True, 'aw', 'w'), (False, 'ar', 'r')):
+        bursts = trace.write == write
+        bypassed = bursts & bypass
+        counters.add(f'{chan}_slv_transfer', num_bytes[bursts].sum(), bursts.sum())
+        counters.add(f'{chan}_bypass_transfer', num_bytes[bypassed].sum(), bypassed.sum())
+        counters.add(f'{chan}_mst_transfer', num_bytes[bypassed].sum(), bypassed.sum())
+        counters.beats[f'slv_{side}'] += int(beats[bursts].sum())
+        counters.beats[f'mst_{side}'] += int(beats[bypassed].sum())
+
+
+def _count_lookups(counters, outcome, desc_bytes):
+    """Descriptors going to the SPM and the cache, and their hits and misses"""
+    for write, chan, kind in ((True, 'aw', 'write'), (False, 'ar', 'read')):
+        descs = outcome.write == write
+        for region, suffix in ((REGION_SPM, 'spm'), (REGION_CACHED, 'cache')):
+            in_region = descs & (outcome.region == region)
+            counters.add(f'{chan}_desc_{suffix}', desc_bytes[in_region].sum(), in_region.sum())
+            for hit, prefix in ((True, 'hit'), (False, 'miss')):
+                selected = in_region & (outcome.hit == hit)
+                counters.add(f'{prefix}_{kind}_{suffix}', desc_bytes[selected].sum(),
+                             selected.sum())
+
+
+def _count_misses(counters, outcome, line_bytes):
+    """Refills and evictions of the cache misses, returns their numbers"""
+    misses = (outcome.region == REGION_CACHED) & ~outcome.hit
+    for write, kind in ((True, 'write'), (False, 'read')):
+        refills = misses & (outcome.write == write)
+        evicts = refills & outcome.writeback
+        counters.add(f'refill_{kind}', refills.sum() * line_bytes, refills.sum())
+        counters.add(f'evict_{kind}', evicts.sum() * line_bytes, evicts.sum())
+    num_refills = int(misses.sum())
+    num_evictions = int((misses & outcome.writeback).sum())
+    # the units see one request per descriptor, counted instead of their busy cycles
+    in_llc = outcome.region != REGION_BYPASS
+    counters.add('evict_unit_req', 0, num_evictions)
+    counters.add('refill_unit_req', 0, num_refills)
+    counters.add('w_chan_unit_req', 0, (in_llc & outcome.write).sum())
+    counters.add('r_chan_unit_req', 0, (in_llc & ~outcome.write).sum())
+    return num_refills, num_evictions
+
+
+def run_testbench(params, seed=0):
+    """Run the test sequence of `tb_axi_llc`, returns the counters up to `print_perf_couters`"""
+    cfg = tb_config(params)
+    rng = np.random.default_rng(seed)
+    tag_array = TagArray(cfg)
+    counters = TbCounters()
+    half = 1 if cfg.set_associativity == 1 else (1 << (cfg.set_associativity // 2)) - 1
+    blocks = (0, half, cfg.all_ways, 0)
+    for block, spm in enumerate(blocks):
+        tag_array.set_spm(spm)
+        trace = random_traffic(cfg, params['TbNumReads'], params['TbNumWrites'], rng)
+        count_block(counters, tag_array, trace)
+        # the counters are printed before the flush of the last block
+        if block < len(blocks) - 1:
+            flushed = tag_array.flush(cfg.all_ways)
+            counters.add('evict_flush', flushed * cfg.line_bytes, flushed)
+            counters.add('aw_mst_transfer', flushed * cfg.line_bytes, flushed)
+            counters.beats['mst_w'] += flushed * cfg.num_blocks
+    return counters
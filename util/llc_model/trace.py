@@ -0,0 +1,118 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""AXI access traces as NumPy arrays, and their split into cache-line descriptors
+
+A trace holds one entry per AXI burst in the arrays `addr`, `write`, `len`, `size`, `burst`,
+`cycle` and `id`. Text traces have one burst per line, `R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`, `#`
+starts a comment. Without cycles, the bursts are assumed to arrive one cycle after another; without
+IDs, all bursts have ID 0.
+"""
+import numpy as np
+
+BURST_FIXED = 0
+BURST_INCR = 1
+BURST_WRAP = 2
+
+FIELDS = ('addr', 'write', 'len', 'size', 'burst', 'cycle', 'id')
+
+
+def _column(values, num, dtype, default=0):
+    """Array of a trace field, filled with the default if not given"""
+    return np.full(num, default, dtype) if values is None else np.asarray(values, dtype)
+
+
+class Trace:
+    """Arrays describing a sequence of AXI bursts
+
+    The fields after `addr` and `write` are passed by their names in `FIELDS`, missing ones get
+    their default.
+    """
+    def __init__(self, addr, write, **fields):
+        unknown = set(fields) - set(FIELDS[2:])
+        if unknown:
+            raise TypeError(f'unknown trace fields {sorted(unknown)}')
+        self.addr = np.asarray(addr, dtype=np.uint64)
+        num = len(self.addr)
+        self.write = np.asarray(write, dtype=bool)
+        self.len = _column(fields.get('len'), num, np.uint16)
+        self.size = _column(fields.get('size'), num, np.uint8)
+        self.burst = _column(fields.get('burst'), num, np.uint8, BURST_INCR)
+        self.cycle = np.arange(num, dtype=np.int64) if fields.get('cycle') is None else \
+            np.asarray(fields['cycle'], np.int64)
+        self.id = _column(fields.get('id'), num, np.uint16)
+
+    def __len__(self):
+        return len(self.addr)
+
+    def __getitem__(self, key):
+        return Trace(**{field: getattr(self, field)[key] for field in FIELDS})
+
+    @classmethod
+    def load(cls, path):
+        """Read a `.npz` archive of the arrays or a text trace"""
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                return cls(**{field: data[field] for field in FIELDS if field in data})
+        return cls.load_text(path)
+
+    @classmethod
+    def load_text(cls, path):
+        """Read a text trace"""
+        columns = {field: [] for field in FIELDS if field != 'burst'}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, start=1):
+                fields = line.split('#', 1)[0].split()
+                if not fields:
+                    continue
+                if fields[0] not in ('R', 'W', 'r', 'w') or len(fields) > 6:
+                    raise ValueError(f'{path}:{line_no}: expected '
+                                     '`R|W ADDR [LEN [SIZE [CYCLE [ID]]]]`')
+                columns['addr'].append(int(fields[1], 0))
+                columns['write'].append(fields[0] in ('W', 'w'))
+                columns['len'].append(int(fields[2], 0) if len(fields) > 2 else 0)
+                columns['size'].append(int(fields[3], 0) if len(fields) > 3 else 0)
+                columns['cycle'].append(int(fields[4], 0) if len(fields) > 4
+                                        else len(columns['cycle']))
+                columns['id'].append(int(fields[5], 0) if len(fields) > 5 else 0)
+        return cls(**columns)
+
+    def save(self, path):
+        """Write the arrays to a `.npz` archive"""
+        np.savez(path, **{field: getattr(self, field) for field in FIELDS})
+
+
+def _line_beats(trace, line_bytes):
+    """Line address, beats, beats up to the line end and beats per full line of every burst"""
+    addr = trace.addr.astype(np.int64)
+    size = trace.size.astype(np.int64)
+    this_line = addr & ~np.int64(line_bytes - 1)
+    beats_on_line = ((this_line + line_bytes - addr - 1) >> size) + 1
+    beats_per_line = np.maximum(np.int64(line_bytes) >> size, 1)
+    return this_line, trace.len.astype(np.int64) + 1, beats_on_line, beats_per_line
+
+
+def cut_bursts(trace, line_bytes):
+    """Split the bursts into one descriptor per cache line, like `axi_llc_burst_cutter`
+
+    Returns the index of the burst every descriptor belongs to, the descriptor addresses and the
+    AXI length (beats - 1) of every descriptor. The first descriptor keeps the burst address, the
+    following ones start at the line boundaries. FIXED bursts are never split.
+    """
+    this_line, beats, beats_on_line, beats_per_line = _line_beats(trace, line_bytes)
+    remaining = np.maximum(beats - beats_on_line, 0)
+    num_desc = 1 + (remaining + beats_per_line - 1) // beats_per_line
+    num_desc[trace.burst == BURST_FIXED] = 1
+
+    burst_idx = np.repeat(np.arange(len(trace)), num_desc)
+    starts = np.cumsum(num_desc) - num_desc
+    step = np.arange(len(burst_idx)) - np.repeat(starts, num_desc)
+    desc_addr = np.where(step == 0, trace.addr[burst_idx].astype(np.int64),
+                         this_line[burst_idx] + step * line_bytes)
+    # the first descriptor takes the beats up to the line end, the others full lines
+    first_beats = np.where(trace.burst == BURST_FIXED, beats, beats_on_line)[burst_idx]
+    done = np.where(step == 0, 0, first_beats + (step - 1) * beats_per_line[burst_idx])
+    desc_beats = np.where(step == 0, first_beats, beats_per_line[burst_idx])
+    desc_beats = np.minimum(desc_beats, beats[burst_idx] - done)
+    return burst_idx, desc_addr.astype(np.uint64), (desc_beats - 1).astype(np.uint16)
@@ -0,0 +1,285 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Recompute the `axi_llc_pkg::events_t` counters from a VCD dump
+
+The events are the valid/ready handshakes `axi_llc_top` assigns to `axi_llc_events_o`, evaluated
+on every rising edge of `clk_i` out of reset with the values before the edge. Only the signals
+needed for them are decoded, all other value changes are skipped, so dumps of any size are read
+line by line in constant memory.
+
+Signals are named relative to the `axi_llc_top` instance, e.g. `to_llc_req.aw.len` or
+`ax_desc_valid[0]`. They are looked up by their hierarchical VCD name; a bit or an element of a
+vector may also be addressed with an index on the vector. Simulators which dump packed structs as
+one vector need a map from these names to bit slices of the dumped vectors, `name[msb:lsb]`.
+"""
+import re
+from perf_log import BANDWIDTH_COUNTERS, UTILIZATION_COUNTERS
+
+CLOCK = 'clk_i'
+RESET = 'rst_ni'
+
+# `axi_llc_pkg` unit indices of `ax_desc*` and `to_way*`
+AW_CHAN_UNIT, AR_CHAN_UNIT, CONFIG_UNIT = 0, 1, 2
+EVICT_UNIT, REFILL_UNIT, W_CHAN_UNIT, R_CHAN_UNIT = 0, 1, 2, 3
+
+SLICE_REGEX = re.compile(r'^(.*?)(?:\[(\d+)(?::(\d+))?\])?$')
+
+
+def _axi(port, chan):
+    return ((f'{port}_req.{chan}_valid', 1),), f'{port}_resp.{chan}_ready', \
+        f'{port}_req.{chan}.len', f'{port}_req.{chan}.size'
+
+
+def _ax_desc(unit, spm):
+    valid = ((f'ax_desc_valid[{unit}]', 1),)
+    if spm is not None:
+        valid += ((f'ax_desc[{unit}].spm', spm),)
+    return valid, f'ax_desc_ready[{unit}]', f'ax_desc[{unit}].a_x_len', \
+        f'ax_desc[{unit}].a_x_size'
+
+
+def _desc(handshake, write, spm, flush=0, evict=None):
+    valid = ((f'{handshake}_valid', 1),)
+    if write is not None:
+        valid += (('desc.rw', write),)
+    valid += (('desc.spm', spm), ('desc.flush', flush))
+    if evict is not None:
+        valid += (('desc.evict', evict),)
+    return valid, f'{handshake}_ready', 'desc.a_x_len', 'desc.a_x_size'
+
+
+def _refill(write):
+    valid = (('evict_desc_valid', 1), ('evict_desc.rw', write), ('evict_desc.spm', 0),
+             ('evict_desc.flush', 0), ('evict_desc.refill', 1))
+    return valid, 'evict_desc_ready', 'evict_desc.a_x_len', 'evict_desc.a_x_size'
+
+
+# (valid terms (signal, required bit), ready, len, size) of every byte counting event
+EVENTS = {
+    'aw_slv_transfer': _axi('to_llc', 'aw'),
+    'ar_slv_transfer': _axi('to_llc', 'ar'),
+    'aw_bypass_transfer': _axi('bypass', 'aw'),
+    'ar_bypass_transfer': _axi('bypass', 'ar'),
+    'aw_mst_transfer': _axi('from_llc', 'aw'),
+    'ar_mst_transfer': _axi('from_llc', 'ar'),
+    'aw_desc_spm': _ax_desc(AW_CHAN_UNIT, 1),
+    'ar_desc_spm': _ax_desc(AR_CHAN_UNIT, 1),
+    'aw_desc_cache': _ax_desc(AW_CHAN_UNIT, 0),
+    'ar_desc_cache': _ax_desc(AR_CHAN_UNIT, 0),
+    'config_desc': _ax_desc(CONFIG_UNIT, None),
+    'hit_write_spm': _desc('hit', 1, 1),
+    'hit_read_spm': _desc('hit', 0, 1),
+    'miss_write_spm': _desc('miss', 1, 1),
+    'miss_read_spm': _desc('miss', 0, 1),
+    'hit_write_cache': _desc('hit', 1, 0),
+    'hit_read_cache': _desc('hit', 0, 0),
+    'miss_write_cache': _desc('miss', 1, 0),
+    'miss_read_cache': _desc('miss', 0, 0),
+    'refill_write': _refill(1),
+    'refill_read': _refill(0),
+    'evict_write': _desc('miss', 1, 0, evict=1),
+    'evict_read': _desc('miss', 0, 0, evict=1),
+    'evict_flush': _desc('miss', None, 0, flush=1, evict=1)
+}
+# handshakes of the units with the data storage, counted without bytes
+UNIT_EVENTS = {
+    'evict_unit_req': EVICT_UNIT,
+    'refill_unit_req': REFILL_UNIT,
+    'w_chan_unit_req': W_CHAN_UNIT,
+    'r_chan_unit_req': R_CHAN_UNIT
+}
+
+# value characters of unknown bits, counted as 0
+UNKNOWN = str.maketrans('xXzZuUwW-', '000000000')
+
+
+def read_header(lines):
+    """Variables of the VCD header by their full dotted name, as `(id code, width, lsb)`
+
+    Consumes the lines up to `$enddefinitions`.
+    """
+    scopes = []
+    variables = {}
+    for line in lines:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == '$scope':
+            scopes.append(tokens[2])
+        elif tokens[0] == '$upscope':
+            scopes.pop()
+        elif tokens[0] == '$var':
+            # $var type width code reference [range] $end
+            width, code, name = int(tokens[2]), tokens[3], tokens[4]
+            lsb = 0
+            match = SLICE_REGEX.match(tokens[5]) if len(tokens) > 6 else None
+            if match and match.group(3) is not None:
+                lsb = min(int(match.group(2)), int(match.group(3)))
+            elif match and match.group(2) is not None:
+                # single bits of a vector dumped one by one
+                name += tokens[5]
+            variables['.'.join(scopes + [name])] = (code, width, lsb)
+        elif tokens[0] == '$enddefinitions':
+            break
+    return variables
+
+
+def find_scope(variables):
+    """Dotted name of the scope of the first `axi_llc_top` instance in the dump"""
+    for name in variables:
+        if name.endswith('.ax_desc_valid') or name.endswith('.ax_desc_valid[0]'):
+            return name.rsplit('.', 1)[0]
+    raise KeyError('no axi_llc_top instance (signal `ax_desc_valid`) found in the dump')
+
+
+def resolve(variables, scope, name, signal_map=None):
+    """VCD id code, bit offset and width of a signal relative to the `axi_llc_top` scope"""
+    target = signal_map.get(name, name) if signal_map else name
+    full = f'{scope}.{target}'
+    if full in variables:
+        code, width, _ = variables[full]
+        return code, 0, width
+    match = SLICE_REGEX.match(full)
+    base, msb, lsb = match.group(1), match.group(2), match.group(3)
+    if base in variables and msb is not None:
+        code, _, offset = variables[base]
+        msb = int(msb)
+        lsb = msb if lsb is None else int(lsb)
+        return code, min(msb, lsb) - offset, abs(msb - lsb) + 1
+    raise KeyError(f'signal `{name}` not found below `{scope}`, map it with a signal map')
+
+
+def decode_events(source):
+    """Handshake terms `(code, lsb, bit)` and len and size fields of every event
+
+    `source(name)` returns the id code, bit offset and mask of a signal.
+    """
+    events = []
+    for name, (valid, ready, length, size) in EVENTS.items():
+        terms = tuple(source(signal)[:2] + (bit,) for signal, bit in valid)
+        events.append((name, terms + (source(ready)[:2] + (1,),), source(length), source(size)))
+    for name, unit in UNIT_EVENTS.items():
+        terms = (source(f'to_way_valid[{unit}]')[:2] + (1,),
+                 source(f'to_way_ready[{unit}]')[:2] + (1,))
+        events.append((name, terms, None, None))
+    return events
+
+
+class EventCounts:
+    """Event counts of the whole dump and of the current window of the time series
+
+    `window` cycles are aggregated into one sample of the time series, which is passed to
+    `on_window(start_cycle, cycles, num_bytes, num)`.
+    """
+    def __init__(self, window=None, on_window=None):
+        self.window = window
+        self.on_window = on_window
+        self.cycles = 0
+        self.num_bytes = dict.fromkeys(BANDWIDTH_COUNTERS, 0)
+        self.num = dict.fromkeys(UTILIZATION_COUNTERS, 0)
+        self._window_start = 0
+        # bytes and handshakes of the current window
+        self._window = (dict.fromkeys(BANDWIDTH_COUNTERS, 0),
+                        dict.fromkeys(UTILIZATION_COUNTERS, 0))
+
+    def count(self, name, num_bytes=None):
+        """Count one handshake of an event in the current cycle"""
+        self._window[1][name] += 1
+        if num_bytes is not None:
+            self._window[0][name] += num_bytes
+
+    def next_cycle(self):
+        """End the current cycle, closing the window once it is full"""
+        self.cycles += 1
+        if self.window and self.cycles - self._window_start == self.window:
+            self.close_window()
+
+    def close_window(self):
+        """Add the current window to the totals and pass it to `on_window`"""
+        cycles = self.cycles - self._window_start
+        window_bytes, window_num = self._window
+        if cycles and self.on_window is not None:
+            self.on_window(self._window_start, cycles, window_bytes, window_num)
+        for name, value in window_bytes.items():
+            self.num_bytes[name] += value
+            window_bytes[name] = 0
+        for name, value in window_num.items():
+            self.num[name] += value
+            window_num[name] = 0
+        self._window_start = self.cycles
+
+
+class VcdAnalyzer:
+    """Counts the events of the selected signals, fed with the lines after the header
+
+    The counts are collected in `counts`, an `EventCounts` with the given window.
+    """
+    def __init__(self, variables, scope=None, signal_map=None, window=None, on_window=None):
+        self.scope = find_scope(variables) if scope is None else scope
+        self.counts = EventCounts(window, on_window)
+        # value of every decoded signal by its id code
+        self._state = {}
+
+        def source(name):
+            code, lsb, width = resolve(variables, self.scope, name, signal_map)
+            self._state[code] = 0
+            return code, lsb, (1 << width) - 1
+
+        clock = source(CLOCK)[0]
+        try:
+            reset = source(RESET)[0]
+        except KeyError:
+            reset = None
+        # the clock and the optional reset
+        self._clock = (clock, reset)
+        self._events = decode_events(source)
+        self._changes = []
+
+    def feed(self, line):
+        """Process one line of the VCD body"""
+        if not line or line[0] == '$':
+            return
+        char = line[0]
+        if char == '#':
+            self._end_step()
+            return
+        if char in 'bBrR':
+            value, _, code = line[1:].partition(' ')
+            code = code.strip()
+            if code in self._state and char in 'bB':
+                self._changes.append((code, int(value.translate(UNKNOWN), 2)))
+            return
+        code = line[1:].strip()
+        if code in self._state:
+            self._changes.append((code, 1 if char == '1' else 0))
+
+    def _end_step(self):
+        state = self._state
+        clock, reset = self._clock
+        rising = False
+        for code, value in self._changes:
+            if code == clock and value and not state[clock]:
+                rising = True
+        if rising and (reset is None or state[reset]):
+            self._sample()
+        for code, value in self._changes:
+            state[code] = value
+        self._changes = []
+
+    def _sample(self):
+        state = self._state
+        for name, terms, length, size in self._events:
+            if all((state[code] >> lsb & 1) == bit for code, lsb, bit in terms):
+                if length is None:
+                    self.counts.count(name)
+                else:
+                    beats = (state[length[0]] >> length[1] & length[2]) + 1
+                    self.counts.count(name, beats << (state[size[0]] >> size[1] & size[2]))
+        self.counts.next_cycle()
+
+    def finish(self):
+        """Process the last time step and the last partial window"""
+        self._end_step()
+        self.counts.close_window()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Extract the performance counters of tb_axi_llc logs and compare runs"""
+import sys
+import json
+import argparse
+from perf_log import parse_log, flatten, compare
+
+
+def load_record(path, dump):
+    """Read a record written by `parse`, or parse a log"""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        # `parse` writes a list if it was given several logs
+        if isinstance(record, list):
+            if len(record) != 1:
+                raise ValueError(f'{path}: expected the record of a single run')
+            record = record[0]
+    else:
+        record = parse_log(path)
+    if not record['dumps']:
+        raise ValueError(f'{path}: no performance counter dump found')
+    if not -len(record['dumps']) <= dump < len(record['dumps']):
+        raise ValueError(f'{path}: has only {len(record["dumps"])} dumps')
+    return record
+
+
+def cmd_parse(args):
+    """Write the records of the logs as JSON or flat JSON lines"""
+    records = [parse_log(path) for path in args.logs]
+    if args.jsonl:
+        output = '\n'.join(json.dumps(row) for record in records for row in flatten(record))
+    else:
+        output = json.dumps(records[0] if len(records) == 1 else records, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return 0
+
+
+def cmd_compare(args):
+    """Print the bandwidth changes of a dump, returns 1 if any of them is a regression"""
+    try:
+        old = load_record(args.old, args.dump)
+        new = load_record(args.new, args.dump)
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 2
+    rows = compare(old, new, args.threshold, args.dump)
+    regressions = 0
+    for row in rows:
+        flag = 'REGRESSION' if row['regression'] else ''
+        regressions += row['regression']
+        print(f'{row["counter"]:<20} {row["old"]:14.6f} -> {row["new"]:14.6f} MiB/sec '
+              f'{row["change_percent"]:+9.2f} % {flag}')
+    print(f'{regressions} regressions beyond {args.threshold} %')
+    return 1 if regressions else 0
+
+
+def main():
+    """Run the subcommand given on the command line"""
+    parser = argparse.ArgumentParser(description='Parse the performance counters printed by '
+                                     'tb_axi_llc and compare the bandwidths of two runs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parse = subparsers.add_parser('parse', help='write a JSON record per log')
+    parse.add_argument('logs', nargs='+', help='simulation logs, `.gz` logs are decompressed')
+    parse.add_argument('--jsonl', action='store_true',
+                       help='write one flat JSON line per counter dump instead')
+    parse.add_argument('-o', '--output', default=None,
+                       help='output file (default: standard output)')
+    parse.set_defaults(func=cmd_parse)
+
+    comp = subparsers.add_parser('compare', help='flag per-counter bandwidth regressions, '
+                                 'exits with 1 if there are any')
+    comp.add_argument('old', help='reference log or JSON record')
+    comp.add_argument('new', help='log or JSON record to check')
+    comp.add_argument('--threshold', type=float, default=5.0,
+                      help='tolerated change in percent (default: %(default)s)')
+    comp.add_argument('--dump', type=int, default=-1,
+                      help='index of the counter dump compared (default: the last one)')
+    comp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Streaming parser of the performance counter output of `tb_axi_llc`
+
+A log is read line by line and only the counters of the `print_perf_couters` dumps are kept, so
+logs with millions of `AW/AR transaction` progress lines are parsed in constant memory. Simulator
+prefixes (`# ` of QuestaSim) are stripped and logs ending in `.gz` are decompressed on the fly.
+"""
+import re
+import gzip
+
+# counters printed with a bandwidth and a utilization, in the order of the testbench
+BANDWIDTH_COUNTERS = (
+    'aw_slv_transfer', 'ar_slv_transfer', 'aw_bypass_transfer', 'ar_bypass_transfer',
+    'aw_mst_transfer', 'ar_mst_transfer', 'aw_desc_spm', 'ar_desc_spm', 'aw_desc_cache',
+    'ar_desc_cache', 'config_desc', 'hit_write_spm', 'hit_read_spm', 'miss_write_spm',
+    'miss_read_spm', 'hit_write_cache', 'hit_read_cache', 'miss_write_cache', 'miss_read_cache',
+    'refill_write', 'refill_read', 'evict_write', 'evict_read', 'evict_flush'
+)
+# counters only printed with a utilization
+UTILIZATION_COUNTERS = BANDWIDTH_COUNTERS + (
+    'evict_unit_req', 'refill_unit_req', 'w_chan_unit_req', 'r_chan_unit_req'
+)
+
+# direction in which a bandwidth change is a regression, other counters are only reported
+LOWER_IS_WORSE = {'aw_slv_transfer', 'ar_slv_transfer', 'hit_write_spm', 'hit_read_spm',
+                  'hit_write_cache', 'hit_read_cache'}
+HIGHER_IS_WORSE = {'aw_mst_transfer', 'ar_mst_transfer', 'miss_write_cache', 'miss_read_cache',
+                   'refill_write', 'refill_read', 'evict_write', 'evict_read'}
+
+SEPARATOR = '#' * 66
+COUNTER_REGEX = re.compile(r'^([a-z_]+):\s+(-?[0-9.eE+-]+|nan|inf)(?: MiB/sec)?$')
+MAX_BANDWIDTH_REGEX = re.compile(r'^Max Bandwidth of one AXI channel: (\S+) MiB/sec$')
+MESSAGE_REGEX = re.compile(r'^\*\* (Info|Warning|Error|Fatal): (.*)$')
+# clock period of the testbench in ns
+TB_CYCLE_TIME = 10
+
+
+def open_log(path):
+    """Open a (possibly gzip compressed) log for reading text lines"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+class PerfLogParser:
+    """State machine fed with the lines of a log, collecting the fields of its record in `run`"""
+    def __init__(self):
+        self.run = {
+            'lines': 0,
+            'tests_ended': False,
+            'messages': {'info': 0, 'warning': 0, 'error': 0, 'fatal': 0},
+            'transactions': {'aw': 0, 'ar': 0},
+            'last_time': None,
+            'dumps': []
+        }
+        self.phase = None
+        self._dump = None
+        self._section = None
+
+    def feed(self, line):
+        """Process one line of the log"""
+        run = self.run
+        run['lines'] += 1
+        line = line.rstrip('\n')
+        if line.startswith('# '):
+            line = line[2:]
+        # the progress lines are by far the most common ones, check them first
+        if ' transaction: ' in line:
+            time, _, rest = line.partition('> ')
+            channel, _, count = rest.partition(' transaction: ')
+            if channel in ('AW', 'AR') and count.strip().isdigit():
+                run['transactions'][channel.lower()] = int(count)
+                run['last_time'] = time
+                return
+        line = line.strip()
+        if self._dump is not None:
+            self._feed_dump(line)
+            return
+        if line == 'LLC: Performance':
+            self._dump = {'phase': self.phase, 'time': run['last_time'],
+                          'transactions': dict(run['transactions']), 'max_bandwidth': None,
+                          'bandwidth': {}, 'utilization': {}}
+            self._section = None
+        elif line == 'Tests ended!':
+            run['tests_ended'] = True
+        else:
+            match = MESSAGE_REGEX.match(line)
+            if match:
+                run['messages'][match.group(1).lower()] += 1
+                if match.group(1) == 'Info':
+                    self.phase = match.group(2).strip()
+
+    def _feed_dump(self, line):
+        if line == 'Bandwidths:':
+            self._section = 'bandwidth'
+        elif line == 'Utilization:':
+            self._section = 'utilization'
+        elif line == SEPARATOR:
+            # the dump ends with the separator after the utilization
+            if self._section == 'utilization':
+                self.run['dumps'].append(self._dump)
+                self._dump = None
+        elif self._section is None:
+            match = MAX_BANDWIDTH_REGEX.match(line)
+            if match:
+                self._dump['max_bandwidth'] = float(match.group(1))
+        else:
+            match = COUNTER_REGEX.match(line)
+            if match:
+                self._dump[self._section][match.group(1)] = float(match.group(2))
+
+    def record(self, name=None):
+        """The structured record of the run"""
+        return {'log': name, **self.run}
+
+
+def format_perf_dump(num_bytes, num, cycles, data_width, cycle_time=TB_CYCLE_TIME):
+    """Lines of a `print_perf_couters` dump for the given counter values
+
+    `num_bytes` and `num` map the counter names to the transferred bytes and the number of
+    transfers, missing counters are zero.
+    """
+    scale = 1e9 / cycle_time / 1024 / 1024
+    lines = [SEPARATOR, 'LLC: Performance',
+             f'Max Bandwidth of one AXI channel: {data_width / 8 * scale:f} MiB/sec', SEPARATOR,
+             'Bandwidths:']
+    lines += [f'{name + ":":<20}{num_bytes.get(name, 0) / cycles * scale:f} MiB/sec'
+              for name in BANDWIDTH_COUNTERS]
+    lines += [SEPARATOR, 'Utilization:']
+    lines += [f'{name + ":":<20}{num.get(name, 0) / cycles:f}' for name in UTILIZATION_COUNTERS]
+    lines.append(SEPARATOR)
+    return lines
+
+
+def parse_log(path):
+    """Parse a log file into its record"""
+    parser = PerfLogParser()
+    with open_log(path) as f:
+        for line in f:
+            parser.feed(line)
+    return parser.record(path)
+
+
+def flatten(record):
+    """One flat row per dump, e.g. for a data frame or a Parquet file"""
+    rows = []
+    for idx, dump in enumerate(record['dumps']):
+        row = {'log': record['log'], 'dump': idx, 'phase': dump['phase'], 'time': dump['time'],
+               'max_bandwidth': dump['max_bandwidth']}
+        row.update({f'bandwidth.{name}': value for name, value in dump['bandwidth'].items()})
+        row.update({f'utilization.{name}': value for name, value in dump['utilization'].items()})
+        rows.append(row)
+    return rows
+
+
+def compare(old, new, threshold, dump=-1):
+    """Compare the bandwidths of a dump of two records
+
+    Returns one row per counter with the relative change in percent and whether it is a
+    regression, i.e. a change beyond the threshold (in percent) in the worse direction.
+    """
+    old_bw = old['dumps'][dump]['bandwidth']
+    new_bw = new['dumps'][dump]['bandwidth']
+    rows = []
+    for name in BANDWIDTH_COUNTERS:
+        if name not in old_bw or name not in new_bw:
+            continue
+        before, after = old_bw[name], new_bw[name]
+        if before:
+            change = 100.0 * (after - before) / before
+        else:
+            change = 0.0 if not after else float('inf')
+        regression = ((name in LOWER_IS_WORSE and change < -threshold) or
+                      (name in HIGHER_IS_WORSE and change > threshold))
+        rows.append({'counter': name, 'old': before, 'new': after,
+                     'change_percent': round(change, 3), 'regression': regression})
+    return rows
@@ -0,0 +1,75 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Per-phase timings and counters for the util scripts (`--profile`)"""
+import sys
+import json
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    """Accumulates the wall time of named phases and event counters"""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = {}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block and add it to the phase"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds, calls = self.phases.get(name, (0.0, 0))
+            self.phases[name] = (seconds + time.perf_counter() - start, calls + 1)
+
+    def count(self, name, value=1):
+        """Add value to a counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def pop(self):
+        """Return the data collected so far (e.g. in a worker process) and clear it"""
+        data = {'phases': self.phases, 'counters': self.counters}
+        self.phases = {}
+        self.counters = {}
+        return data
+
+    def merge(self, data):
+        """Add data returned by pop of another profiler"""
+        for name, (seconds, calls) in data['phases'].items():
+            own_seconds, own_calls = self.phases.get(name, (0.0, 0))
+            self.phases[name] = (own_seconds + seconds, own_calls + calls)
+        for name, value in data['counters'].items():
+            self.count(name, value)
+
+    def report(self, dest):
+        """Write the collected data as JSON to a file, `-` is standard error"""
+        if not self.enabled:
+            return
+        data = {
+            'phases': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                       for name, (seconds, calls) in self.phases.items()},
+            'counters': self.counters
+        }
+        if dest == '-':
+            json.dump(data, sys.stderr, indent=2)
+            sys.stderr.write('\n')
+        else:
+            with open(dest, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+                f.write('\n')
+
+
+def add_profile_argument(parser):
+    """Add the common `--profile` and `--profile-file` options to an argument parser"""
+    parser.add_argument('--profile', action='store_true',
+                        help='report per-phase timings and counters as JSON')
+    parser.add_argument('--profile-file', default='-', metavar='FILE',
+                        help='file the profile is written to (default: standard error)')
@@ -0,0 +1,99 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Backends running one `tb_axi_llc` parameter point of a sweep
+
+A backend is prepared once in the repository root, `run` is then called in parallel, each time
+with its own work directory, and has to leave the simulation log in `<work_dir>/sim.log`.
+"""
+import os
+import subprocess
+from llc_model import run_testbench
+from perf_log import format_perf_dump
+
+LOG_NAME = 'sim.log'
+
+
+class Backend:
+    """Base class of the sweep backends"""
+    name = None
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def prepare(self):
+        """Steps shared by all points, e.g. the compilation of the sources"""
+
+    def run(self, params, work_dir, seed):
+        """Simulate one parameter point, returns the path of the log"""
+        raise NotImplementedError
+
+    def _call(self, cmd, cwd, log):
+        with open(log, 'w', encoding='utf-8') as f:
+            result = subprocess.run(cmd, cwd=cwd, stdout=f, stderr=subprocess.STDOUT, check=False)
+        if result.returncode:
+            raise RuntimeError(f'`{" ".join(cmd)}` failed with {result.returncode}, see {log}')
+
+
+class ModelBackend(Backend):
+    """Functional model of the LLC, see `llc_model.testbench`; no simulator needed"""
+    name = 'model'
+
+    def run(self, params, work_dir, seed):
+        counters = run_testbench(params, seed)
+        lines = format_perf_dump(counters.bytes, counters.num, counters.cycles,
+                                 params['TbAxiDataWidthFull'])
+        log = os.path.join(work_dir, LOG_NAME)
+        with open(log, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines + ['Tests ended!']) + '\n')
+        return log
+
+
+class VsimBackend(Backend):
+    """QuestaSim, the parameters are overridden with `-G`"""
+    name = 'vsim'
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.vsim = os.environ.get('VSIM', 'vsim')
+
+    def prepare(self):
+        subprocess.run(['make', 'scripts/compile_vsim.tcl'], cwd=self.root, check=True)
+        subprocess.run([self.vsim, '-64', '-c', '-do', 'source scripts/compile_vsim.tcl; quit'],
+                       cwd=self.root, check=True)
+
+    def run(self, params, work_dir, seed):
+        log = os.path.join(work_dir, LOG_NAME)
+        cmd = [self.vsim, '-64', '-c', '-t', '1ps', '-lib', os.path.join(self.root, 'work'),
+               'tb_axi_llc', f'-sv_seed={seed}', '-logfile', log, '-do', 'run -all; quit -f']
+        cmd += [f'-G{name}={value}' for name, value in params.items()]
+        self._call(cmd, work_dir, os.path.join(work_dir, 'vsim.out'))
+        return log
+
+
+class VcsBackend(Backend):
+    """Synopsys VCS, one executable per point elaborated with `-pvalue`"""
+    name = 'vcs'
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.vcs = os.environ.get('VCS_BIN', 'vcs')
+
+    def prepare(self):
+        subprocess.run(['make', 'vcs_compile'], cwd=self.root, check=True)
+
+    def run(self, params, work_dir, seed):
+        simv = os.path.join(work_dir, 'simv')
+        # same arguments as `bin/%.vcs` of the Makefile, but private object files
+        cmd = [self.vcs, '-full64', '-Mlib=work-vcs', f'-Mdir={os.path.join(work_dir, "csrc")}',
+               '-CFLAGS', '-Os']
+        cmd += [f'-pvalue+tb_axi_llc.{name}={value}' for name, value in params.items()]
+        cmd += ['tb_axi_llc', '-o', simv]
+        self._call(cmd, self.root, os.path.join(work_dir, 'vcs.log'))
+        log = os.path.join(work_dir, LOG_NAME)
+        self._call([simv, '+vcs+lic+wait', f'+ntb_random_seed={seed}'], work_dir, log)
+        return log
+
+
+BACKENDS = {backend.name: backend for backend in (ModelBackend, VsimBackend, VcsBackend)}
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Sweep the parameters of tb_axi_llc in parallel and collect the performance counters"""
+import os
+import sys
+import csv
+import json
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from perf_log import parse_log, BANDWIDTH_COUNTERS
+from sweep_backends import BACKENDS
+
+# command line option of every swept testbench parameter
+GRID = {
+    'TbSetAssociativity': 'set_associativity',
+    'TbNumLines': 'num_lines',
+    'TbNumBlocks': 'num_blocks',
+    'TbAxiDataWidthFull': 'data_width',
+    'TbNumWrites': 'num_writes',
+    'TbNumReads': 'num_reads'
+}
+# bandwidths printed, the CSV table has all of them
+SUMMARY = ('aw_slv_transfer', 'ar_slv_transfer', 'aw_mst_transfer', 'ar_mst_transfer')
+
+
+def point_key(backend, params, seed, tag):
+    """Name of the work directory of a point, a hash of everything influencing its result"""
+    desc = json.dumps({'backend': backend, 'params': params, 'seed': seed, 'tag': tag},
+                      sort_keys=True)
+    return hashlib.sha1(desc.encode()).hexdigest()[:16]
+
+
+def run_point(job):
+    """Simulate one point unless its result is cached, returns its result"""
+    backend, params, work_dir, seed, force = job
+    result_file = os.path.join(work_dir, 'result.json')
+    if not force and os.path.exists(result_file):
+        with open(result_file, 'r', encoding='utf-8') as f:
+            return {**json.load(f), 'cached': True}
+    os.makedirs(work_dir, exist_ok=True)
+    log = backend.run(params, work_dir, seed)
+    record = parse_log(log)
+    if not record['dumps']:
+        raise RuntimeError(f'{log}: no performance counter dump found')
+    dump = record['dumps'][-1]
+    result = {'params': params, 'seed': seed, 'backend': backend.name, 'log': log,
+              'tests_ended': record['tests_ended'], 'messages': record['messages'],
+              'max_bandwidth': dump['max_bandwidth'], 'bandwidth': dump['bandwidth'],
+              'utilization': dump['utilization']}
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+        f.write('\n')
+    return {**result, 'cached': False}
+
+
+def make_jobs(args, backend):
+    """Job of every combination of the swept parameters"""
+    jobs = []
+    for point in itertools.product(*(getattr(args, option) for option in GRID.values())):
+        params = dict(zip(GRID, point))
+        key = point_key(backend.name, params, args.seed, args.tag)
+        jobs.append((backend, params, os.path.abspath(os.path.join(args.work_dir, key)),
+                     args.seed, args.force))
+    return jobs
+
+
+def run_points(jobs, num_workers):
+    """Results of all points, None for the failed ones, and the number of failed points"""
+    results = [None] * len(jobs)
+    failed = 0
+    if num_workers == 1:
+        for idx, job in enumerate(jobs):
+            try:
+                results[idx] = run_point(job)
+            except (OSError, RuntimeError) as err:
+                print(err, file=sys.stderr)
+                failed += 1
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = {executor.submit(run_point, job): idx for idx, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except (OSError, RuntimeError) as err:
+                    print(err, file=sys.stderr)
+                    failed += 1
+    return results, failed
+
+
+def print_table(header, rows):
+    """Print the swept parameters and the summary bandwidths of every point"""
+    shown = [header.index(name) for name in list(GRID) + ['cached'] + list(SUMMARY)]
+    print(' '.join(f'{header[idx]:>18}' for idx in shown))
+    for row in rows:
+        print(' '.join(f'{row[idx]:18.3f}' if isinstance(row[idx], float)
+                       else f'{str(row[idx]):>18}' for idx in shown))
+
+
+def main():
+    """Simulate the missing points of the sweep and report the bandwidths of all of them"""
+    parser = argparse.ArgumentParser(
+        description='Run tb_axi_llc for every combination of the given parameters in a bounded '
+        'pool of workers, each point in its own work directory. Results are cached by a hash of '
+        'the point, so an interrupted or extended sweep only runs the missing points.')
+    parser.add_argument('--set-associativity', type=int, nargs='+', default=[8],
+                        help='TbSetAssociativity values (default: %(default)s)')
+    parser.add_argument('--num-lines', type=int, nargs='+', default=[256],
+                        help='TbNumLines values (default: %(default)s)')
+    parser.add_argument('--num-blocks', type=int, nargs='+', default=[8],
+                        help='TbNumBlocks values (default: %(default)s)')
+    parser.add_argument('--data-width', type=int, nargs='+', default=[128],
+                        help='TbAxiDataWidthFull values (default: %(default)s)')
+    parser.add_argument('--num-writes', type=int, nargs='+', default=[1100],
+                        help='TbNumWrites values (default: %(default)s)')
+    parser.add_argument('--num-reads', type=int, nargs='+', default=[1500],
+                        help='TbNumReads values (default: %(default)s)')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='model',
+                        help='simulator running the points, `model` is the functional model of '
+                        'util/llc_model which only approximates the cycles (default: %(default)s)')
+    parser.add_argument('--root', default=os.path.join(os.path.dirname(__file__), '..'),
+                        help='repository root (default: the parent of util)')
+    parser.add_argument('--work-dir', default='sweep',
+                        help='directory of the per-point work directories (default: %(default)s)')
+    parser.add_argument('--tag', default='',
+                        help='extra cache key, e.g. the RTL revision, to separate sweeps')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the simulations')
+    parser.add_argument('--force', action='store_true', help='ignore cached results')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of points simulated at the same time (default: all cores)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='also write the result table as CSV to this file')
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.backend](args.root)
+    jobs = make_jobs(args, backend)
+
+    if args.force or not all(os.path.exists(os.path.join(job[2], 'result.json')) for job in jobs):
+        backend.prepare()
+
+    results, failed = run_points(jobs, args.jobs)
+
+    header = list(GRID) + ['cached', 'max_bandwidth'] + list(BANDWIDTH_COUNTERS) + ['work_dir']
+    rows = []
+    for job, result in zip(jobs, results):
+        if result is None:
+            continue
+        rows.append([result['params'][name] for name in GRID] +
+                    [result['cached'], result['max_bandwidth']] +
+                    [result['bandwidth'].get(name) for name in BANDWIDTH_COUNTERS] + [job[2]])
+
+    print_table(header, rows)
+    print(f'{len(rows)} points, {sum(row[len(GRID)] for row in rows)} cached, {failed} failed')
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Tests of the util scripts and the LLC model, run with `scripts/python-test`"""
@@ -0,0 +1,48 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Tests of the bloom filter model against `axi_llc_lock_box_bloom`"""
+import re
+from pathlib import Path
+import pytest
+from llc_model import CbFilter, BloomParams
+from llc_model.config import clog2
+
+RTL_PATH = (Path(__file__).resolve().parents[2] / 'src' / 'hit_miss_detect'
+            / 'axi_llc_lock_box_bloom.sv')
+
+
+def localparam(name):
+    """Expression of an `int unsigned` localparam of the lock box, without package prefixes"""
+    source = RTL_PATH.read_text(encoding='utf-8')
+    expr = re.search(r'localparam int unsigned ' + name + r'\s*=\s*([^;]*);', source).group(1)
+    return ' '.join(expr.replace('axi_llc_pkg::', '').replace('Cfg.', '').split())
+
+
+def evaluate(expr, names):
+    """Value of `COND ? A : B`, `X > Y` or a sum of names and numbers, the forms used by the RTL"""
+    if '?' in expr:
+        cond, choices = expr.split('?', 1)
+        first, second = choices.split(':', 1)
+        return evaluate(first, names) if evaluate(cond, names) else evaluate(second, names)
+    expr = expr.strip('() ')
+    if '>' in expr:
+        left, right = expr.split('>')
+        return evaluate(left, names) > evaluate(right, names)
+    terms = re.findall(r'([+-]?)\s*(\w+)', expr)
+    return sum((-1 if sign == '-' else 1) * (int(term) if term.isdigit() else names[term])
+               for sign, term in terms)
+
+
+@pytest.mark.parametrize('hash_width', range(2, 11))
+def test_hash_width_matches_rtl(hash_width):
+    """The model limits the hash width to the data width like the HashWidth localparam"""
+    for set_associativity in (1, 2, 4, 8):
+        for num_lines in (2, 4, 16, 256):
+            names = {'SetAssociativity': set_associativity, 'IndexLength': clog2(num_lines),
+                     'BloomHashWidth': hash_width}
+            names['DataWidth'] = evaluate(localparam('DataWidth'), names)
+            bloom = CbFilter(set_associativity, num_lines, BloomParams(hash_width=hash_width))
+            assert bloom.data_width == names['DataWidth']
+            assert bloom.params.hash_width == evaluate(localparam('HashWidth'), names)
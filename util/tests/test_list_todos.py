@@ -0,0 +1,58 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Tests of list-todos.py on a generated git repository"""
+import sys
+import subprocess
+from pathlib import Path
+
+LIST_TODOS = Path(__file__).resolve().parents[1] / 'list-todos.py'
+
+# files of the repository, their lines are committed by three authors in turn
+FILES = {
+    'src/a.sv': ['module a;', '// TODO: reset', '// todo and FIXME', 'endmodule'],
+    'src/b.py': ['x = 1', '# fix me later', '# Fixme: TODO twice'],
+    'src/c.py': ['y = 2', '# nothing to do here'],
+    'doc/d.sv': ['// TODO in an excluded directory'],
+    'e.c': ['int e; /* todo */'],
+}
+
+
+def commit_lines(repo, author, lines):
+    """Append the given lines of FILES to their files and commit them as author"""
+    for path, line_no in lines:
+        path = repo / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(FILES[str(path.relative_to(repo))][line_no] + '\n')
+        subprocess.run(['git', 'add', str(path)], cwd=repo, check=True)
+    subprocess.run(['git', '-c', f'user.name={author}', '-c', 'user.email=dev@example.com',
+                    'commit', '-q', '-m', f'Lines of {author}'], cwd=repo, check=True)
+
+
+def list_todos(repo, *options):
+    """Output of list-todos.py for the .sv, .py and .c files outside of doc"""
+    result = subprocess.run([sys.executable, str(LIST_TODOS), *options, '.sv .py .c', 'doc/d.sv'],
+                            cwd=repo, capture_output=True, text=True, check=False)
+    assert result.returncode == 1, result.stderr
+    return result.stdout
+
+
+def test_fast_mode_matches_full_blame(tmp_path):
+    """Pre-filtering and blaming only the matching lines finds the same TODOs per author"""
+    subprocess.run(['git', 'init', '-q'], cwd=tmp_path, check=True)
+    lines = [(path, line_no) for path, file_lines in FILES.items()
+             for line_no in range(len(file_lines))]
+    for idx, author in enumerate(('Alice', 'Bob', 'Carol')):
+        commit_lines(tmp_path, author, lines[idx::3])
+    # uncommitted changes are not blamed
+    with open(tmp_path / 'src/c.py', 'a', encoding='utf-8') as f:
+        f.write('# TODO not committed\n')
+
+    expected = list_todos(tmp_path)
+    assert 'TODOs in src/a.sv' in expected
+    assert 'doc/d.sv' not in expected
+    assert 'src/c.py' not in expected
+    assert list_todos(tmp_path, '--fast', '-j', '1') == expected
+    assert list_todos(tmp_path, '--fast', '-j', '2') == expected
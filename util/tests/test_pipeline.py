@@ -0,0 +1,40 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Tests of the cycle-level pipeline model"""
+import numpy as np
+from llc_model import Descriptors, SyntheticLoad, PipelineModel
+
+NUM_GROUPS = 8
+
+
+def repeated(group, gap):
+    """The descriptors of `group` repeated NUM_GROUPS times, starting every `gap` cycles"""
+    return Descriptors(np.concatenate([group.arrival + idx * gap for idx in range(NUM_GROUPS)]),
+                       np.tile(group.write, NUM_GROUPS), np.tile(group.beats, NUM_GROUPS),
+                       np.tile(group.miss, NUM_GROUPS), np.tile(group.evict, NUM_GROUPS))
+
+
+def test_sparse_trace_same_fifo_high_water_marks():
+    """Groups far apart fill the FIFOs like groups just after the previous one drained"""
+    group = Descriptors.synthetic(60, SyntheticLoad(rate=0.5), np.random.default_rng(1))
+    model = PipelineModel(mem_latency=40)
+    dense = model.run(repeated(group, 5000))
+    sparse = model.run(repeated(group, 1_000_000))
+    assert sparse['completed'] == dense['completed'] == NUM_GROUPS * len(group)
+    assert sparse['cycles'] == dense['cycles'] + (NUM_GROUPS - 1) * (1_000_000 - 5000)
+    assert sparse['stall_cycles'] == dense['stall_cycles']
+    assert sparse['mean_latency'] == dense['mean_latency']
+    for name, fifo in dense['fifos'].items():
+        assert fifo['max_used'] > 0
+        for counter in ('max_used', 'full_cycles', 'backpressure_cycles'):
+            assert sparse['fifos'][name][counter] == fifo[counter]
+
+
+def test_max_cycles_ends_in_idle_stretch():
+    """A limit inside an idle stretch is the simulated length"""
+    descs = Descriptors([0, 1_000_000], [False, True], [8, 8], [True, True], [False, True])
+    report = PipelineModel().run(descs, max_cycles=500_000)
+    assert report['completed'] == 1
+    assert report['cycles'] == 500_000
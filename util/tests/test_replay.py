@@ -0,0 +1,61 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Tests of the replay files against the `replay_rec_t` of `tb_axi_llc`"""
+import re
+from pathlib import Path
+import numpy as np
+from llc_model import Trace, write_replay, read_replay
+
+TB_PATH = Path(__file__).resolve().parents[2] / 'test' / 'tb_axi_llc.sv'
+
+
+def packed_struct(name):
+    """Fields of a packed struct typedef of the testbench as (name, lsb, width), MSB first"""
+    source = TB_PATH.read_text(encoding='utf-8')
+    body = re.search(r'typedef struct packed \{([^}]*)\}\s*' + name + ';', source).group(1)
+    fields = []
+    for msb, lsb, field in re.findall(r'logic\s*(?:\[(\d+):(\d+)\])?\s*(\w+);', body):
+        fields.append((field, int(msb or 0) - int(lsb or 0) + 1))
+    lsb = sum(width for _, width in fields)
+    layout = []
+    for field, width in fields:
+        lsb -= width
+        layout.append((field, lsb, width))
+    return layout
+
+
+def test_records_match_replay_rec_t(tmp_path):
+    """Every field of a written record sits at the bits of its `replay_rec_t` field"""
+    rng = np.random.default_rng(5)
+    num = 200
+    trace = Trace(rng.integers(0, 1 << 63, num, dtype=np.uint64), rng.random(num) < 0.5,
+                  len=rng.integers(0, 256, num), size=rng.integers(0, 8, num),
+                  burst=rng.integers(0, 3, num), cycle=np.cumsum(rng.integers(0, 1 << 20, num)),
+                  id=rng.integers(0, 1 << 16, num))
+    path = tmp_path / 'trace.axlr'
+    write_replay(path, trace)
+
+    layout = packed_struct('replay_rec_t')
+    assert sum(width for _, _, width in layout) == 128
+    data = path.read_bytes()
+    # the testbench reads the header and the records as big-endian 128-bit words
+    header = int.from_bytes(data[:16], 'big')
+    assert header >> 96 == int.from_bytes(b'AXLR', 'big')
+    assert (header >> 64 & 0xffff_ffff, header >> 32 & 0xffff_ffff, header & 0xffff_ffff) == \
+        (1, int(np.count_nonzero(trace.write)), num - int(np.count_nonzero(trace.write)))
+    expected = {'gap': np.diff(trace.cycle, prepend=trace.cycle[:1]), 'id': trace.id,
+                'len': trace.len, 'size': trace.size, 'burst': trace.burst,
+                'write': trace.write, 'reserved': np.zeros(num, dtype=np.int64),
+                'addr': trace.addr}
+    assert sorted(expected) == sorted(field for field, _, _ in layout)
+    for idx in range(num):
+        record = int.from_bytes(data[16 * (idx + 1):16 * (idx + 2)], 'big')
+        for field, lsb, width in layout:
+            assert record >> lsb & ((1 << width) - 1) == int(expected[field][idx]), field
+
+    replayed = read_replay(path)
+    for field in ('addr', 'write', 'len', 'size', 'burst', 'id'):
+        assert np.array_equal(getattr(replayed, field), getattr(trace, field))
+    assert np.array_equal(replayed.cycle, trace.cycle - trace.cycle[0])
@@ -0,0 +1,62 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Tests of the single-pass SPM way partitioning advisor"""
+from collections import OrderedDict
+import numpy as np
+from llc_model import LlcConfig, AddressMap, Trace, advise
+
+CACHED_START = 0x8000_0000
+RANGES = [(CACHED_START, CACHED_START + 96, 'table'),
+          (CACHED_START + 256, CACHED_START + 512, 'stack'),
+          (CACHED_START + 1024, CACHED_START + 1400, 'buffer')]
+
+
+def lru_replay(lines, writes, num_sets, ways):
+    """Hits, misses and writebacks of an LRU cache with `ways` ways, flushed at the end"""
+    sets = [OrderedDict() for _ in range(num_sets)]
+    hits = misses = writebacks = 0
+    for line, write in zip(lines, writes):
+        lru = sets[line % num_sets]
+        if line in lru:
+            hits += 1
+            lru.move_to_end(line)
+            lru[line] |= write
+        else:
+            misses += 1
+            if len(lru) == ways:
+                writebacks += lru.popitem(last=False)[1]
+            lru[line] = write
+    return hits, misses, writebacks + sum(sum(lru.values()) for lru in sets)
+
+
+def test_single_pass_matches_lru_replay_per_spm_mask():
+    """The counters of every SPM way count equal a separate LRU replay of its cached ways"""
+    cfg = LlcConfig(4, 8, 2, 64, AddressMap(cached_start=CACHED_START,
+                                            cached_end=CACHED_START + 0x1_0000))
+    rng = np.random.default_rng(3)
+    num = 4000
+    # half of the accesses go to a hot area, the footprint is four times the cache
+    offset = np.where(rng.random(num) < 0.5, rng.integers(0, 640, num),
+                      rng.integers(0, 4 * cfg.spm_length, num)) & ~3
+    trace = Trace(CACHED_START + offset, rng.random(num) < 0.3, size=np.full(num, 2))
+    report = advise(trace, RANGES, cfg)
+    moved_ways = {entry['start']: entry['spm_ways'] for entry in report['placement']}
+    assert moved_ways
+    line_shift = cfg.block_offset_length + cfg.byte_offset_length
+    for result in report['results']:
+        s = result['spm_ways']
+        in_spm = np.zeros(num, dtype=bool)
+        for start, end, _ in RANGES:
+            if moved_ways.get(start, cfg.set_associativity + 1) <= s:
+                in_spm |= (trace.addr >= start) & (trace.addr < end)
+        if s == cfg.set_associativity:
+            expected = (0, 0, 0)
+        else:
+            expected = lru_replay((trace.addr[~in_spm] >> line_shift).tolist(),
+                                  trace.write[~in_spm].tolist(), cfg.num_lines,
+                                  cfg.set_associativity - s)
+        assert (result['hits'], result['misses'],
+                result['writeback_bytes'] // cfg.line_bytes) == expected
+        assert result['spm_accesses'] == np.count_nonzero(in_spm)
@@ -0,0 +1,39 @@
+# Copyright 2022 ETH Zurich and University of Bologna.
+# Solderpad Hardware License, Version 0.51, see LICENSE for details.
+# SPDX-License-Identifier: SHL-0.51
+
+"""Tests of the vectorized tag array model"""
+import numpy as np
+import pytest
+from llc_model import LlcConfig, TagArray, POLICIES
+
+# policies with state shared between the sets are always replayed one access at a time
+SET_PARALLEL = [name for name, policy in POLICIES.items() if not policy.sequential]
+
+
+def random_descriptors(cfg, num, rng):
+    """Line addresses in the cached and the SPM region, with writes and increasing cycles"""
+    lines = rng.integers(0, 8 * cfg.num_lines * cfg.set_associativity, num)
+    base = np.where(rng.random(num) < 0.1, cfg.spm_start, cfg.cached_start)
+    addr = base + (lines * cfg.line_bytes) % np.where(base == cfg.spm_start, cfg.spm_length,
+                                                      cfg.cached_end - cfg.cached_start)
+    return addr, rng.random(num) < 0.3, np.cumsum(rng.integers(1, 5, num))
+
+
+@pytest.mark.parametrize('policy', SET_PARALLEL)
+def test_set_parallel_replay_matches_sequential(policy):
+    """Replaying rounds of distinct sets gives the results of a replay in trace order"""
+    cfg = LlcConfig(4, 16, 2, 64)
+    parallel = TagArray(cfg, policy, spm_mask=0b0001)
+    sequential = TagArray(cfg, policy, spm_mask=0b0001)
+    sequential.policy.sequential = True
+    rng = np.random.default_rng(7)
+    for _ in range(2):
+        addr, write, cycle = random_descriptors(cfg, 3000, rng)
+        expected = sequential.replay(addr, write, cycle)
+        outcome = parallel.replay(addr, write, cycle)
+        assert np.array_equal(outcome.region, expected.region)
+        assert np.array_equal(outcome.lookup, expected.lookup)
+        assert outcome.hit.any() and outcome.writeback.any()
+    for name in ('tags', 'valid', 'dirty'):
+        assert np.array_equal(getattr(parallel, name), getattr(sequential, name))